@@ -0,0 +1,3 @@
+"""
+오프라인 벤치마크 (녹화 응답 기반 Gemini/Tavily 대체 클라이언트)
+"""
@@ -0,0 +1,165 @@
+"""
+벤치마크용 Gemini/Tavily 대체 클라이언트
+- recordings/의 녹화 응답을 반환 (API 키/네트워크 불필요)
+- 호출마다 지연 분포에서 뽑은 시간만큼 대기, 설정한 비율로 429/503 오류 발생
+- 호출 수/주입한 오류 수 집계
+"""
+import asyncio
+import hashlib
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+RECORDINGS_DIR = Path(__file__).parent / "recordings"
+
+
+@dataclass
+class Latency:
+    """
+    지연 분포 (초)
+
+    형식: "fixed:0.5" | "uniform:0.2,1.0" | "lognormal:0.8,0.4" (중앙값, 시그마) | "none"
+    """
+    kind: str = "none"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v]
+        if kind == "none":
+            return cls()
+        if kind == "fixed" and len(values) == 1:
+            return cls(kind, values[0])
+        if kind in ("uniform", "lognormal") and len(values) == 2:
+            return cls(kind, values[0], values[1])
+        raise ValueError(f"지연 분포 형식 오류: {spec} (fixed:s | uniform:lo,hi | lognormal:median,sigma | none)")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.a
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "lognormal":
+            return rng.lognormvariate(0, self.b) * self.a
+        return 0.0
+
+
+class InjectedError(Exception):
+    """주입된 API 오류 (code로 429/503 구분, 재시도/모델 전환 분류 대상)"""
+
+    def __init__(self, code: int):
+        self.code = code
+        status = "RESOURCE_EXHAUSTED" if code == 429 else "UNAVAILABLE"
+        super().__init__(f"{code} {status} (injected)")
+
+
+class FakeBackend:
+    """지연/오류 주입 공통 부분"""
+
+    def __init__(self, latency: Latency, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    async def _simulate(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample(self.rng))
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            raise InjectedError(self.rng.choice((429, 503)))
+
+
+def _pick(options: list, key: str):
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return options[int.from_bytes(digest, "big") % len(options)]
+
+
+class FakeGeminiModels(FakeBackend):
+    """google-genai client.aio.models 대체"""
+
+    def __init__(self, recordings: dict, latency: Latency, error_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__(latency, error_rate, seed)
+        self.routes = recordings["routes"]
+        self.default = recordings.get("default", "")
+
+    def answer(self, prompt: str) -> str:
+        for route in self.routes:
+            if route["match"] in prompt:
+                return _pick(route["responses"], prompt)
+        return self.default
+
+    @staticmethod
+    def _usage(prompt: str, text: str) -> SimpleNamespace:
+        # 토큰 수는 문자 수 기반 근사
+        return SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+
+    async def generate_content(self, model: str, contents: str, config=None):
+        await self._simulate()
+        text = self.answer(contents)
+        return SimpleNamespace(text=text, usage_metadata=self._usage(contents, text))
+
+    async def generate_content_stream(self, model: str, contents: str, config=None):
+        await self._simulate()
+        text = self.answer(contents)
+        usage = self._usage(contents, text)
+
+        async def chunks():
+            step = 32
+            for i in range(0, len(text), step):
+                await asyncio.sleep(0)
+                last = i + step >= len(text)
+                yield SimpleNamespace(text=text[i:i + step], usage_metadata=usage if last else None)
+
+        return chunks()
+
+    async def get(self, model: str):
+        return SimpleNamespace(name=model)
+
+
+class FakeTavilyClient(FakeBackend):
+    """AsyncTavilyClient 대체"""
+
+    def __init__(self, recordings: dict, latency: Latency, error_rate: float = 0.0, seed: Optional[int] = None):
+        super().__init__(latency, error_rate, seed)
+        self.sources = recordings["sources"]
+
+    async def search(self, query: str, **kwargs) -> dict:
+        await self._simulate()
+        if "research paper" in query:
+            source = "paper"
+        elif "site:reddit.com" in query:
+            source = "community"
+        else:
+            source = "web"
+        results = _pick(self.sources[source], query)
+        return {"query": query, "results": results[:kwargs.get("max_results", len(results))]}
+
+
+def load_recording(name: str, directory: Path = RECORDINGS_DIR) -> dict:
+    with open(directory / f"{name}.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def install_fakes(
+    gemini_latency: Latency,
+    tavily_latency: Latency,
+    gemini_error_rate: float = 0.0,
+    tavily_error_rate: float = 0.0,
+    seed: Optional[int] = None
+) -> tuple[FakeGeminiModels, FakeTavilyClient]:
+    """에이전트의 Gemini/Tavily 클라이언트 싱글톤을 대체 클라이언트로 교체"""
+    from src.graph import nodes
+    from src.tools import tavily_search
+
+    gemini = FakeGeminiModels(load_recording("gemini"), gemini_latency, gemini_error_rate, seed)
+    tavily = FakeTavilyClient(load_recording("tavily"), tavily_latency, tavily_error_rate, seed)
+    nodes._client = SimpleNamespace(aio=SimpleNamespace(models=gemini))
+    tavily_search._client = tavily
+    return gemini, tavily
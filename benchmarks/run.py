@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+"""
+오프라인 벤치마크 실행
+
+녹화 응답을 돌려주는 대체 Gemini/Tavily 클라이언트로 연구 그래프
+(run_research 경로) 또는 FastAPI 앱(/research, /research/stream)을
+지정한 동시성으로 실행하고 지연 시간/처리량/메모리/호출 수를 측정합니다.
+
+예:
+    python -m benchmarks.run --target graph --requests 200 --concurrency 8
+    python -m benchmarks.run --target api --stream --gemini-latency lognormal:0.8,0.4
+    python -m benchmarks.run --baseline benchmarks/results/이전결과.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import yaml
+
+BENCH_DIR = Path(__file__).parent
+PROJECT_ROOT = BENCH_DIR.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# 비교 출력에 쓰는 지표 (값이 작을수록 좋은지)
+COMPARED_METRICS = {
+    "latency_ms.p50": True,
+    "latency_ms.p95": True,
+    "latency_ms.p99": True,
+    "ttfb_ms.p50": True,
+    "requests_per_sec": False,
+    "peak_rss_mb": True,
+    "calls_per_request.gemini": True,
+    "calls_per_request.tavily": True,
+}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="3D Print Research Agent 오프라인 벤치마크")
+    parser.add_argument("--target", choices=["graph", "api"], default="graph",
+                        help="graph: run_research 직접 호출 / api: FastAPI 앱 (인프로세스)")
+    parser.add_argument("--stream", action="store_true", help="api 대상에서 /research/stream 사용 (첫 delta까지 시간 측정)")
+    parser.add_argument("--requests", type=int, default=100, help="측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=0, help="측정에서 제외할 사전 요청 수")
+    parser.add_argument("--workload", default=str(BENCH_DIR / "queries.jsonl"), help="질문 목록 (JSONL)")
+    parser.add_argument("--mode", choices=["fast", "full", "auto"], help="모든 요청의 모드 (없으면 질문별/설정값)")
+    parser.add_argument("--no-cache", action="store_true", help="검색/LLM/응답 캐시 비활성화")
+    parser.add_argument("--gemini-latency", default="lognormal:0.8,0.4",
+                        help="fixed:s | uniform:lo,hi | lognormal:median,sigma | none")
+    parser.add_argument("--tavily-latency", default="lognormal:0.4,0.3")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--tavily-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE",
+                        help="settings.yaml 값 덮어쓰기 (예: rate_limit.gemini.requests_per_second=50)")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<시각>-<커밋>.json)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    return parser.parse_args(argv)
+
+
+def _set_path(settings: dict, key: str, value):
+    node = settings
+    parts = key.split(".")
+    for part in parts[:-1]:
+        node = node.setdefault(part, {})
+    node[parts[-1]] = value
+
+
+def prepare_settings(args: argparse.Namespace) -> Path:
+    """
+    벤치마크용 설정 파일 생성 후 SETTINGS_PATH로 지정
+
+    이전 실행의 디스크 캐시/세션 상태가 결과에 섞이지 않도록
+    메모리 저장소만 사용합니다. src 모듈 import 전에 호출해야 합니다.
+    """
+    with open(PROJECT_ROOT / "config" / "settings.yaml", "r", encoding="utf-8") as f:
+        settings = yaml.safe_load(f) or {}
+
+    _set_path(settings, "gemini.startup_probe", False)
+    _set_path(settings, "cache.search.disk_path", None)
+    _set_path(settings, "checkpointer.backend", "memory")
+    _set_path(settings, "jobs.backend", "memory")
+    if args.no_cache:
+        for name in ("search", "llm", "response"):
+            _set_path(settings, f"cache.{name}.enabled", False)
+    for override in args.overrides:
+        key, sep, value = override.partition("=")
+        if not sep:
+            raise SystemExit(f"--set 형식 오류: {override} (KEY=VALUE)")
+        _set_path(settings, key, yaml.safe_load(value))
+
+    path = Path(tempfile.mkdtemp(prefix="bench-")) / "settings.yaml"
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(settings, f, allow_unicode=True)
+    os.environ["SETTINGS_PATH"] = str(path)
+    return path
+
+
+def load_workload(path: str, mode: str | None) -> list[dict]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                if mode:
+                    item["mode"] = mode
+                items.append(item)
+    if not items:
+        raise SystemExit(f"질문 목록이 비어 있습니다: {path}")
+    return items
+
+
+def percentiles(values: list[float]) -> dict:
+    """최근접 순위 백분위수 (ms)"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return round(ordered[index], 1)
+
+    return {
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def git_revision() -> dict:
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+class GraphTarget:
+    """run_research 경로 (응답 캐시 포함) 직접 호출"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def request(self, item: dict) -> dict:
+        from src.graph.workflow import compose_query, run_research_detailed
+
+        result = await run_research_detailed(
+            compose_query(item["query"], item.get("material"), item.get("current_params")),
+            current_params=item.get("current_params"),
+            material=item.get("material"),
+            mode=item.get("mode")
+        )
+        return {"ok": bool(result["response"]), "cached": result["cached"]}
+
+
+class ApiTarget:
+    """FastAPI 앱을 인프로세스 ASGI로 호출 (네트워크 제외, 직렬화/검증 포함)"""
+
+    def __init__(self, stream: bool = False):
+        self.stream = stream
+        self.client = None
+
+    async def __aenter__(self):
+        import httpx
+        from src.api.main import app
+
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        return False
+
+    async def request(self, item: dict) -> dict:
+        if not self.stream:
+            response = await self.client.post("/research", json=item)
+            body = response.json() if response.status_code == 200 else {}
+            return {"ok": response.status_code == 200 and body.get("success", False), "cached": body.get("cached", False)}
+
+        started = time.perf_counter()
+        ttfb = None
+        ok = False
+        async with self.client.stream("POST", "/research/stream", json=item) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[len("data: "):])
+                if ttfb is None and event["type"] in ("delta", "complete"):
+                    ttfb = (time.perf_counter() - started) * 1000
+                if event["type"] == "complete":
+                    ok = True
+                elif event["type"] == "error":
+                    ok = False
+        return {"ok": ok, "cached": False, "ttfb_ms": ttfb}
+
+
+async def drive(target, items: list[dict], total: int, concurrency: int, offset: int = 0) -> list[dict]:
+    """동시성 concurrency인 폐쇄 루프로 total개 요청 실행"""
+    samples = []
+    next_index = offset
+
+    async def worker():
+        nonlocal next_index
+        while next_index < offset + total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                outcome = await target.request(items[index % len(items)])
+            except Exception as e:
+                outcome = {"ok": False, "cached": False, "error": f"{type(e).__name__}: {e}"}
+            outcome["latency_ms"] = (time.perf_counter() - started) * 1000
+            samples.append(outcome)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return samples
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    from benchmarks.fakes import Latency, install_fakes
+
+    gemini, tavily = install_fakes(
+        Latency.parse(args.gemini_latency),
+        Latency.parse(args.tavily_latency),
+        args.gemini_error_rate,
+        args.tavily_error_rate,
+        seed=args.seed
+    )
+    items = load_workload(args.workload, args.mode)
+    target = ApiTarget(stream=args.stream) if args.target == "api" else GraphTarget()
+
+    async with target:
+        if args.warmup:
+            await drive(target, items, args.warmup, args.concurrency)
+        calls_before = {"gemini": gemini.calls, "tavily": tavily.calls}
+        errors_before = {"gemini": gemini.errors, "tavily": tavily.errors}
+
+        started = time.perf_counter()
+        samples = await drive(target, items, args.requests, args.concurrency, offset=args.warmup)
+        duration = time.perf_counter() - started
+
+    from src.tools import get_rate_limit_stats
+
+    completed = len(samples)
+    failures = [s for s in samples if not s["ok"]]
+    ttfb = [s["ttfb_ms"] for s in samples if s.get("ttfb_ms") is not None]
+    results = {
+        "requests": completed,
+        "errors": len(failures),
+        "cached_responses": sum(1 for s in samples if s["cached"]),
+        "duration_s": round(duration, 3),
+        "requests_per_sec": round(completed / duration, 2) if duration else None,
+        "latency_ms": percentiles([s["latency_ms"] for s in samples]),
+        "peak_rss_mb": peak_rss_mb(),
+        "calls_per_request": {
+            "gemini": round((gemini.calls - calls_before["gemini"]) / completed, 3),
+            "tavily": round((tavily.calls - calls_before["tavily"]) / completed, 3),
+        },
+        "injected_errors": {
+            "gemini": gemini.errors - errors_before["gemini"],
+            "tavily": tavily.errors - errors_before["tavily"],
+        },
+        "rate_limit": get_rate_limit_stats(),
+        "error_samples": sorted({s["error"] for s in failures if s.get("error")})[:5],
+    }
+    if ttfb:
+        results["ttfb_ms"] = percentiles(ttfb)
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "results": results,
+    }
+
+
+def _lookup(results: dict, dotted: str):
+    node = results
+    for part in dotted.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def print_summary(report: dict, baseline: dict | None = None):
+    results = report["results"]
+    print(f"target={report['config']['target']} requests={results['requests']} "
+          f"concurrency={report['config']['concurrency']} errors={results['errors']} "
+          f"cached={results['cached_responses']}")
+    print(f"{'metric':<28}{'current':>12}" + (f"{'baseline':>12}{'change':>10}" if baseline else ""))
+    for metric, lower_is_better in COMPARED_METRICS.items():
+        current = _lookup(results, metric)
+        if current is None:
+            continue
+        line = f"{metric:<28}{current:>12}"
+        if baseline:
+            previous = _lookup(baseline["results"], metric)
+            if previous:
+                change = (current - previous) / previous * 100
+                worse = change > 0 if lower_is_better else change < 0
+                line += f"{previous:>12}{change:>+9.1f}%" + (" !" if worse and abs(change) >= 10 else "")
+        print(line)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    prepare_settings(args)
+    report = asyncio.run(run_benchmark(args))
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = BENCH_DIR / "results" / f"{stamp}-{(report['commit'] or 'nogit')[:8]}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_summary(report, baseline)
+    print(f"결과 저장: {output}")
+
+
+if __name__ == "__main__":
+    main()
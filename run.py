@@ -18,7 +18,7 @@ load_dotenv()
 
 async def run_cli(query: str):
     """CLI 모드로 실행"""
-    from src.graph.workflow import run_research
+    from src.graph.workflow import close_agent, run_research
 
     print("=" * 60)
     print("3D Printing Autonomous Research Agent")
@@ -33,11 +33,13 @@ async def run_cli(query: str):
     except Exception as e:
         print(f"오류 발생: {e}")
         raise
+    finally:
+        await close_agent()
 
 
 async def run_interactive():
     """대화형 모드"""
-    from src.graph.workflow import run_research
+    from src.graph.workflow import close_agent, run_research
 
     print("=" * 60)
     print("3D Printing Autonomous Research Agent")
@@ -67,6 +69,67 @@ async def run_interactive():
         except Exception as e:
             print(f"오류: {e}")
 
+    await close_agent()
+
+
+async def run_batch(input_path: str, output_path: str | None, concurrency: int | None):
+    """배치 모드: JSONL 입력 → JSONL 출력 (완료 순서대로 기록)"""
+    import json
+    from src.graph.batch import run_research_batch
+    from src.graph.workflow import close_agent
+
+    items = []
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                # 잘못된 줄은 해당 항목만 실패로 기록 (id에 줄 번호)
+                item = {"query": None, "id": f"line:{line_number}"}
+            items.append(item if isinstance(item, dict) else {"query": item})
+
+    out = open(output_path, "w", encoding="utf-8") if output_path else sys.stdout
+    succeeded = 0
+    try:
+        async for result in run_research_batch(items, max_concurrency=concurrency):
+            succeeded += result["success"]
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if output_path:
+            out.close()
+        await close_agent()
+
+    print(f"배치 완료: {succeeded}/{len(items)} 성공", file=sys.stderr)
+
+
+async def run_replay(trace_path: str, latency: str, current_settings: bool):
+    """재현 모드: 추적 파일의 기록된 외부 응답으로 그래프 재실행 (API 키 불필요)"""
+    from src.tracing import replay_trace
+
+    report = await replay_trace(trace_path, latency=latency, recorded_settings=not current_settings)
+
+    print(f"추적: {report['trace_id']}  질문: {report['query']}")
+    if report["truncated"]:
+        print("주의: 용량 제한으로 일부 내용이 빠진 추적입니다.")
+    print(f"전체 시간: 기록 {report['recorded_ms']}ms / 재현 {report['replay_ms']}ms")
+    print("-" * 60)
+    print(f"{'노드':<20}{'기록(ms)':>12}{'재현(ms)':>12}  상태 변경")
+    for row in report["nodes"]:
+        matches = {True: "일치", False: "다름", None: "-"}[row["delta_matches"]]
+        recorded = row["recorded_ms"] if row["recorded_ms"] is not None else "-"
+        replayed = row["replay_ms"] if row["replay_ms"] is not None else "-"
+        print(f"{row['node']:<20}{recorded:>12}{replayed:>12}  {matches}")
+    print("-" * 60)
+    calls = report["calls"]
+    print(f"외부 호출: 일치 {calls['matched']}, 순서 대체 {calls['mismatched']}, 기록 없음 {calls['missing']}")
+    print(f"최종 응답 일치: {'예' if report['response_matches'] else '아니오'}")
+    if report["error"]:
+        print(f"오류: {report['error']}")
+
 
 def run_server(port: int = 8000):
     """API 서버 실행"""
@@ -107,7 +170,7 @@ def main():
     )
     parser.add_argument(
         "mode",
-        choices=["cli", "interactive", "server"],
+        choices=["cli", "interactive", "server", "batch", "replay"],
         help="실행 모드 선택"
     )
     parser.add_argument(
@@ -115,6 +178,37 @@ def main():
         type=str,
         help="CLI 모드에서 사용할 질문"
     )
+    parser.add_argument(
+        "-i", "--input",
+        type=str,
+        help="배치 모드 입력 JSONL (줄마다 {\"query\", \"material\", \"current_params\", \"mode\", \"id\"})"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        help="배치 모드 출력 JSONL (기본: 표준 출력)"
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        help="배치 모드 동시 실행 수 (기본: settings.yaml의 batch.max_concurrency)"
+    )
+    parser.add_argument(
+        "-t", "--trace",
+        type=str,
+        help="재현 모드 추적 파일 (data/traces/*.jsonl.gz)"
+    )
+    parser.add_argument(
+        "--latency",
+        choices=["none", "recorded"],
+        default="none",
+        help="재현 모드 외부 호출 지연 (recorded: 기록된 시간만큼 대기)"
+    )
+    parser.add_argument(
+        "--current-settings",
+        action="store_true",
+        help="재현 모드에서 기록 당시 설정 대신 현재 settings.yaml 사용"
+    )
     parser.add_argument(
         "-p", "--port",
         type=int,
@@ -124,6 +218,15 @@ def main():
 
     args = parser.parse_args()
 
+    # 재현 모드는 기록된 응답만 사용하므로 API 키 불필요
+    if args.mode == "replay":
+        if not args.trace:
+            print("재현 모드에서는 --trace 옵션이 필요합니다.")
+            print("예: python run.py replay --trace data/traces/20261017-120000-abc123.jsonl.gz")
+            sys.exit(1)
+        asyncio.run(run_replay(args.trace, args.latency, args.current_settings))
+        return
+
     # 환경 변수 확인
     if not check_env():
         sys.exit(1)
@@ -135,6 +238,13 @@ def main():
             sys.exit(1)
         asyncio.run(run_cli(args.query))
 
+    elif args.mode == "batch":
+        if not args.input:
+            print("배치 모드에서는 --input 옵션이 필요합니다.")
+            print("예: python run.py batch --input questions.jsonl --output answers.jsonl")
+            sys.exit(1)
+        asyncio.run(run_batch(args.input, args.output, args.concurrency))
+
     elif args.mode == "interactive":
         asyncio.run(run_interactive())
 
@@ -0,0 +1,359 @@
+"""
+비동기 연구 작업 큐
+- POST /jobs로 접수하고 워커 풀이 백그라운드에서 실행
+- 대기열이 가득 차면 접수 거부 (API에서 429)
+- 완료된 작업은 보관 기간 동안 결과 조회 가능 (유휴 상태에서도 주기적으로 정리)
+- 선택: SQLite 저장소로 서버 재시작 후에도 대기/실행 중 작업 복구
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from src.config import get_setting, resolve_path
+from src.metrics import request_trace
+from src.tools.rate_limiter import priority_lane
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class QueueFullError(Exception):
+    """대기열 한도 초과"""
+
+
+@dataclass
+class Job:
+    """연구 작업"""
+    id: str
+    request: dict
+    status: str = "queued"  # queued | running | succeeded | failed
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("request")
+        return data
+
+
+class MemoryJobStore:
+    """프로세스 메모리 작업 저장소"""
+
+    # 이벤트 루프에서 바로 호출해도 되는 저장소
+    blocking = False
+
+    def __init__(self, max_retained: int = 10_000):
+        self.max_retained = max_retained
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    def save(self, job: Job):
+        self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def unfinished(self) -> list[Job]:
+        return [job for job in self._jobs.values() if not job.done]
+
+    def prune(self, finished_before: float):
+        """보관 기간이 지난 완료 작업 삭제, 개수 초과 시 오래된 완료 작업부터 삭제"""
+        finished = [job for job in self._jobs.values() if job.done]
+        excess = len(self._jobs) - self.max_retained
+        for job in finished:
+            if job.finished_at < finished_before or excess > 0:
+                del self._jobs[job.id]
+                excess -= 1
+
+
+class SQLiteJobStore:
+    """SQLite 작업 저장소 (재시작 후 복구용, JobManager가 스레드에서 호출)"""
+
+    blocking = True
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " request TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _from_row(row) -> Job:
+        job_id, status, request, result, error, created_at, started_at, finished_at = row
+        return Job(
+            id=job_id,
+            request=json.loads(request),
+            status=status,
+            result=json.loads(result) if result else None,
+            error=error,
+            created_at=created_at,
+            started_at=started_at,
+            finished_at=finished_at
+        )
+
+    def save(self, job: Job):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id,
+                    job.status,
+                    json.dumps(job.request, ensure_ascii=False),
+                    json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+                    job.error,
+                    job.created_at,
+                    job.started_at,
+                    job.finished_at,
+                )
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def unfinished(self) -> list[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def prune(self, finished_before: float):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (finished_before,)
+            )
+            self._conn.commit()
+
+
+async def run_job(request: dict) -> dict:
+    """작업 하나 실행 (/research와 같은 처리)"""
+    from src.graph.workflow import compose_query, new_thread_id, run_research_detailed
+
+    session_id = request.get("session_id") or new_thread_id()
+    with request_trace() as trace:
+        result = await run_research_detailed(
+            compose_query(request["query"], request.get("material"), request.get("current_params")),
+            thread_id=session_id,
+            current_params=request.get("current_params"),
+            material=request.get("material"),
+            use_cache=request.get("use_cache", True),
+            mode=request.get("mode")
+        )
+    result = {**result, "session_id": session_id}
+    if request.get("include_timing"):
+        result["timing"] = trace.to_dict()
+    return result
+
+
+class JobManager:
+    """asyncio 워커 풀 + 대기열 한도 + 상태 이벤트 발행"""
+
+    def __init__(
+        self,
+        store,
+        workers: int = 2,
+        max_queue_depth: int = 100,
+        retention: float = 3600,
+        runner=run_job,
+        lane: str = "interactive",
+        prune_interval: float = 60
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_queue_depth = max_queue_depth
+        self.retention = retention
+        self.runner = runner
+        self.lane = lane
+        self.prune_interval = prune_interval
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._running = 0
+        # 저장 완료를 기다리는 접수 건 (대기열에 넣기 전이지만 자리는 차지)
+        self._reserved = 0
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    async def _store(self, method: str, *args):
+        """저장소 호출 (디스크 저장소는 이벤트 루프를 막지 않도록 스레드에서 실행)"""
+        func = getattr(self.store, method)
+        if getattr(self.store, "blocking", False):
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def start(self):
+        """워커 시작, 저장소에 남은 미완료 작업은 다시 대기열에 넣음"""
+        for job in await self._store("unfinished"):
+            job.status = "queued"
+            job.started_at = None
+            await self._store("save", job)
+            self._queue.put_nowait(job.id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._pruner()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, request: dict) -> Job:
+        # 저장을 기다리는 동안 다른 접수가 한도를 넘지 않도록 자리부터 예약
+        if self._queue.qsize() + self._reserved >= self.max_queue_depth:
+            raise QueueFullError(f"대기 중인 작업이 {self.max_queue_depth}개를 넘었습니다")
+        self._reserved += 1
+        try:
+            job = Job(id=uuid.uuid4().hex, request=request)
+            await self._store("save", job)
+            self._queue.put_nowait(job.id)
+        finally:
+            self._reserved -= 1
+        self._publish(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self._store("get", job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[dict]:
+        """작업 상태 스냅샷을 완료될 때까지 발행"""
+        updates: asyncio.Queue = asyncio.Queue()
+        self._subscribers[job_id].add(updates)
+        try:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            snapshot = job.to_dict()
+            while True:
+                yield snapshot
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    return
+                snapshot = await updates.get()
+        finally:
+            self._subscribers[job_id].discard(updates)
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def _publish(self, job: Job):
+        snapshot = job.to_dict()
+        for updates in self._subscribers.get(job.id, ()):
+            updates.put_nowait(snapshot)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            job = None
+            try:
+                job = await self.get(job_id)
+                if job is None or job.done:
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 저장소 오류: 워커는 계속 동작하고, 작업은 실패로 표시
+                logger.exception("작업 %s 처리 중 저장소 오류", job_id)
+                if job is None:
+                    continue
+                if not job.done:
+                    job.status = "failed"
+                    job.error = f"job store error: {e}"
+                    job.finished_at = time.time()
+                self._publish(job)
+                try:
+                    await self._store("save", job)
+                except Exception:
+                    logger.exception("작업 %s 실패 상태 저장 실패", job_id)
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        await self._store("save", job)
+        self._publish(job)
+        self._running += 1
+        try:
+            with priority_lane(self.lane):
+                job.result = await self.runner(job.request)
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            # 서버 종료: SQLite 저장소면 재시작 시 다시 실행
+            raise
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            self._running -= 1
+
+        job.finished_at = time.time()
+        await self._store("save", job)
+        self._publish(job)
+
+    async def _pruner(self):
+        """보관 기간이 지난 완료 작업 정리 (새 작업이 없어도 주기적으로)"""
+        while True:
+            try:
+                await self._store("prune", time.time() - self.retention)
+            except Exception:
+                logger.exception("완료 작업 정리 실패")
+            await asyncio.sleep(self.prune_interval)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() + self._reserved,
+            "running": self._running,
+            "workers": self.workers,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """설정 기반 작업 관리자 싱글톤"""
+    global _job_manager
+    if _job_manager is None:
+        if get_setting("jobs.backend", "memory") == "sqlite":
+            store = SQLiteJobStore(resolve_path(get_setting("jobs.sqlite_path", "data/cache/jobs.sqlite")))
+        else:
+            store = MemoryJobStore(max_retained=get_setting("jobs.max_retained", 10_000))
+        _job_manager = JobManager(
+            store,
+            workers=get_setting("jobs.workers", 2),
+            max_queue_depth=get_setting("jobs.max_queue_depth", 100),
+            retention=get_setting("jobs.retention_seconds", 3600),
+            lane=get_setting("jobs.lane", "interactive"),
+            prune_interval=get_setting("jobs.prune_interval_seconds", 60)
+        )
+    return _job_manager
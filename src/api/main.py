@@ -16,9 +16,9 @@ sys.path.insert(0, str(project_root))
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 import json
 import asyncio
 from dotenv import load_dotenv
@@ -26,8 +26,10 @@ from dotenv import load_dotenv
 # 환경 변수 로드
 load_dotenv()
 
-from src.graph.workflow import run_research, run_research_stream
-from src.tools.knowledge_base import KnowledgeBase
+from src.graph.workflow import close_agent, compose_query, new_thread_id, run_research_detailed, run_research_stream
+from src.tools.knowledge_base import get_knowledge_base
+from src.api.jobs import QueueFullError, get_job_manager
+from src.metrics import render_metrics, request_trace
 
 app = FastAPI(
     title="3D Printing Autonomous Research Agent",
@@ -44,15 +46,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 지식베이스 초기화
-kb = KnowledgeBase()
-
 
 class ResearchQuery(BaseModel):
     """연구 요청 모델"""
     query: str = Field(..., description="3D 프린팅 관련 질문")
     material: Optional[str] = Field(None, description="재료 타입 (PLA, ABS, PETG 등)")
     current_params: Optional[dict] = Field(None, description="현재 파라미터 설정")
+    use_cache: bool = Field(True, description="False면 응답 캐시를 우회")
+    session_id: Optional[str] = Field(
+        None,
+        max_length=128,
+        description="세션 ID (같은 ID로 요청하면 대화 상태 유지, 없으면 새로 발급)"
+    )
+    mode: Optional[Literal["fast", "full", "auto"]] = Field(
+        None,
+        description="fast: 지식베이스 즉답 우선 / full: 전체 검색 / auto: 지식베이스로 충분할 때만 즉답 (미지정 시 설정값)"
+    )
+    include_timing: bool = Field(False, description="True면 노드/외부 호출별 시간 분석을 응답에 포함")
 
     class Config:
         json_schema_extra = {
@@ -67,11 +77,30 @@ class ResearchQuery(BaseModel):
         }
 
 
+class BatchResearchItem(ResearchQuery):
+    """
+    배치 항목 (결과와 매칭할 id 선택)
+
+    session_id를 주면 그 세션에서 실행하고(같은 세션 항목은 순서대로),
+    include_timing이면 항목 결과에 시간 분석을 포함합니다.
+    """
+    id: Optional[str] = Field(None, description="결과에 그대로 돌려주는 항목 ID")
+
+
+class BatchResearchRequest(BaseModel):
+    """배치 연구 요청"""
+    items: list[BatchResearchItem] = Field(..., min_length=1)
+    max_concurrency: Optional[int] = Field(None, ge=1, le=32, description="동시에 실행할 연구 수")
+
+
 class ResearchResponse(BaseModel):
     """연구 응답 모델"""
     response: str
     sources: list[str] = []
     success: bool = True
+    cached: bool = False
+    session_id: Optional[str] = None
+    timing: Optional[dict] = None
     error: Optional[str] = None
 
 
@@ -89,6 +118,42 @@ class DefectGuideResponse(BaseModel):
     found: bool
 
 
+@app.on_event("startup")
+async def startup_health_check():
+    """Gemini 모델 상태 점검 (서버 시작을 막지 않도록 백그라운드 실행)"""
+    from src.config import get_setting
+    from src.graph.nodes import check_gemini_health
+
+    if not os.getenv("GOOGLE_API_KEY") or not get_setting("gemini.startup_probe", True):
+        return
+
+    async def probe():
+        try:
+            snapshot = await check_gemini_health()
+            logger.info(f"Gemini health check: resolved model = {snapshot['resolved_model']}")
+        except Exception as e:
+            logger.warning(f"Gemini health check failed: {e}")
+
+    asyncio.create_task(probe())
+
+
+@app.on_event("startup")
+async def start_job_workers():
+    """작업 큐 워커 시작"""
+    await get_job_manager().start()
+
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await get_job_manager().stop()
+
+
+@app.on_event("shutdown")
+async def close_research_agent():
+    """체크포인터 연결 종료 (작업 워커 정지 후)"""
+    await close_agent()
+
+
 @app.get("/")
 async def root():
     """API 상태 확인"""
@@ -102,7 +167,9 @@ async def root():
 @app.get("/health")
 async def health():
     """헬스 체크"""
-    return {"status": "healthy"}
+    from src.graph.model_router import get_model_router
+    router = get_model_router(os.getenv("GEMINI_MODEL", "gemini-2.5-flash"))
+    return {"status": "healthy", "gemini": router.snapshot()}
 
 
 @app.get("/debug/models")
@@ -123,6 +190,28 @@ async def list_models():
         return {"error": str(e)}
 
 
+@app.get("/debug/cache")
+async def cache_stats():
+    """캐시 적중/미스 통계 (모니터링용)"""
+    from src.memory import get_llm_cache_stats, get_response_cache_stats
+    from src.tools import get_search_cache_stats, get_rate_limit_stats
+    from src.graph.workflow import get_checkpointer_stats
+    return {
+        "search": get_search_cache_stats(),
+        "llm": get_llm_cache_stats(),
+        "response": get_response_cache_stats(),
+        "checkpointer": get_checkpointer_stats(),
+        "jobs": get_job_manager().stats(),
+        "rate_limit": get_rate_limit_stats()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """노드/외부 호출 지연 시간, 크기, 토큰, 오류 (Prometheus 텍스트 형식)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/research", response_model=ResearchResponse)
 async def research(query: ResearchQuery):
     """
@@ -133,22 +222,29 @@ async def research(query: ResearchQuery):
     """
     try:
         # 쿼리 강화 (재료, 파라미터 정보 추가)
-        enhanced_query = query.query
-        if query.material:
-            enhanced_query = f"[재료: {query.material}] {enhanced_query}"
-        if query.current_params:
-            params_str = ", ".join([f"{k}={v}" for k, v in query.current_params.items()])
-            enhanced_query = f"{enhanced_query} (현재 설정: {params_str})"
+        enhanced_query = compose_query(query.query, query.material, query.current_params)
 
         # 연구 실행
+        session_id = query.session_id or new_thread_id()
         logger.info(f"Starting research for query: {enhanced_query}")
-        response = await run_research(enhanced_query)
-        logger.info("Research completed successfully")
+        with request_trace() as trace:
+            result = await run_research_detailed(
+                enhanced_query,
+                thread_id=session_id,
+                current_params=query.current_params,
+                material=query.material,
+                use_cache=query.use_cache,
+                mode=query.mode
+            )
+        logger.info(f"Research completed successfully (cached={result['cached']})")
 
         return ResearchResponse(
-            response=response,
-            sources=[],  # TODO: 소스 추출
-            success=True
+            response=result["response"],
+            sources=result["sources"],
+            success=True,
+            cached=result["cached"],
+            session_id=session_id,
+            timing=trace.to_dict() if query.include_timing else None
         )
     except Exception as e:
         logger.error(f"Research error: {str(e)}", exc_info=True)
@@ -162,33 +258,100 @@ async def research_stream(query: ResearchQuery):
     """
     async def generate():
         try:
-            enhanced_query = query.query
-            if query.material:
-                enhanced_query = f"[재료: {query.material}] {enhanced_query}"
-
-            async for event in run_research_stream(enhanced_query):
+            enhanced_query = compose_query(query.query, query.material, query.current_params)
+
+            async for event in run_research_stream(
+                enhanced_query,
+                thread_id=query.session_id,
+                current_params=query.current_params,
+                mode=query.mode
+            ):
                 yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.01)  # 클라이언트 버퍼링 방지
 
         except Exception as e:
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
 
+    # 프록시 버퍼링 없이 조각이 바로 전달되도록
     return StreamingResponse(
         generate(),
-        media_type="text/event-stream"
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+@app.post("/research/batch")
+async def research_batch(batch: BatchResearchRequest):
+    """
+    배치 연구 (NDJSON 스트리밍)
+
+    항목마다 한 줄씩 완료 순서대로 반환합니다. 실패한 항목은 success=false로
+    표시되며 나머지 항목은 계속 실행됩니다.
+    """
+    from src.config import get_setting
+    from src.graph.batch import run_research_batch
+
+    max_items = get_setting("batch.max_items", 500)
+    if len(batch.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"배치 항목은 최대 {max_items}개입니다")
+
+    items = [item.model_dump() for item in batch.items]
+
+    async def generate():
+        async for result in run_research_batch(items, max_concurrency=batch.max_concurrency):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(query: ResearchQuery):
+    """
+    연구 작업 접수 (비동기)
+
+    작업 ID를 바로 반환합니다. 결과는 GET /jobs/{job_id}로 조회하거나
+    GET /jobs/{job_id}/events (SSE)로 상태 변화를 받을 수 있습니다.
+    대기열이 가득 차면 429를 반환합니다.
+    """
+    try:
+        job = await get_job_manager().submit(query.model_dump())
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return {"job_id": job.id, "status": job.status}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """작업 상태/결과 조회"""
+    job = await get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """작업 상태 변화 스트리밍 (SSE, 완료 시 종료)"""
+    manager = get_job_manager()
+    if await manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+
+    async def generate():
+        async for snapshot in manager.events(job_id):
+            yield f"data: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
 @app.get("/materials", response_model=list[str])
 async def list_materials():
     """지원하는 재료 목록"""
-    return list(kb.material_guides.keys())
+    return list(get_knowledge_base().material_guides.keys())
 
 
 @app.get("/materials/{material}", response_model=MaterialGuideResponse)
 async def get_material_guide(material: str):
     """특정 재료의 가이드 조회"""
-    guide = kb.get_material_guide(material)
+    guide = get_knowledge_base().get_material_guide(material)
     return MaterialGuideResponse(
         material=material.upper(),
         guide=guide,
@@ -199,13 +362,13 @@ async def get_material_guide(material: str):
 @app.get("/defects", response_model=list[str])
 async def list_defects():
     """알려진 결함 유형 목록"""
-    return list(kb.defect_guides.keys())
+    return list(get_knowledge_base().defect_guides.keys())
 
 
 @app.get("/defects/{defect}", response_model=DefectGuideResponse)
 async def get_defect_guide(defect: str):
     """특정 결함의 해결 가이드 조회"""
-    guide = kb.get_defect_solution(defect)
+    guide = get_knowledge_base().get_defect_solution(defect)
     return DefectGuideResponse(
         defect=defect,
         guide=guide,
@@ -216,13 +379,14 @@ async def get_defect_guide(defect: str):
 @app.get("/experiments")
 async def list_experiments():
     """저장된 실험 데이터 목록"""
-    return kb.experiments
+    return get_knowledge_base().experiments
 
 
 @app.post("/experiments")
 async def add_experiment(experiment: dict):
     """새 실험 데이터 추가"""
-    kb.add_experiment(experiment)
+    # 디스크 쓰기(fsync)가 이벤트 루프를 막지 않도록 스레드에서 실행
+    await asyncio.to_thread(get_knowledge_base().add_experiment, experiment)
     return {"success": True, "message": "실험 데이터가 추가되었습니다."}
 
 
@@ -0,0 +1,44 @@
+"""
+설정 로더 (config/settings.yaml)
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_SETTINGS_PATH = PROJECT_ROOT / "config" / "settings.yaml"
+
+
+@lru_cache(maxsize=1)
+def load_settings() -> dict:
+    """settings.yaml 로드 (SETTINGS_PATH 환경 변수로 경로 변경 가능)"""
+    path = Path(os.getenv("SETTINGS_PATH", DEFAULT_SETTINGS_PATH))
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """
+    점 표기 경로로 설정값 조회
+
+    예: get_setting("cache.search.enabled", True)
+    """
+    node: Any = load_settings()
+    for part in key.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
+
+
+def resolve_path(path: str | Path) -> Path:
+    """프로젝트 루트 기준 상대 경로를 절대 경로로 변환"""
+    path = Path(path)
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    return path
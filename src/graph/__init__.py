@@ -1,5 +1,5 @@
 # Graph module
-from .state import AgentState, SearchResult, ResearchPlan, ParameterRecommendation
+from .state import AgentState, SearchResult, ResearchPlan, ParameterRecommendation, ResultList, ResultRecord
 from .workflow import create_research_agent
 
 __all__ = [
@@ -7,5 +7,7 @@ __all__ = [
     "SearchResult",
     "ResearchPlan",
     "ParameterRecommendation",
+    "ResultList",
+    "ResultRecord",
     "create_research_agent"
 ]
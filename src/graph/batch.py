@@ -0,0 +1,134 @@
+"""
+배치 연구 실행
+- 여러 질문을 동시성 제한 하에 실행하고 완료 순서대로 결과 반환
+- 같은 질문(질문 + 재료 + 현재 설정 + 모드 + 세션)은 한 번만 실행하여 결과 공유
+- 서브 쿼리 검색과 LLM 프롬프트는 배치 범위 병합(CoalescingScope)으로 항목 간 공유
+  (캐시를 끄거나 우회해도 동작)
+- 같은 세션의 항목은 순서대로 실행 (세션 상태를 동시에 갱신하지 않도록)
+- 항목 하나의 실패가 배치 전체를 중단하지 않음
+"""
+import asyncio
+import contextlib
+from collections import defaultdict
+from typing import AsyncIterator, Optional
+
+from src.config import get_setting
+from src.memory.llm_cache import CoalescingScope, coalescing_scope
+from src.memory.response_cache import ResearchResponseCache
+from src.metrics import request_trace
+from src.tools.rate_limiter import priority_lane
+from .workflow import compose_query, resolve_mode, run_research_detailed
+
+
+def _item_key(item: dict) -> str:
+    key = ResearchResponseCache.exact_key(
+        compose_query(item["query"], item.get("material"), item.get("current_params")),
+        item.get("material"),
+        item.get("current_params"),
+        resolve_mode(item.get("mode"))
+    )
+    return f"{item['session_id']}:{key}" if item.get("session_id") else key
+
+
+async def run_research_batch(
+    items: list[dict],
+    max_concurrency: Optional[int] = None,
+    use_cache: bool = True
+) -> AsyncIterator[dict]:
+    """
+    배치 연구 실행
+
+    Args:
+        items: {"query", "material"?, "current_params"?, "mode"?, "use_cache"?,
+                "session_id"?, "include_timing"?, "id"?} 목록
+        max_concurrency: 동시에 실행할 그래프 수 (None이면 batch.max_concurrency)
+        use_cache: False면 응답 캐시를 우회
+
+    Yields:
+        완료 순서대로 {"index", "id", "success", "response", "sources", "cached", "error"}
+        (session_id를 준 항목은 "session_id", include_timing이면 "timing" 추가)
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or get_setting("batch.max_concurrency", 4))
+    scope = CoalescingScope()
+    session_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    # 같은 요청은 한 그룹으로 묶어 한 번만 실행
+    groups: dict[str, list[int]] = {}
+    failures: list[dict] = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict) or not item.get("query"):
+                raise ValueError("항목은 비어 있지 않은 query를 포함해야 합니다")
+            key = _item_key(item)
+        except Exception as e:
+            failures.append(_failure(index, item, e))
+            continue
+        groups.setdefault(key, []).append(index)
+
+    for failure in failures:
+        yield failure
+
+    async def run_group(indexes: list[int]) -> tuple[list[int], Optional[dict], Optional[Exception]]:
+        item = items[indexes[0]]
+        session_id = item.get("session_id")
+        # 세션이 없으면 항목마다 잠금 없이 실행
+        session_lock = session_locks[session_id] if session_id else contextlib.nullcontext()
+        async with session_lock, semaphore:
+            try:
+                # 배치 항목은 대화형 요청보다 낮은 우선순위로 외부 API 호출
+                with priority_lane("batch"), coalescing_scope(scope), request_trace() as trace:
+                    result = await run_research_detailed(
+                        compose_query(item["query"], item.get("material"), item.get("current_params")),
+                        thread_id=session_id,
+                        current_params=item.get("current_params"),
+                        material=item.get("material"),
+                        use_cache=use_cache and item.get("use_cache", True),
+                        mode=item.get("mode")
+                    )
+                return indexes, {**result, "timing": trace.to_dict()}, None
+            except Exception as e:
+                return indexes, None, e
+
+    tasks = [asyncio.create_task(run_group(indexes)) for indexes in groups.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            indexes, result, error = await next_done
+            for index in indexes:
+                if error is not None:
+                    yield _failure(index, items[index], error)
+                else:
+                    yield _success(index, items[index], result)
+    finally:
+        # 소비자가 중간에 끊으면 남은 항목 취소
+        for task in tasks:
+            task.cancel()
+
+
+def _success(index: int, item: dict, result: dict) -> dict:
+    output = {
+        "index": index,
+        "id": item.get("id"),
+        "success": True,
+        "response": result["response"],
+        "sources": result["sources"],
+        "cached": result["cached"],
+        "error": None,
+    }
+    if item.get("session_id"):
+        output["session_id"] = item["session_id"]
+    if item.get("include_timing"):
+        # 같은 그룹 항목은 한 번의 실행을 공유하므로 시간 분석도 같음
+        output["timing"] = result["timing"]
+    return output
+
+
+def _failure(index: int, item: dict, error: Exception) -> dict:
+    return {
+        "index": index,
+        "id": item.get("id") if isinstance(item, dict) else None,
+        "success": False,
+        "response": "",
+        "sources": [],
+        "cached": False,
+        "error": str(error),
+    }
@@ -0,0 +1,196 @@
+"""
+프롬프트 컨텍스트 패킹
+- 토큰 수 추정
+- MinHash(LSH)로 소스 간 거의 중복된 구절 제거
+- 토큰 예산 내에서 소스별 가치가 높은 구절부터 채움
+"""
+import math
+import re
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+# 해시 순열 (a * x + b) mod p: a, x < 2^31 이므로 곱이 int64 범위를 넘지 않음
+_MERSENNE_PRIME = (1 << 31) - 1
+# 빈 텍스트 서명 값 (순열 결과는 항상 p보다 작음)
+_MAX_HASH = _MERSENNE_PRIME
+_word_pattern = re.compile(r"\w+", re.UNICODE)
+_paragraph_pattern = re.compile(r"\n\s*\n")
+_sentence_pattern = re.compile(r"(?<=[.!?。])\s+|\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 추정 (API 호출 없이)
+
+    영문은 약 4자당 1토큰, 한글 등 비ASCII 문자는 약 1.5자당 1토큰으로 계산.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / 4 + other_chars / 1.5)
+
+
+def split_passages(text: str, max_tokens: int) -> list[str]:
+    """문단/문장 경계로 max_tokens 이하 구절로 분할"""
+    passages = []
+    for paragraph in _paragraph_pattern.split(text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            passages.append(paragraph)
+            continue
+
+        current = ""
+        for sentence in _sentence_pattern.split(paragraph):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            candidate = f"{current} {sentence}".strip()
+            if current and estimate_tokens(candidate) > max_tokens:
+                passages.append(current)
+                current = sentence
+            else:
+                current = candidate
+            # 문장 하나가 예산보다 길면 글자 수 기준으로 자름
+            while estimate_tokens(current) > max_tokens:
+                cut = max(1, len(current) * max_tokens // estimate_tokens(current))
+                passages.append(current[:cut])
+                current = current[cut:].strip()
+        if current:
+            passages.append(current)
+    return passages
+
+
+class MinHashDeduplicator:
+    """MinHash 서명 + LSH 밴딩으로 근사 중복 구절 검출"""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.int64)
+        self._buckets: dict[tuple, list[int]] = defaultdict(list)
+        self._signatures: list[np.ndarray] = []
+
+    @staticmethod
+    def _shingles(text: str) -> set[str]:
+        words = _word_pattern.findall(text.lower())
+        if len(words) >= 3:
+            return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+        compact = "".join(words)
+        return {compact[i:i + 5] for i in range(max(1, len(compact) - 4))}
+
+    def signature(self, text: str) -> np.ndarray:
+        # 32비트 CRC를 p 미만으로 줄인 뒤 순열 (a * h + b < 2^62 + 2^31)
+        hashes = np.array(
+            [zlib.crc32(s.encode("utf-8")) % _MERSENNE_PRIME for s in self._shingles(text)],
+            dtype=np.int64
+        )
+        if len(hashes) == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.int64)
+        # (a * h + b) mod p 를 순열마다 계산 후 최소값
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def is_duplicate_or_add(self, text: str) -> bool:
+        """이미 본 구절과 유사하면 True, 아니면 등록 후 False"""
+        sig = self.signature(text)
+        band_keys = [
+            (band, sig[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+        candidates = {i for key in band_keys for i in self._buckets.get(key, [])}
+        for i in candidates:
+            if np.mean(self._signatures[i] == sig) >= self.threshold:
+                return True
+
+        index = len(self._signatures)
+        self._signatures.append(sig)
+        for key in band_keys:
+            self._buckets[key].append(index)
+        return False
+
+
+@dataclass
+class PackedResult:
+    """선택된 검색 결과와 그 안에서 선택된 구절들"""
+    result: Any
+    passages: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.passages)
+
+
+def pack_context(
+    results: list,
+    token_budget: int,
+    passage_tokens: int = 300,
+    header_tokens: int = 30,
+    dedup_threshold: float = 0.8,
+    position_decay: float = 0.85
+) -> list[PackedResult]:
+    """
+    토큰 예산 내에서 컨텍스트 구성
+
+    - 각 결과를 구절로 나누고, 가치 = relevance_score × position_decay^(구절 순서)
+    - 소스(web/kb/paper/community)별로 돌아가며 가장 가치 높은 구절을 선택
+    - 이미 선택된 구절과 거의 같은 구절은 건너뜀
+
+    Args:
+        results: ResultRecord(또는 SearchResult) 목록
+        token_budget: 전체 토큰 예산 (결과별 헤더 포함)
+        passage_tokens: 구절 최대 토큰 수
+        header_tokens: 결과 하나를 프롬프트에 넣을 때 헤더(출처, URL) 토큰 추정치
+        dedup_threshold: MinHash Jaccard 추정치가 이 이상이면 중복
+
+    Returns:
+        선택 순서대로 정렬된 PackedResult 목록 (구절은 원문 순서)
+    """
+    by_source: dict[str, list[tuple[float, int, int, str]]] = defaultdict(list)
+    for result_index, r in enumerate(results):
+        for passage_index, passage in enumerate(split_passages(r.content, passage_tokens)):
+            value = r.relevance_score * (position_decay ** passage_index)
+            by_source[r.source].append((value, result_index, passage_index, passage))
+
+    for queue in by_source.values():
+        queue.sort(key=lambda x: (-x[0], x[1], x[2]))
+
+    dedup = MinHashDeduplicator(threshold=dedup_threshold)
+    selected: dict[int, list[tuple[int, str]]] = {}
+    order: list[int] = []
+    remaining = token_budget
+    cursors = {source: 0 for source in by_source}
+
+    while cursors:
+        # 다음 후보 가치가 높은 소스부터 한 구절씩
+        for source in sorted(cursors, key=lambda s: -by_source[s][cursors[s]][0]):
+            queue = by_source[source]
+            while cursors[source] < len(queue):
+                value, result_index, passage_index, passage = queue[cursors[source]]
+                cursors[source] += 1
+                cost = estimate_tokens(passage) + (0 if result_index in selected else header_tokens)
+                if cost > remaining or dedup.is_duplicate_or_add(passage):
+                    continue
+                remaining -= cost
+                if result_index not in selected:
+                    selected[result_index] = []
+                    order.append(result_index)
+                selected[result_index].append((passage_index, passage))
+                break
+            if cursors[source] >= len(queue):
+                del cursors[source]
+
+    return [
+        PackedResult(results[i], [p for _, p in sorted(selected[i])])
+        for i in order
+    ]
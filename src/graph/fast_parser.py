@@ -0,0 +1,309 @@
+"""
+규칙 기반 쿼리 파서 (LLM 호출 없는 빠른 경로)
+- 지식베이스 키/별칭과 settings.yaml의 domain 목록으로 어휘 구성
+- 모든 표면형을 하나의 정규식으로 컴파일하여 한 번의 스캔으로 추출
+- 신뢰도가 높으면 ResearchPlan을 바로 생성, 애매하면 LLM 파서로 넘김
+"""
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+from src.config import get_setting
+from src.tools.knowledge_base import MATERIAL_GUIDES, DEFECT_GUIDES, DEFECT_ALIASES
+from .state import ResearchPlan
+
+# 지식베이스 키 외의 한국어/영어 표면형
+MATERIAL_SYNONYMS = {
+    "나일론": "Nylon",
+    "폴리락틱": "PLA",
+    "pla+": "PLA",
+    "pla plus": "PLA",
+    "abs+": "ABS",
+    "petg+": "PETG",
+}
+
+DEFECT_SYNONYMS = {
+    "실뜨기": "stringing",
+    "스트링": "stringing",
+    "스트링잉": "stringing",
+    "거미줄": "stringing",
+    "실 같은": "stringing",
+    "뒤틀림": "warping",
+    "워핑": "warping",
+    "들뜸": "warping",
+    "들뜨": "warping",
+    "들뜹": "warping",
+    "레이어 접착": "layer_adhesion",
+    "층간 접착": "layer_adhesion",
+    "층 분리": "layer_adhesion",
+    "과소 압출": "under_extrusion",
+    "압출 부족": "under_extrusion",
+    "underextrusion": "under_extrusion",
+    "과다 압출": "over_extrusion",
+    "압출 과다": "over_extrusion",
+    "overextrusion": "over_extrusion",
+    "첫 레이어": "first_layer",
+    "첫 층": "first_layer",
+    "베드 접착": "first_layer",
+    "안착": "first_layer",
+    "떨어지": "first_layer",
+    "떨어져": "first_layer",
+    "노즐 막힘": "under_extrusion",
+    "막힘": "under_extrusion",
+    "막히": "under_extrusion",
+    "막혀": "under_extrusion",
+    "블롭": "blob",
+    "zit": "blob",
+    "레이어 밀림": "layer_shift",
+    "층 밀림": "layer_shift",
+    "코끼리 발": "elephant_foot",
+    "고스팅": "ghosting",
+    "링잉": "ghosting",
+    "ringing": "ghosting",
+    "z 흔들림": "z_wobble",
+}
+
+PARAMETER_SYNONYMS = {
+    "노즐 온도": "nozzle_temp",
+    "노즐온도": "nozzle_temp",
+    "nozzle temp": "nozzle_temp",
+    "nozzle temperature": "nozzle_temp",
+    "hotend": "nozzle_temp",
+    "온도": "nozzle_temp",
+    "베드 온도": "bed_temp",
+    "베드온도": "bed_temp",
+    "bed temp": "bed_temp",
+    "bed temperature": "bed_temp",
+    "bed 온도": "bed_temp",
+    "출력 속도": "print_speed",
+    "속도": "print_speed",
+    "print speed": "print_speed",
+    "speed": "print_speed",
+    "레이어 높이": "layer_height",
+    "layer height": "layer_height",
+    "리트랙션 거리": "retraction_distance",
+    "retraction distance": "retraction_distance",
+    "리트랙션": "retraction_distance",
+    "retraction": "retraction_distance",
+    "리트랙션 속도": "retraction_speed",
+    "retraction speed": "retraction_speed",
+    "팬": "fan_speed",
+    "냉각": "fan_speed",
+    "fan": "fan_speed",
+    "cooling": "fan_speed",
+    "유량": "flow_rate",
+    "압출량": "flow_rate",
+    "flow": "flow_rate",
+}
+
+# LLM이 더 잘 처리하는 열린 질문/비교 질문 표지
+OPEN_ENDED_MARKERS = re.compile(
+    r"\bvs\.?\b|versus|\bcompare\b|\bwhy\b|\bdifference\b|비교|차이|왜|어느 것|뭐가 나",
+    re.IGNORECASE
+)
+
+_material_tag = re.compile(r"\[재료:\s*([^\]]+)\]")
+_params_suffix = re.compile(r"\(현재 설정:[^)]*\)")
+_temperature_value = re.compile(r"(\d{3})\s*(?:°\s*c|도|℃)", re.IGNORECASE)
+# 재료만 있는 질문에서 해석하지 못한 내용으로 보지 않는 일반 요청 표현
+# ("for"는 "PLA for miniatures"처럼 뒤에 해석하지 못한 조건이 붙으므로 제외)
+_generic_request = re.compile(
+    r"설정|세팅|추천|권장|알려\s*주?\S*|값|뭐\S*|어떻게\S*|\b(?:recommended|settings?|what|best)\b",
+    re.IGNORECASE
+)
+# 앞에 붙는 말에 따라 다른 파라미터가 되는 단독 표면형 (예: "팬 속도", "bed 온도")
+AMBIGUOUS_PARAMETER_SURFACES = {"온도", "속도", "speed"}
+_parameter_qualifier = re.compile(
+    r"(?:베드|bed|팬|fan|냉각|cooling|유량|flow|압출|extrusion|리트랙션|retraction|이동|travel|"
+    r"챔버|chamber|실내|room|ambient)(?:\s*의)?[\s_\-]*$",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class Vocabulary:
+    pattern: re.Pattern
+    # 정규식 그룹 순서와 같은 (종류, 정규형) 목록과 표면형
+    terms: list[tuple[str, str]] = field(default_factory=list)
+    surfaces: list[str] = field(default_factory=list)
+
+
+def _surface_pattern(term: str) -> str:
+    escaped = re.escape(term).replace(r"\ ", r"[\s_\-]*")
+    # 영문/숫자 용어는 단어 중간 일치 방지 (예: "pla" in "plate")
+    if re.match(r"[0-9a-z]", term):
+        escaped = r"(?<![0-9a-z])" + escaped
+    if re.search(r"[0-9a-z+]$", term):
+        escaped = escaped + r"(?![0-9a-z])"
+    return escaped
+
+
+@lru_cache(maxsize=1)
+def build_vocabulary() -> Vocabulary:
+    """지식베이스 + domain 설정 + 동의어로 어휘 정규식 생성"""
+    terms: dict[str, tuple[str, str]] = {}
+
+    def add(surface: str, kind: str, canonical: str):
+        terms.setdefault(surface.lower(), (kind, canonical))
+
+    for material in list(MATERIAL_GUIDES) + list(get_setting("domain.materials", []) or []):
+        add(material, "material", material)
+    for surface, material in MATERIAL_SYNONYMS.items():
+        add(surface, "material", material)
+
+    defects = list(DEFECT_GUIDES) + list(get_setting("domain.defects", []) or [])
+    for defect in defects:
+        add(defect, "defect", defect)
+        add(defect.replace("_", " "), "defect", defect)
+    for surface, defect in list(DEFECT_ALIASES.items()) + list(DEFECT_SYNONYMS.items()):
+        add(surface, "defect", defect)
+        add(surface.replace("_", " "), "defect", defect)
+
+    for parameter in get_setting("domain.parameters", {}) or {}:
+        add(parameter, "parameter", parameter)
+        add(parameter.replace("_", " "), "parameter", parameter)
+    for surface, parameter in PARAMETER_SYNONYMS.items():
+        add(surface, "parameter", parameter)
+
+    # 긴 표면형 우선 (예: "리트랙션 속도"가 "리트랙션"보다 먼저)
+    surfaces = sorted(terms, key=len, reverse=True)
+    pattern = re.compile("|".join(f"({_surface_pattern(s)})" for s in surfaces), re.IGNORECASE)
+    return Vocabulary(pattern=pattern, terms=[terms[s] for s in surfaces], surfaces=surfaces)
+
+
+@lru_cache(maxsize=64)
+def term_pattern(kind: str, canonical: str) -> re.Pattern:
+    """정규형 하나(예: parameter/nozzle_temp)의 모든 표면형에 일치하는 정규식"""
+    vocabulary = build_vocabulary()
+    surfaces = [
+        surface
+        for surface, term in zip(vocabulary.surfaces, vocabulary.terms)
+        if term == (kind, canonical)
+    ] or [canonical.lower()]
+    return re.compile("|".join(_surface_pattern(s) for s in surfaces), re.IGNORECASE)
+
+
+@dataclass
+class FastParseResult:
+    """규칙 기반 파싱 결과"""
+    plan: Optional[ResearchPlan]
+    confidence: float
+    reasons: list[str] = field(default_factory=list)
+
+
+def _sub_queries(material: Optional[str], defect: Optional[str], parameters: list[str]) -> list[str]:
+    defect_text = defect.replace("_", " ") if defect else None
+    param_text = " ".join(p.replace("_", " ") for p in parameters[:2])
+    if material and defect_text:
+        queries = [
+            f"{material} {defect_text} fix",
+            f"{material} {defect_text} settings",
+            f"{material} {defect_text} {param_text or 'retraction temperature'}",
+        ]
+    elif material:
+        queries = [
+            f"{material} recommended print settings",
+            f"{material} {param_text or 'nozzle temperature bed temperature'}",
+        ]
+    else:
+        queries = [
+            f"{defect_text} causes and fixes",
+            f"how to fix {defect_text} FDM {param_text}".strip(),
+        ]
+    return queries
+
+
+def _search_strategies(defect: Optional[str]) -> list[str]:
+    """LLM 파서처럼 질문 종류에 따라 검색 전략 선택 (결함 해결 질문은 논문 검색 포함)"""
+    strategies = ["web", "kb"]
+    if defect:
+        strategies.append("paper")
+    return strategies
+
+
+def _has_unparsed_text(body: str, vocabulary: Vocabulary) -> bool:
+    """어휘/일반 요청 표현을 뺀 뒤에도 단어가 남는지 (예: "실 같은 게 생겨요")"""
+    rest = _generic_request.sub(" ", vocabulary.pattern.sub(" ", body))
+    return len(re.findall(r"\w{2,}", rest)) >= 2
+
+
+def fast_parse_query(query: str) -> FastParseResult:
+    """
+    규칙 기반으로 ResearchPlan 생성
+
+    어휘는 사용자 본문에서만 찾습니다 ("(현재 설정: …)" 접미사와 재료 태그 제외).
+
+    Returns:
+        FastParseResult (plan이 None이면 재료/결함을 찾지 못함)
+    """
+    vocabulary = build_vocabulary()
+    reasons = []
+
+    tagged_material = None
+    tag = _material_tag.search(query)
+    if tag:
+        tagged_material = tag.group(1).strip()
+    body = _params_suffix.sub("", _material_tag.sub("", query)).strip()
+
+    materials: list[str] = []
+    defects: list[str] = []
+    parameters: list[str] = []
+    ambiguous: list[str] = []
+    for match in vocabulary.pattern.finditer(body):
+        kind, canonical = vocabulary.terms[match.lastindex - 1]
+        if kind == "parameter" and match.group(0).lower() in AMBIGUOUS_PARAMETER_SURFACES:
+            # "팬 속도"/"flow speed"의 "속도"는 출력 속도가 아님 (수식어 쪽 파라미터는 따로 검출됨)
+            if _parameter_qualifier.search(body, 0, match.start()):
+                continue
+            ambiguous.append(match.group(0))
+        bucket = {"material": materials, "defect": defects, "parameter": parameters}[kind]
+        if canonical not in bucket:
+            bucket.append(canonical)
+
+    if _temperature_value.search(body) and "nozzle_temp" not in parameters:
+        parameters.append("nozzle_temp")
+
+    if tagged_material:
+        material = tagged_material.upper() if tagged_material.upper() in MATERIAL_GUIDES else tagged_material
+        materials = [material] + [m for m in materials if m.upper() != material.upper()]
+        # 태그로 명시된 재료가 우선이므로 본문의 다른 재료는 모호성으로 보지 않음
+        materials = materials[:1]
+
+    if not materials and not defects:
+        return FastParseResult(plan=None, confidence=0.0, reasons=["재료/결함 미검출"])
+
+    confidence = 1.0
+    if len(materials) > 1:
+        confidence *= 0.5
+        reasons.append(f"재료 여러 개: {materials}")
+    if len(defects) > 1:
+        confidence *= 0.5
+        reasons.append(f"결함 여러 개: {defects}")
+    if ambiguous:
+        # 단독 "온도"/"속도"는 노즐 온도/출력 속도로 추정한 것
+        confidence *= 0.9
+        reasons.append(f"모호한 파라미터 표현: {ambiguous}")
+    if OPEN_ENDED_MARKERS.search(body):
+        confidence *= 0.6
+        reasons.append("비교/열린 질문")
+    if not defects and not parameters and _has_unparsed_text(body, vocabulary):
+        # 재료 외의 내용(증상 묘사 등)을 해석하지 못했으면 LLM 파서가 더 정확
+        confidence *= 0.6
+        reasons.append("재료 외 내용 미해석")
+    if not (materials and defects) and len(body) > 80:
+        # 긴 질문인데 한 가지 개체만 잡히면 놓친 정보가 있을 가능성
+        confidence *= 0.8
+        reasons.append("긴 질문에서 일부 개체만 검출")
+
+    material = materials[0] if materials else None
+    defect = defects[0] if defects else None
+    plan = ResearchPlan(
+        main_query=body or query,
+        sub_queries=_sub_queries(material, defect, parameters),
+        search_strategies=_search_strategies(defect),
+        material_type=material,
+        defect_type=defect,
+        parameters_mentioned=parameters
+    )
+    return FastParseResult(plan=plan, confidence=confidence, reasons=reasons)
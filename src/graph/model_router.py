@@ -0,0 +1,187 @@
+"""
+Gemini 모델 선택 및 회로 차단기
+- 실제로 동작한 모델을 기억하여 매 호출마다 폴백 탐색을 반복하지 않음
+- 주기적으로 우선 모델을 다시 시도 (re-probe)
+- 모델별 회로 차단기: 연속 장애 시 차단, 429는 짧은 대기(cooldown) 동안만 폴백 모델로 전환
+"""
+import time
+from typing import Optional
+
+from src.config import get_setting
+
+DEFAULT_FALLBACK_MODELS = ["gemini-2.0-flash", "gemini-flash-latest"]
+
+
+class ModelsUnavailableError(RuntimeError):
+    """모든 모델의 회로가 열려 있어 시도할 모델이 없음 (잠시 후 재시도 가능)"""
+
+
+def classify_error(error: Exception) -> str:
+    """
+    오류 분류
+
+    Returns:
+        "not_found" | "rate_limited" | "unavailable" | "fatal"
+    """
+    code = getattr(error, "code", None)
+    message = str(error)
+    if code == 404 or "NOT_FOUND" in message or "is not found" in message:
+        return "not_found"
+    if code == 429 or "RESOURCE_EXHAUSTED" in message:
+        return "rate_limited"
+    if (isinstance(code, int) and code >= 500) or any(
+        marker in message for marker in ("UNAVAILABLE", "INTERNAL", "DEADLINE_EXCEEDED")
+    ) or isinstance(error, TimeoutError):
+        return "unavailable"
+    return "fatal"
+
+
+class CircuitBreaker:
+    """
+    closed → (연속 실패) → open → (대기 후) half-open → 성공 시 closed
+
+    429(속도 제한)는 모델 장애가 아니므로 즉시 차단하지 않고 짧은 cooldown만
+    적용합니다. 429도 연속 실패 수에는 포함됩니다.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.cooldown_until = 0.0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def allow(self) -> bool:
+        return self.state != "open" and not self.cooling_down
+
+    def retry_in(self) -> float:
+        """다시 시도할 수 있을 때까지 남은 시간 (초, 지금 가능하면 0)"""
+        now = time.monotonic()
+        ready_at = self.cooldown_until
+        if self.opened_at is not None:
+            ready_at = max(ready_at, self.opened_at + self.reset_timeout)
+        return max(0.0, ready_at - now)
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.cooldown_until = 0.0
+
+    def record_failure(self, cooldown: float = 0):
+        self.failures += 1
+        if cooldown:
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+        if self.failures >= self.failure_threshold or self.state == "half_open":
+            self.opened_at = time.monotonic()
+
+
+class ModelRouter:
+    """모델 후보 순서 결정 및 상태 기록"""
+
+    def __init__(
+        self,
+        primary_model: str,
+        fallback_models: list[str],
+        reprobe_interval: float = 600,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30,
+        rate_limit_cooldown: float = 2
+    ):
+        self.primary_model = primary_model
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.models = [primary_model] + [m for m in fallback_models if m != primary_model]
+        self.reprobe_interval = reprobe_interval
+        self.breakers = {
+            m: CircuitBreaker(failure_threshold, reset_timeout) for m in self.models
+        }
+        self.resolved_model: Optional[str] = None
+        self._resolved_at = 0.0
+        # NOT_FOUND 모델은 re-probe 시점까지 제외
+        self._unavailable_until: dict[str, float] = {}
+
+    def candidates(self) -> list[str]:
+        """이번 호출에서 시도할 모델 순서"""
+        now = time.monotonic()
+        order = list(self.models)
+        if self.resolved_model and now - self._resolved_at < self.reprobe_interval:
+            order.remove(self.resolved_model)
+            order.insert(0, self.resolved_model)
+        elif self.resolved_model and self.resolved_model != self.models[0]:
+            # re-probe: 이번 호출만 우선 모델부터 시도하고, 다음 re-probe는 한 주기 뒤
+            self._resolved_at = now
+
+        return [
+            m for m in order
+            if self._unavailable_until.get(m, 0) <= now and self.breakers[m].allow()
+        ]
+
+    def next_available_in(self) -> float:
+        """후보 모델 중 하나라도 다시 시도할 수 있을 때까지 남은 시간 (초)"""
+        now = time.monotonic()
+        return min(
+            max(self._unavailable_until.get(m, 0) - now, self.breakers[m].retry_in())
+            for m in self.models
+        )
+
+    def record_success(self, model: str):
+        self.breakers[model].record_success()
+        self._unavailable_until.pop(model, None)
+        if model != self.resolved_model:
+            # 기억한 모델이 바뀐 시점부터 re-probe 주기 계산
+            self._resolved_at = time.monotonic()
+            self.resolved_model = model
+
+    def record_not_found(self, model: str):
+        self._unavailable_until[model] = time.monotonic() + self.reprobe_interval
+        if self.resolved_model == model:
+            self.resolved_model = None
+
+    def record_failure(self, model: str, rate_limited: bool = False):
+        # 429는 잠시 다른 모델로 돌리고, 연속되면 실패 수 누적으로 차단
+        self.breakers[model].record_failure(cooldown=self.rate_limit_cooldown if rate_limited else 0)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "primary_model": self.primary_model,
+            "resolved_model": self.resolved_model,
+            "models": {
+                m: {
+                    "circuit": self.breakers[m].state,
+                    "cooling_down": self.breakers[m].cooling_down,
+                    "failures": self.breakers[m].failures,
+                    "available": self._unavailable_until.get(m, 0) <= now,
+                }
+                for m in self.models
+            },
+        }
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router(primary_model: str) -> ModelRouter:
+    """모델 라우터 싱글톤 (우선 모델이 바뀌면 재생성)"""
+    global _router
+    if _router is None or _router.primary_model != primary_model:
+        _router = ModelRouter(
+            primary_model,
+            get_setting("gemini.fallback_models", DEFAULT_FALLBACK_MODELS),
+            reprobe_interval=get_setting("gemini.reprobe_interval", 600),
+            failure_threshold=get_setting("gemini.circuit_breaker.failure_threshold", 3),
+            reset_timeout=get_setting("gemini.circuit_breaker.reset_timeout", 30),
+            rate_limit_cooldown=get_setting("gemini.circuit_breaker.rate_limit_cooldown", 2)
+        )
+    return _router
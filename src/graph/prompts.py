@@ -60,11 +60,20 @@ JSON 형식으로 응답:
             "sources": ["source1 URL", "source2 URL"],
             "reasoning": "이유 설명 (1문장)"
         }}
-    ],
-    "conflicts": ["상충되는 정보 (있으면)"],
-    "additional_tips": ["추가 팁들"]
+    ]
 }}"""
 
+STRUCTURED_REPAIR_PROMPT = """이전 응답을 JSON으로 해석하지 못했습니다.
+내용은 그대로 두고 아래 JSON 스키마에 맞는 JSON 하나로만 다시 응답하세요.
+
+오류: {error}
+
+JSON 스키마:
+{schema}
+
+이전 응답:
+{response}"""
+
 REFINER_PROMPT = """이전 검색 결과가 불충분합니다.
 더 나은 검색을 위해 쿼리를 재구성하세요.
 
@@ -104,3 +113,16 @@ FINAL_RESPONSE_TEMPLATE = """## 문제 분석
 *이 추천은 {num_sources}개의 소스를 분석하여 생성되었습니다.*
 *{iterations}회의 검색 반복을 수행했습니다.*
 """
+
+KB_ANSWER_TEMPLATE = """## 지식베이스 답변
+
+{guides}
+
+## 추천 파라미터
+
+{recommendations_table}
+
+---
+*내장 지식베이스에서 바로 생성된 답변입니다 (웹/논문 검색 생략).*
+*실험 데이터 기반의 상세 분석이 필요하면 mode=full로 요청하세요.*
+"""
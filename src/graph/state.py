@@ -1,9 +1,14 @@
 """
 LangGraph 상태 정의
 """
+import hashlib
+import sys
+import time
+from dataclasses import dataclass, field
 from typing import TypedDict, Annotated, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 
 class SearchResult(BaseModel):
@@ -19,6 +24,73 @@ class SearchResult(BaseModel):
         arbitrary_types_allowed = True
 
 
+@dataclass(slots=True)
+class ResultRecord:
+    """
+    그래프 내부용 경량 검색 결과 (__dict__ 없는 slots, 시각은 float)
+
+    API 경계에서만 SearchResult로 변환
+    """
+    source: str
+    url: str
+    content: str
+    title: str = ""
+    relevance_score: float = 0.5
+    timestamp: float = field(default_factory=time.time)
+
+    def __post_init__(self):
+        # 소스 종류/URL은 결과 간에 반복되므로 intern하여 공유
+        self.source = sys.intern(self.source)
+        self.url = sys.intern(self.url)
+
+    @classmethod
+    def from_model(cls, result: SearchResult) -> "ResultRecord":
+        return cls(
+            source=result.source,
+            url=result.url,
+            content=result.content,
+            title=result.title,
+            relevance_score=result.relevance_score,
+            timestamp=result.timestamp.timestamp()
+        )
+
+    def to_model(self) -> SearchResult:
+        return SearchResult(
+            source=self.source,
+            url=self.url,
+            title=self.title,
+            content=self.content,
+            relevance_score=self.relevance_score,
+            timestamp=datetime.fromtimestamp(self.timestamp)
+        )
+
+
+def state_memory_bytes(state: dict) -> int:
+    """상태 객체 그래프의 대략적인 메모리 사용량 (공유 객체는 한 번만 계산)"""
+    seen: set[int] = set()
+    total = 0
+    stack = [state]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, BaseModel):
+            stack.append(obj.__dict__)
+            stack.append(obj.__pydantic_fields_set__)
+        elif hasattr(obj, "__slots__"):
+            stack.extend(getattr(obj, name) for name in obj.__slots__ if hasattr(obj, name))
+        elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+            stack.append(obj.__dict__)
+    return total
+
+
 class ResearchPlan(BaseModel):
     """연구 계획"""
     main_query: str
@@ -39,37 +111,129 @@ class ParameterRecommendation(BaseModel):
     reasoning: str = ""
 
 
+# 추적용 쿼리 파라미터 (같은 글이 다른 URL로 들어오는 주 원인)
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid", "si"}
+
+
+def canonical_url(url: str) -> str:
+    """URL 정규화: 스킴/호스트 소문자, www·fragment·추적 파라미터·끝 슬래시 제거"""
+    if not url or url.startswith("internal://"):
+        return url
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(((parts.scheme or "https").lower(), host, path, urlencode(query), ""))
+
+
+def content_hash(content: str) -> str | None:
+    """공백/대소문자 정규화 후 본문 해시 (빈 본문은 None)"""
+    normalized = " ".join((content or "").lower().split())
+    if not normalized:
+        return None
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResultList(list):
+    """
+    URL/본문 해시 인덱스를 가진 검색 결과 목록
+
+    - 정규화 URL 또는 본문 해시가 이미 있으면 추가하지 않음 (O(1))
+    - 삽입 순서 유지
+    - 체크포인터에는 일반 list로 직렬화되며, 복원 후 첫 병합 시 인덱스 재구성
+    """
+    __slots__ = ("_urls", "_hashes")
+
+    def __init__(self, items=()):
+        super().__init__()
+        self._urls: set[str] = set()
+        self._hashes: set[str] = set()
+        self.extend_unique(items)
+
+    def add(self, item) -> bool:
+        """중복이 아니면 추가하고 True 반환"""
+        if not hasattr(item, "url"):
+            return False
+        url = canonical_url(item.url)
+        digest = content_hash(getattr(item, "content", ""))
+        if url in self._urls or (digest is not None and digest in self._hashes):
+            return False
+        self._urls.add(url)
+        if digest is not None:
+            self._hashes.add(digest)
+        self.append(item)
+        return True
+
+    def extend_unique(self, items) -> int:
+        """중복을 제외하고 추가, 추가된 개수 반환"""
+        return sum(1 for item in items if self.add(item))
+
+    def copy(self) -> "ResultList":
+        """인덱스까지 복사한 새 목록 (항목은 공유)"""
+        clone = ResultList()
+        list.extend(clone, self)
+        clone._urls = set(self._urls)
+        clone._hashes = set(self._hashes)
+        return clone
+
+    def __reduce__(self):
+        return (ResultList, (list(self),))
+
+
+class Replace(list):
+    """
+    누적 채널(검색 결과, 오류)을 이전 값과 합치지 않고 이 값으로 교체
+
+    세션 스레드에서 새 질문을 시작할 때 초기 상태에 사용
+    (체크포인트에 남은 이전 질문의 결과/오류가 섞이지 않도록)
+    """
+
+
 def merge_results(existing: list, new: list) -> list:
-    """결과 병합 (중복 제거)"""
-    if not existing:
-        return new
-    existing_urls = {r.url for r in existing if hasattr(r, 'url')}
-    merged = list(existing)
-    for item in new:
-        if hasattr(item, 'url') and item.url not in existing_urls:
-            merged.append(item)
+    """결과 병합 (정규화 URL + 본문 해시 기준 중복 제거, 기존 값은 바꾸지 않고 새 목록 반환)"""
+    if isinstance(new, Replace):
+        return ResultList(new)
+    merged = existing.copy() if isinstance(existing, ResultList) else ResultList(existing or [])
+    merged.extend_unique(new or [])
     return merged
 
 
+def add_errors(existing: list, new: list) -> list:
+    """오류 누적 (Replace면 교체)"""
+    if isinstance(new, Replace):
+        return list(new)
+    return (existing or []) + (new or [])
+
+
 class AgentState(TypedDict):
     """LangGraph 에이전트 상태"""
     # 입력
     original_query: str
+    current_params: dict | None
+    mode: str  # fast | full | auto (지식베이스 즉답 여부)
 
     # 계획
     research_plan: ResearchPlan | None
 
     # 검색 결과
-    web_results: Annotated[list[SearchResult], merge_results]
-    kb_results: Annotated[list[SearchResult], merge_results]
-    paper_results: Annotated[list[SearchResult], merge_results]
-    community_results: Annotated[list[SearchResult], merge_results]
+    web_results: Annotated[list[ResultRecord], merge_results]
+    kb_results: Annotated[list[ResultRecord], merge_results]
+    paper_results: Annotated[list[ResultRecord], merge_results]
+    community_results: Annotated[list[ResultRecord], merge_results]
 
     # 중간 상태
     iteration_count: int
     is_sufficient: bool
     confidence_score: float
     missing_info: list[str]
+    executed_queries: list[str]  # 이미 실행한 웹 검색 쿼리 (정규화)
+    new_result_count: int  # 마지막 검색 라운드에서 새로 추가된 URL 수
+    evaluated_urls: list[str]  # 이미 평가에 사용한 결과 URL (증분 평가)
 
     # 추론 결과
     synthesized_knowledge: str
@@ -79,5 +243,5 @@ class AgentState(TypedDict):
     final_response: str
     sources_cited: list[str]
 
-    # 메타데이터
-    errors: list[str]
+    # 메타데이터 (병렬 노드의 오류를 누적, 실행마다 초기화)
+    errors: Annotated[list[str], add_errors]
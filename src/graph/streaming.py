@@ -0,0 +1,78 @@
+"""
+스트리밍 응답 처리
+- LLM이 JSON을 조각으로 생성하는 동안 특정 문자열 필드 값만 증분 추출
+- 그래프 노드에서 스트리밍 이벤트 발행 (run_research_stream 구독 시에만)
+"""
+import json
+import re
+from typing import Any, Optional
+
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonStringFieldStream:
+    """
+    부분 JSON에서 "field": "..." 문자열 값을 도착하는 대로 디코딩
+
+    예: feed('{"synthesis": "PETG는') → 'PETG는', feed(' 온도..."') → ' 온도...'
+    """
+
+    def __init__(self, field: str):
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._position: Optional[int] = None  # 값 시작 이후 아직 디코딩하지 않은 위치
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """새 조각을 받아 이번에 새로 확정된 값 텍스트 반환"""
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if self._position is None:
+            match = self._start.search(self._buffer)
+            if match is None:
+                return ""
+            self._position = match.end()
+
+        decoded = []
+        i = self._position
+        while i < len(self._buffer):
+            ch = self._buffer[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != "\\":
+                decoded.append(ch)
+                i += 1
+                continue
+            # 이스케이프는 다음 조각까지 기다려야 할 수 있음
+            if i + 1 >= len(self._buffer):
+                break
+            escape = self._buffer[i + 1]
+            if escape == "u":
+                # 서로게이트 쌍(\ud83d\ude00)은 두 이스케이프를 함께 디코딩
+                size = 12 if re.match(r"\\u[dD][89abAB]", self._buffer[i:i + 4]) else 6
+                if i + size > len(self._buffer):
+                    break
+                decoded.append(json.loads(f'"{self._buffer[i:i + size]}"'))
+                i += size
+            else:
+                decoded.append(_ESCAPES.get(escape, escape))
+                i += 2
+        self._position = i
+        return "".join(decoded)
+
+
+def is_streaming(config: Optional[RunnableConfig]) -> bool:
+    """run_research_stream으로 실행 중인지 (토큰 스트리밍 필요 여부)"""
+    return bool(config and (config.get("configurable") or {}).get("stream_tokens"))
+
+
+async def emit(name: str, data: Any, config: Optional[RunnableConfig]):
+    """스트리밍 실행일 때만 사용자 정의 이벤트 발행"""
+    if is_streaming(config):
+        await adispatch_custom_event(name, data, config=config)
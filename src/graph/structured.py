@@ -0,0 +1,122 @@
+"""
+LLM 구조화 출력
+- 응답 스키마(pydantic)에서 Gemini response_json_schema 생성
+- 코드 블록/앞뒤 설명/끝 쉼표가 섞인 응답에서도 JSON 추출
+- 스키마 검증 실패는 StructuredOutputError로 통일 (수정 요청은 nodes.call_gemini_structured)
+"""
+import json
+import re
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from .state import ParameterRecommendation
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class EvaluationResult(BaseModel):
+    """evaluate_results 응답"""
+    is_sufficient: bool = False
+    confidence: float = 0.5
+    missing: list[str] = []
+
+
+class RefinedQueries(BaseModel):
+    """refine_query 응답"""
+    new_queries: list[str] = []
+
+
+class SynthesisResult(BaseModel):
+    """synthesize 응답"""
+    synthesis: str = ""
+    recommendations: list[ParameterRecommendation] = []
+
+
+class StructuredOutputError(ValueError):
+    """응답을 스키마에 맞는 JSON으로 해석하지 못함 (response: 원래 응답 텍스트)"""
+
+    def __init__(self, message: str, response: str = ""):
+        super().__init__(message)
+        self.response = response
+
+
+# Gemini 응답 스키마가 지원하지 않는 JSON Schema 키워드
+_UNSUPPORTED_SCHEMA_KEYS = {"default"}
+
+
+def _strip_unsupported(node: Any) -> Any:
+    if isinstance(node, dict):
+        return {k: _strip_unsupported(v) for k, v in node.items() if k not in _UNSUPPORTED_SCHEMA_KEYS}
+    if isinstance(node, list):
+        return [_strip_unsupported(v) for v in node]
+    return node
+
+
+@lru_cache(maxsize=None)
+def response_schema(schema: type[BaseModel]) -> dict:
+    """pydantic 모델 → Gemini response_json_schema"""
+    return _strip_unsupported(schema.model_json_schema())
+
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.S)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_DECODER = json.JSONDecoder()
+_MAX_START_ATTEMPTS = 20
+
+
+def _decode_from_braces(text: str) -> Any:
+    """
+    처음 나오는 {/[ 부터 순서대로 JSON 값 하나를 디코딩 (뒤따르는 설명은 무시)
+
+    끝 쉼표 보정은 같은 시작 위치에서 바로 시도합니다 (다음 위치의 안쪽 배열을
+    바깥 객체 대신 돌려주지 않도록).
+    """
+    starts = [i for i, ch in enumerate(text) if ch in "{["][:_MAX_START_ATTEMPTS]
+    for start in starts:
+        for attempt in (text[start:], _TRAILING_COMMA.sub(r"\1", text[start:])):
+            try:
+                value, _ = _DECODER.raw_decode(attempt)
+                return value
+            except ValueError:
+                continue
+    raise ValueError("no JSON value")
+
+
+def extract_json(text: str) -> Any:
+    """
+    LLM 응답에서 JSON 값 추출
+
+    스키마 제약 응답은 대부분 첫 json.loads에서 끝나고, 그 외에는
+    코드 블록 → 본문 전체 순서로 찾으며 끝 쉼표도 보정합니다.
+    """
+    text = (text or "").strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    candidates = [m.group(1) for m in _FENCE.finditer(text)] + [text]
+    for candidate in candidates:
+        try:
+            return _decode_from_braces(candidate)
+        except ValueError:
+            continue
+    raise StructuredOutputError("응답에서 JSON을 찾을 수 없습니다", text)
+
+
+def parse_structured(text: str, schema: type[T]) -> T:
+    """응답 텍스트 → 스키마 모델 (실패 시 StructuredOutputError)"""
+    value = extract_json(text)
+    # 객체 하나를 배열로 감싼 응답
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], dict):
+        value = value[0]
+    try:
+        return schema.model_validate(value)
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or '(root)'}: {err['msg']}"
+            for err in e.errors()[:5]
+        )
+        raise StructuredOutputError(f"스키마 검증 실패: {errors}", text) from e
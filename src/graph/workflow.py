@@ -1,10 +1,16 @@
 """
 LangGraph 워크플로우 조립
 """
+import time
+import uuid
+
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 
-from .state import AgentState
+from src.config import get_setting
+from src.memory.checkpointer import create_checkpointer
+from src.memory.response_cache import get_response_cache
+from src.tracing import trace_run
+from .state import AgentState, Replace
 from .nodes import (
     parse_query,
     web_search,
@@ -15,6 +21,8 @@ from .nodes import (
     synthesize,
     validate,
     generate_output,
+    kb_answer,
+    route_after_parse,
     should_continue_research
 )
 
@@ -25,6 +33,7 @@ def create_research_agent():
 
     Flow:
     1. parse_query: 쿼리 분석 및 연구 계획 수립
+       (fast/auto 모드에서 지식베이스로 충분하면 kb_answer → 종료)
     2. web_search, kb_search, paper_search: 병렬 검색
     3. evaluate_results: 결과 충분성 평가
     4. (조건부) refine_query → 재검색 OR synthesize
@@ -45,15 +54,19 @@ def create_research_agent():
     workflow.add_node("synthesize", synthesize)
     workflow.add_node("validate", validate)
     workflow.add_node("generate_output", generate_output)
+    workflow.add_node("kb_answer", kb_answer)
 
     # 엔트리 포인트
     workflow.set_entry_point("parse_query")
 
-    # parse_query 후 병렬 검색으로 분기
-    # LangGraph에서는 동일 소스에서 여러 타겟으로 add_edge하면 병렬 실행
-    workflow.add_edge("parse_query", "web_search")
-    workflow.add_edge("parse_query", "kb_search")
-    workflow.add_edge("parse_query", "paper_search")
+    # parse_query 후 지식베이스 즉답 또는 병렬 검색으로 분기
+    # 라우터가 여러 노드 이름을 반환하면 LangGraph가 병렬 실행
+    workflow.add_conditional_edges(
+        "parse_query",
+        route_after_parse,
+        ["kb_answer", "web_search", "kb_search", "paper_search"]
+    )
+    workflow.add_edge("kb_answer", END)
 
     # 모든 검색 결과를 evaluate_results로 수렴
     workflow.add_edge("web_search", "evaluate_results")
@@ -70,7 +83,7 @@ def create_research_agent():
         }
     )
 
-    # refine 후 다시 검색 (web만 재실행)
+    # refine 후 다시 검색 (web만, 아직 실행하지 않은 쿼리만)
     workflow.add_edge("refine_query", "web_search")
 
     # 합성 → 검증 → 출력 → 종료
@@ -78,8 +91,8 @@ def create_research_agent():
     workflow.add_edge("validate", "generate_output")
     workflow.add_edge("generate_output", END)
 
-    # 메모리 체크포인터 (대화 상태 유지)
-    memory = MemorySaver()
+    # 세션별 체크포인터 (TTL/LRU/용량 제한, 선택적으로 SQLite)
+    memory = create_checkpointer()
 
     # 그래프 컴파일
     app = workflow.compile(checkpointer=memory)
@@ -99,81 +112,227 @@ def get_agent():
     return _agent
 
 
-async def run_research(query: str, thread_id: str = "default") -> str:
-    """
-    연구 에이전트 실행
+async def close_agent():
+    """에이전트 정리 (SQLite 체크포인터 연결 종료, 다음 get_agent()는 새로 생성)"""
+    global _agent
+    agent, _agent = _agent, None
+    close = getattr(agent.checkpointer, "aclose", None) if agent is not None else None
+    if close is not None:
+        await close()
 
-    Args:
-        query: 사용자 질문
-        thread_id: 세션 ID (대화 추적용)
 
-    Returns:
-        최종 응답 문자열
-    """
-    agent = get_agent()
+RESEARCH_MODES = ("fast", "full", "auto")
+
+
+def resolve_mode(mode: str | None) -> str:
+    """요청 모드 결정 (미지정 시 settings.yaml의 agent.default_mode)"""
+    mode = mode or get_setting("agent.default_mode", "full")
+    if mode not in RESEARCH_MODES:
+        raise ValueError(f"지원하지 않는 모드: {mode} (fast|full|auto)")
+    return mode
 
-    config = {"configurable": {"thread_id": thread_id}}
 
-    initial_state: AgentState = {
+def get_checkpointer_stats() -> dict:
+    """체크포인터 세션 수/용량/제거 통계"""
+    if _agent is None:
+        return {}
+    return _agent.checkpointer.policy.stats()
+
+
+def new_thread_id() -> str:
+    """세션 ID가 없는 요청용 1회성 스레드 ID"""
+    return f"run-{uuid.uuid4().hex}"
+
+
+def compose_query(
+    query: str,
+    material: str | None = None,
+    current_params: dict | None = None
+) -> str:
+    """요청의 재료/현재 설정을 질문 문자열에 포함"""
+    if material:
+        query = f"[재료: {material}] {query}"
+    if current_params:
+        params_str = ", ".join([f"{k}={v}" for k, v in current_params.items()])
+        query = f"{query} (현재 설정: {params_str})"
+    return query
+
+
+def build_initial_state(
+    query: str,
+    current_params: dict | None = None,
+    mode: str = "full"
+) -> AgentState:
+    """
+    그래프 초기 상태 생성
+
+    누적 채널은 Replace로 지정하여 같은 세션의 이전 질문 결과/오류를 비움
+    """
+    return {
         "original_query": query,
+        "current_params": current_params,
+        "mode": mode,
         "research_plan": None,
-        "web_results": [],
-        "kb_results": [],
-        "paper_results": [],
-        "community_results": [],
+        "web_results": Replace(),
+        "kb_results": Replace(),
+        "paper_results": Replace(),
+        "community_results": Replace(),
         "iteration_count": 0,
         "is_sufficient": False,
         "confidence_score": 0.0,
         "missing_info": [],
+        "executed_queries": [],
+        "new_result_count": 0,
+        "evaluated_urls": [],
         "synthesized_knowledge": "",
         "recommendations": [],
         "final_response": "",
         "sources_cited": [],
-        "errors": []
+        "errors": Replace()
     }
 
-    result = await agent.ainvoke(initial_state, config)
 
-    return result.get("final_response", "응답을 생성할 수 없습니다.")
+async def run_research_detailed(
+    query: str,
+    thread_id: str | None = None,
+    current_params: dict | None = None,
+    material: str | None = None,
+    use_cache: bool = True,
+    mode: str | None = None
+) -> dict:
+    """
+    연구 에이전트 실행 (응답 캐시 포함)
 
+    Args:
+        query: 사용자 질문
+        thread_id: 세션 ID (대화 추적용, 없으면 요청마다 새 스레드)
+        current_params: 현재 파라미터 설정 (유사 파라미터 실험 검색에 사용)
+        material: 요청에 명시된 재료 (캐시 키에 포함)
+        use_cache: False면 응답 캐시를 우회
+        mode: fast | full | auto (None이면 설정 기본값)
 
-async def run_research_stream(query: str, thread_id: str = "default"):
+    Returns:
+        {"response", "sources", "cached"}
+    """
+    cache = None
+    if use_cache and get_setting("cache.response.enabled", True):
+        cache = get_response_cache()
+
+    mode = resolve_mode(mode)
+    initial_state = build_initial_state(query, current_params, mode)
+
+    if cache is not None:
+        key = cache.exact_key(query, material, current_params, mode)
+        hit = cache.get_exact(key)
+        if hit is not None:
+            return {**hit, "cached": True}
+
+        if cache.similarity_enabled:
+            # 계획을 먼저 파싱해 유사 응답을 찾고, 못 찾으면 그래프에서 재사용
+            parsed = await parse_query(initial_state)
+            initial_state["research_plan"] = parsed["research_plan"]
+            hit = cache.get_similar(parsed["research_plan"], current_params, mode)
+            if hit is not None:
+                return {**hit, "cached": True}
+        cache.record_miss()
+
+    agent = get_agent()
+
+    config = {"configurable": {"thread_id": thread_id or new_thread_id()}}
+
+    # tracing.enabled면 샘플링된 실행을 기록 (run.py replay로 재현)
+    async with trace_run(initial_state) as recorder:
+        result = await agent.ainvoke(initial_state, config)
+        if recorder is not None:
+            recorder.result = result
+
+    payload = {
+        "response": result.get("final_response", "응답을 생성할 수 없습니다."),
+        "sources": result.get("sources_cited", []),
+    }
+
+    # 검색 오류로 불완전한 응답은 캐시하지 않음
+    if cache is not None and result.get("final_response") and not result.get("errors"):
+        # 유사 일치는 refine 이전의 파싱 직후 계획 기준
+        cache.put(
+            key, payload,
+            plan=initial_state["research_plan"],
+            current_params=current_params,
+            mode=mode
+        )
+
+    return {**payload, "cached": False}
+
+
+async def run_research(
+    query: str,
+    thread_id: str | None = None,
+    current_params: dict | None = None,
+    mode: str | None = None
+) -> str:
+    """
+    연구 에이전트 실행
+
+    Args:
+        query: 사용자 질문
+        thread_id: 세션 ID (대화 추적용, 없으면 요청마다 새 스레드)
+        current_params: 현재 파라미터 설정 (유사 파라미터 실험 검색에 사용)
+        mode: fast | full | auto (None이면 설정 기본값)
+
+    Returns:
+        최종 응답 문자열
+    """
+    result = await run_research_detailed(query, thread_id, current_params, mode=mode)
+    return result["response"]
+
+
+async def run_research_stream(
+    query: str,
+    thread_id: str | None = None,
+    current_params: dict | None = None,
+    mode: str | None = None
+):
     """
     연구 에이전트 스트리밍 실행
 
     Yields:
-        각 노드 실행 상태
+        {"type": "start", "node", "session_id"} / {"type": "end", "node", "elapsed_ms"}: 노드 실행 상태
+            (session_id: 이어서 질문할 때 보낼 세션 ID, 미지정 시 새로 발급한 값)
+        {"type": "delta", "text"}: 종합 분석 텍스트 조각 (LLM 생성 중)
+        {"type": "recommendation", ...}: 검증을 마친 파라미터 추천
+        {"type": "complete", "response"}: 최종 응답
     """
     agent = get_agent()
 
-    config = {"configurable": {"thread_id": thread_id}}
+    # stream_tokens: 노드가 LLM 스트리밍과 사용자 정의 이벤트를 사용하도록 지시
+    thread_id = thread_id or new_thread_id()
+    config = {"configurable": {"thread_id": thread_id, "stream_tokens": True}}
 
-    initial_state: AgentState = {
-        "original_query": query,
-        "research_plan": None,
-        "web_results": [],
-        "kb_results": [],
-        "paper_results": [],
-        "community_results": [],
-        "iteration_count": 0,
-        "is_sufficient": False,
-        "confidence_score": 0.0,
-        "missing_info": [],
-        "synthesized_knowledge": "",
-        "recommendations": [],
-        "final_response": "",
-        "sources_cited": [],
-        "errors": []
-    }
+    initial_state = build_initial_state(query, current_params, resolve_mode(mode))
+    started: dict[str, float] = {}
+    completed = False
 
     async for event in agent.astream_events(initial_state, config, version="v2"):
         event_type = event.get("event", "")
+        node_name = event.get("name", "unknown")
+        # 그래프 노드 자체의 이벤트만 (내부 runnable 제외)
+        is_node = node_name == event.get("metadata", {}).get("langgraph_node")
+
+        if event_type == "on_custom_event":
+            if node_name == "synthesis_delta":
+                yield {"type": "delta", "text": event["data"]["text"]}
+            elif node_name == "recommendation":
+                yield {"type": "recommendation", **event["data"]}
 
-        if event_type == "on_chain_start":
-            node_name = event.get("name", "unknown")
-            yield {"type": "start", "node": node_name}
+        elif event_type == "on_chain_start" and is_node:
+            started[event["run_id"]] = time.perf_counter()
+            yield {"type": "start", "node": node_name, "session_id": thread_id}
 
         elif event_type == "on_chain_end":
+            if is_node and event["run_id"] in started:
+                elapsed_ms = (time.perf_counter() - started.pop(event["run_id"])) * 1000
+                yield {"type": "end", "node": node_name, "elapsed_ms": round(elapsed_ms, 1)}
             output = event.get("data", {}).get("output", {})
-            if "final_response" in output:
+            if not completed and isinstance(output, dict) and output.get("final_response"):
+                completed = True
                 yield {"type": "complete", "response": output["final_response"]}
@@ -1 +1,31 @@
 # Memory module
+from .cache import TTLCache, SQLiteCache, TieredCache, CacheStats
+from .response_cache import ResearchResponseCache, get_response_cache, get_response_cache_stats
+from .llm_cache import (
+    CoalescingScope,
+    SingleFlight,
+    SingleFlightCache,
+    coalescing_scope,
+    get_llm_cache,
+    get_llm_cache_stats
+)
+from .checkpointer import BoundedMemorySaver, ThreadEvictionPolicy, create_checkpointer
+
+__all__ = [
+    "TTLCache",
+    "SQLiteCache",
+    "TieredCache",
+    "CacheStats",
+    "ResearchResponseCache",
+    "get_response_cache",
+    "get_response_cache_stats",
+    "SingleFlight",
+    "SingleFlightCache",
+    "CoalescingScope",
+    "coalescing_scope",
+    "get_llm_cache",
+    "get_llm_cache_stats",
+    "BoundedMemorySaver",
+    "ThreadEvictionPolicy",
+    "create_checkpointer"
+]
@@ -0,0 +1,229 @@
+"""
+범용 캐시
+- TTLCache: 메모리 LRU + TTL
+- SQLiteCache: 디스크 영속 캐시 (TTL)
+- TieredCache: 메모리 → 디스크 2단 캐시 (비동기 코드는 aget/aset: 디스크 단계만 스레드에서 실행)
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Optional
+
+
+@dataclass
+class CacheStats:
+    """캐시 적중 통계"""
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    sets: int = 0
+    evictions: int = 0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        total = self.hits + self.misses
+        data["hit_rate"] = round(self.hits / total, 4) if total else 0.0
+        return data
+
+
+class TTLCache:
+    """메모리 LRU 캐시 (항목별 만료 시간)"""
+
+    def __init__(self, max_size: int = 1024, default_ttl: float = 3600):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self.stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        if expires_at is None:
+            expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            self.stats.sets += 1
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """SQLite 기반 디스크 캐시 (값은 JSON으로 저장)"""
+
+    def __init__(self, path: Path, max_entries: int = 100_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache(expires_at)")
+        self._conn.commit()
+        self._writes_since_purge = 0
+
+    def get(self, key: str) -> Optional[tuple[float, Any]]:
+        """(만료 시각, 값) 반환, 없거나 만료되었으면 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        return expires_at, json.loads(value)
+
+    def set(self, key: str, value: Any, expires_at: float):
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at)
+            )
+            self._conn.commit()
+            self._writes_since_purge += 1
+            if self._writes_since_purge >= 500:
+                self._purge_locked()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def _purge_locked(self):
+        """만료 항목 삭제 및 최대 개수 초과분 정리"""
+        self._writes_since_purge = 0
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY expires_at ASC"
+            " LIMIT max(0, (SELECT COUNT(*) FROM cache) - ?))",
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+
+class TieredCache:
+    """메모리 LRU(1단) + SQLite(2단) 캐시"""
+
+    def __init__(self, memory: TTLCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.stats = CacheStats()
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+        return value
+
+    def _get_disk(self, key: str) -> Optional[tuple[float, Any]]:
+        if self.disk is None:
+            return None
+        try:
+            return self.disk.get(key)
+        except sqlite3.Error:
+            return None
+
+    def _promote(self, key: str, entry: Optional[tuple[float, Any]]) -> Optional[Any]:
+        """디스크 조회 결과를 메모리로 올리고 통계 기록"""
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        expires_at, value = entry
+        self.memory.set(key, value, expires_at=expires_at)
+        self.stats.hits += 1
+        self.stats.disk_hits += 1
+        return value
+
+    def _set_disk(self, key: str, value: Any, expires_at: float):
+        try:
+            self.disk.set(key, value, expires_at)
+        except sqlite3.Error:
+            pass
+
+    def _set_memory(self, key: str, value: Any, ttl: float) -> float:
+        expires_at = time.time() + ttl
+        self.memory.set(key, value, expires_at=expires_at)
+        self.stats.sets += 1
+        return expires_at
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        return self._promote(key, self._get_disk(key))
+
+    def set(self, key: str, value: Any, ttl: float):
+        expires_at = self._set_memory(key, value, ttl)
+        if self.disk is not None:
+            self._set_disk(key, value, expires_at)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get과 같지만 디스크 조회는 스레드에서 실행 (이벤트 루프를 막지 않음)"""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        if self.disk is None:
+            return self._promote(key, None)
+        return self._promote(key, await asyncio.to_thread(self._get_disk, key))
+
+    async def aset(self, key: str, value: Any, ttl: float):
+        """set과 같지만 디스크 쓰기는 스레드에서 실행"""
+        expires_at = self._set_memory(key, value, ttl)
+        if self.disk is not None:
+            await asyncio.to_thread(self._set_disk, key, value, expires_at)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
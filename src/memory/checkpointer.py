@@ -0,0 +1,280 @@
+"""
+LangGraph 체크포인터 (스레드 수/용량/TTL 제한)
+- 세션(thread_id)별 마지막 접근 시각 기준 TTL 만료
+- 최대 스레드 수 초과 시 가장 오래 사용하지 않은 스레드부터 제거 (LRU)
+- 직렬화된 체크포인트 총 용량 상한
+- 선택: SQLite 파일 백엔드 (접근 시각도 SQLite에 저장하여 재시작 후에도 제거 정책 유지)
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.config import get_setting, resolve_path
+
+logger = logging.getLogger(__name__)
+
+
+class ThreadEvictionPolicy:
+    """스레드별 접근 시각/용량을 추적하고 제거 대상을 결정"""
+
+    def __init__(
+        self,
+        ttl: float = 3600,
+        max_threads: int = 1000,
+        max_bytes: Optional[int] = None,
+        clock=time.monotonic
+    ):
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        # 접근 시각을 저장소에 남기는 백엔드는 재시작 후에도 비교 가능한 time.time 사용
+        self.clock = clock
+        self.total_bytes = 0
+        self.evictions = 0
+        self._threads: OrderedDict[str, float] = OrderedDict()
+        self._bytes: dict[str, int] = defaultdict(int)
+
+    def touch(self, thread_id: str, added_bytes: int = 0) -> list[str]:
+        """스레드 사용 기록 후 제거할 스레드 목록 반환 (현재 스레드는 제외)"""
+        self.restore(thread_id, self.clock(), added_bytes)
+        return self._collect_victims(keep=thread_id)
+
+    def restore(self, thread_id: str, last_access: float, added_bytes: int = 0):
+        """접근 기록만 반영 (저장소에서 읽어 온 기록은 오래된 순으로 호출)"""
+        self._threads[thread_id] = last_access
+        self._threads.move_to_end(thread_id)
+        self._bytes[thread_id] += added_bytes
+        self.total_bytes += added_bytes
+
+    def sweep(self) -> list[str]:
+        """새 접근 없이 만료/초과 스레드 정리 (시작 시 복원 직후 등)"""
+        return self._collect_victims(keep=None)
+
+    def last_access(self, thread_id: str) -> Optional[float]:
+        return self._threads.get(thread_id)
+
+    def _collect_victims(self, keep: Optional[str]) -> list[str]:
+        now = self.clock()
+        # 오래된 순으로 보면서 조건을 만족할 때까지 제거
+        victims = []
+        remaining_threads = len(self._threads)
+        remaining_bytes = self.total_bytes
+        for candidate, last_access in self._threads.items():
+            if candidate == keep:
+                break
+            expired = now - last_access > self.ttl
+            over_count = remaining_threads > self.max_threads
+            over_size = self.max_bytes is not None and remaining_bytes > self.max_bytes
+            if not (expired or over_count or over_size):
+                break
+            victims.append(candidate)
+            remaining_threads -= 1
+            remaining_bytes -= self._bytes[candidate]
+
+        for victim in victims:
+            self.forget(victim)
+        self.evictions += len(victims)
+        return victims
+
+    def forget(self, thread_id: str):
+        self._threads.pop(thread_id, None)
+        self.total_bytes -= self._bytes.pop(thread_id, 0)
+
+    def stats(self) -> dict:
+        return {
+            "threads": len(self._threads),
+            "bytes": self.total_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """TTL/LRU/용량 제한이 있는 메모리 체크포인터"""
+
+    def __init__(self, policy: ThreadEvictionPolicy, serde=None):
+        super().__init__(serde=serde)
+        self.policy = policy
+        self._lock = threading.RLock()
+        # delete_thread가 전체 키를 훑지 않도록 스레드별 writes/blobs 키 보관
+        self._thread_keys: dict[str, set] = defaultdict(set)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            added = 0
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                self._thread_keys[thread_id].add(("blobs", key))
+                added += len(self.blobs[key][1])
+            saved = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+            added += len(saved[0][1]) + len(saved[1][1])
+            self._evict(self.policy.touch(thread_id, added))
+        return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        outer_key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            before = len(self.writes.get(outer_key, {}))
+            super().put_writes(config, writes, task_id, task_path)
+            stored = self.writes.get(outer_key, {})
+            added = sum(len(v[2][1]) for v in list(stored.values())[before:])
+            self._thread_keys[thread_id].add(("writes", outer_key))
+            self._evict(self.policy.touch(thread_id, added))
+
+    def get_tuple(self, config):
+        with self._lock:
+            return super().get_tuple(config)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self.storage.pop(thread_id, None)
+            for kind, key in self._thread_keys.pop(thread_id, ()):
+                getattr(self, kind).pop(key, None)
+            self.policy.forget(thread_id)
+
+    def _evict(self, victims: list[str]):
+        for victim in victims:
+            self.delete_thread(victim)
+
+
+def create_serializer() -> JsonPlusSerializer:
+    """그래프 상태 타입을 허용 목록에 등록한 직렬화기"""
+    from src.graph.state import ResultRecord, SearchResult, ResearchPlan, ParameterRecommendation
+    return JsonPlusSerializer(
+        allowed_msgpack_modules=[ResultRecord, SearchResult, ResearchPlan, ParameterRecommendation]
+    )
+
+
+def _create_sqlite_saver(path, policy: ThreadEvictionPolicy, serde):
+    """
+    SQLite 파일 체크포인터 (langgraph-checkpoint-sqlite, aiosqlite 필요)
+
+    실행 중인 이벤트 루프 안에서 생성해야 함. 연결은 첫 사용 시 setup()에서
+    시작하고 aclose()로 닫음 (aiosqlite 스레드가 남으면 프로세스가 종료되지 않음)
+    """
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    class EvictingSqliteSaver(AsyncSqliteSaver):
+        """
+        스레드별 마지막 접근 시각을 thread_access 테이블에 함께 저장
+
+        체크포인트는 디스크에 있으므로 용량 제한 없이 TTL/LRU만 적용하며,
+        시작 시 테이블에서 정책을 복원하여 재시작 전 스레드도 제거 대상이 됨
+        """
+
+        def __init__(self, conn, serde=None):
+            super().__init__(conn, serde=serde)
+            self.policy = policy
+            self._access_ready = False
+            self._access_lock = asyncio.Lock()
+
+        async def setup(self) -> None:
+            if self._access_ready:
+                return
+            async with self._access_lock:
+                if self._access_ready:
+                    return
+                # 연결 시작 + checkpoints/writes 테이블 생성
+                await super().setup()
+                async with self.lock:
+                    await self.conn.execute(
+                        "CREATE TABLE IF NOT EXISTS thread_access "
+                        "(thread_id TEXT PRIMARY KEY, last_access REAL NOT NULL)"
+                    )
+                    # 접근 기록이 없는 기존 스레드는 지금 접근한 것으로 간주
+                    await self.conn.execute(
+                        "INSERT OR IGNORE INTO thread_access (thread_id, last_access) "
+                        "SELECT DISTINCT thread_id, ? FROM checkpoints",
+                        (policy.clock(),)
+                    )
+                    await self.conn.commit()
+                    async with self.conn.execute(
+                        "SELECT thread_id, last_access FROM thread_access ORDER BY last_access"
+                    ) as cur:
+                        rows = await cur.fetchall()
+                for thread_id, last_access in rows:
+                    policy.restore(thread_id, last_access)
+                self._access_ready = True
+                victims = policy.sweep()
+            await self._evict(victims)
+            if victims:
+                logger.info(f"만료된 세션 {len(victims)}개 제거 (시작 시 정리)")
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            result = await super().aput(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            victims = policy.touch(thread_id)
+            async with self.lock:
+                await self.conn.execute(
+                    "INSERT INTO thread_access (thread_id, last_access) VALUES (?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET last_access = excluded.last_access",
+                    (str(thread_id), policy.last_access(thread_id))
+                )
+                await self.conn.commit()
+            await self._evict(victims)
+            return result
+
+        async def adelete_thread(self, thread_id: str) -> None:
+            await super().adelete_thread(thread_id)
+            async with self.lock:
+                await self.conn.execute("DELETE FROM thread_access WHERE thread_id = ?", (str(thread_id),))
+                await self.conn.commit()
+            policy.forget(thread_id)
+
+        async def aclose(self) -> None:
+            """연결 종료 (시작하지 않은 연결은 그대로 둠)"""
+            if self._access_ready or self.is_setup:
+                await self.conn.close()
+
+        async def _evict(self, victims: list[str]):
+            for victim in victims:
+                await self.adelete_thread(victim)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return EvictingSqliteSaver(aiosqlite.connect(str(path)), serde=serde)
+
+
+def create_checkpointer():
+    """
+    설정 기반 체크포인터 생성
+
+    checkpointer.backend:
+        memory: BoundedMemorySaver (기본)
+        sqlite: SQLite 파일 (패키지 미설치 시 memory로 대체)
+    """
+    serde = create_serializer()
+    policy = ThreadEvictionPolicy(
+        ttl=get_setting("checkpointer.ttl_seconds", 3600),
+        max_threads=get_setting("checkpointer.max_threads", 1000),
+        max_bytes=get_setting("checkpointer.max_bytes", 256 * 1024 * 1024)
+    )
+
+    if get_setting("checkpointer.backend", "memory") == "sqlite":
+        policy.max_bytes = None
+        policy.clock = time.time
+        try:
+            return _create_sqlite_saver(
+                resolve_path(get_setting("checkpointer.sqlite_path", "data/cache/checkpoints.sqlite")),
+                policy,
+                serde
+            )
+        except ImportError:
+            logger.warning("langgraph-checkpoint-sqlite 미설치, 메모리 체크포인터 사용")
+            policy.max_bytes = get_setting("checkpointer.max_bytes", 256 * 1024 * 1024)
+            policy.clock = time.monotonic
+
+    return BoundedMemorySaver(policy, serde=serde)
@@ -0,0 +1,206 @@
+"""
+LLM 호출 메모이제이션 + 동일 요청 병합 (single-flight)
+- 완료된 응답은 TTL LRU 캐시에 보관
+- 같은 키로 진행 중인 호출이 있으면 새로 호출하지 않고 그 결과를 공유
+- 배치 범위(CoalescingScope): 캐시 설정과 무관하게 배치 안의 같은 요청은 한 번만 호출
+"""
+import asyncio
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Literal, Optional
+
+from src.config import get_setting
+from .cache import TTLCache
+
+# get_or_call 결과 출처: 캐시 적중 / 진행 중 호출 공유 / 직접 호출
+CacheOutcome = Literal["hit", "coalesced", "miss"]
+
+
+class SingleFlight:
+    """같은 키로 진행 중인 비동기 호출을 하나로 합침 (결과는 보관하지 않음)"""
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable]):
+        value, _ = await self.run_shared(key, factory)
+        return value
+
+    async def run_shared(self, key: str, factory: Callable[[], Awaitable]) -> tuple[Any, bool]:
+        """(결과, 진행 중 호출을 공유했는지) 반환"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            # 선행 호출자가 취소되어도 대기자는 영향받지 않도록 shield
+            return await asyncio.shield(inflight), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 대기자가 없을 때 "exception was never retrieved" 경고 방지
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, False
+        finally:
+            self._inflight.pop(key, None)
+
+
+class SingleFlightCache:
+    """TTL 캐시 + 진행 중 호출 공유"""
+
+    def __init__(self, max_size: int = 2048, ttl: float = 3600):
+        self._store = TTLCache(max_size=max_size, default_ttl=ttl)
+        self._flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def coalesced(self) -> int:
+        return self._flight.coalesced
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def peek(self, key: str) -> Optional[str]:
+        """완료된 응답만 조회 (진행 중 호출은 기다리지 않음)"""
+        value = self._store.get(key)
+        if value is not None:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        """외부에서 완료한 응답 저장 (예: 스트리밍 호출)"""
+        self.misses += 1
+        self._store.set(key, value)
+
+    async def get_or_call(self, key: str, factory: Callable[[], Awaitable[str]]) -> tuple[str, CacheOutcome]:
+        """(응답, 출처) 반환. factory는 miss일 때만 실행"""
+        cached = self._store.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, "hit"
+
+        async def load() -> str:
+            # 선행 호출자만 실행
+            self.misses += 1
+            try:
+                value = await factory()
+            except Exception:
+                self.errors += 1
+                raise
+            self._store.set(key, value)
+            return value
+
+        value, shared = await self._flight.run_shared(key, load)
+        return value, "coalesced" if shared else "miss"
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "inflight": len(self._flight),
+            "entries": len(self._store),
+            "hit_rate": round((self.hits + self.coalesced) / total, 4) if total else 0.0,
+        }
+
+    def clear(self):
+        self._store.clear()
+
+
+class CoalescingScope:
+    """
+    배치 하나 동안 같은 키의 요청(LLM 프롬프트, 검색 쿼리)을 한 번만 실행하고 결과 공유
+
+    캐시를 끄거나 우회해도 동작하며, 배치가 끝나면 버림. 실패한 요청은 공유하지 않고
+    이후 항목이 다시 시도함
+    """
+
+    def __init__(self):
+        self._results: dict[str, asyncio.Future] = {}
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable]) -> tuple[Any, bool]:
+        """(결과, 다른 항목의 호출을 공유했는지) 반환"""
+        existing = self._results.get(key)
+        if existing is not None:
+            self.shared += 1
+            return await asyncio.shield(existing), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._results[key] = future
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            self._results.pop(key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            self._results.pop(key, None)
+            future.set_exception(e)
+            future.exception()
+            raise
+        future.set_result(value)
+        return value, False
+
+
+_coalescing_scope: ContextVar[Optional[CoalescingScope]] = ContextVar("coalescing_scope", default=None)
+
+
+@contextmanager
+def coalescing_scope(scope: CoalescingScope):
+    """이 블록에서 시작하는 LLM/검색 호출을 scope 안에서 공유"""
+    token = _coalescing_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _coalescing_scope.reset(token)
+
+
+def current_coalescing_scope() -> Optional[CoalescingScope]:
+    return _coalescing_scope.get()
+
+
+_llm_cache: Optional[SingleFlightCache] = None
+
+
+def get_llm_cache() -> SingleFlightCache:
+    """설정 기반 LLM 캐시 싱글톤"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = SingleFlightCache(
+            max_size=get_setting("cache.llm.max_entries", 2048),
+            ttl=get_setting("cache.llm.ttl_seconds", 3600)
+        )
+    return _llm_cache
+
+
+def get_llm_cache_stats() -> dict:
+    """LLM 캐시 적중/미스/병합 통계"""
+    if _llm_cache is None:
+        return {}
+    return _llm_cache.stats()
@@ -0,0 +1,205 @@
+"""
+연구 응답 캐시 (run_research 전체 결과)
+- 정확 일치: 정규화된 질문 + 재료 + 현재 파라미터
+- 유사 일치 (선택): 파싱된 ResearchPlan 임베딩의 코사인 유사도
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from src.config import get_setting
+from .cache import TTLCache
+
+
+def _normalize_text(text: Optional[str]) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _params_key(current_params: Optional[dict]) -> str:
+    return json.dumps(current_params or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ResearchResponseCache:
+    """run_research 결과 캐시 (정확 일치 + 선택적 유사 일치)"""
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: float = 6 * 3600,
+        similarity_enabled: bool = False,
+        similarity_threshold: float = 0.92,
+        embedder=None
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_enabled = similarity_enabled and embedder is not None
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self._exact = TTLCache(max_size=max_entries, default_ttl=ttl)
+
+        # 유사 일치 항목: (컨텍스트 키, 만료 시각, 응답), 벡터는 같은 순서로 행렬에 보관
+        # 행렬은 용량을 두 배씩 늘려 미리 할당하고 앞 len(_entries)행만 사용,
+        # max_entries에 도달하면 가장 오래된 행부터 덮어씀 (삽입마다 전체 재구성하지 않음)
+        self._lock = threading.Lock()
+        self._entries: list[tuple[str, float, dict]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._oldest = 0
+
+    @staticmethod
+    def exact_key(
+        query: str,
+        material: Optional[str] = None,
+        current_params: Optional[dict] = None,
+        mode: Optional[str] = None
+    ) -> str:
+        payload = "|".join([
+            _normalize_text(query),
+            _normalize_text(material),
+            _params_key(current_params),
+            _normalize_text(mode),
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _plan_context(plan, current_params: Optional[dict], mode: Optional[str] = None) -> str:
+        """유사 일치 시 반드시 같아야 하는 값 (재료, 결함, 파라미터, 모드)"""
+        return "|".join([
+            _normalize_text(plan.material_type),
+            _normalize_text(plan.defect_type),
+            _params_key(current_params),
+            _normalize_text(mode),
+        ])
+
+    @staticmethod
+    def _plan_text(plan) -> str:
+        return " ".join([
+            plan.main_query,
+            *plan.sub_queries,
+            *plan.parameters_mentioned,
+        ])
+
+    def get_exact(self, key: str) -> Optional[dict]:
+        value = self._exact.get(key)
+        if value is not None:
+            self.exact_hits += 1
+        return value
+
+    def get_similar(
+        self,
+        plan,
+        current_params: Optional[dict] = None,
+        mode: Optional[str] = None
+    ) -> Optional[dict]:
+        """같은 컨텍스트에서 임계값 이상으로 유사한 계획의 응답 반환"""
+        if not self.similarity_enabled:
+            return None
+        vector = self.embedder.embed([self._plan_text(plan)])[0]
+        context = self._plan_context(plan, current_params, mode)
+        now = time.time()
+
+        with self._lock:
+            if not self._entries:
+                return None
+            scores = self._vectors[:len(self._entries)] @ vector
+            for i in np.argsort(-scores):
+                if scores[i] < self.similarity_threshold:
+                    break
+                entry_context, expires_at, value = self._entries[i]
+                if entry_context == context and expires_at >= now:
+                    self.similar_hits += 1
+                    return value
+
+        return None
+
+    def record_miss(self):
+        """두 단계 모두 실패하여 전체 파이프라인을 실행한 경우"""
+        self.misses += 1
+
+    def put(
+        self,
+        key: str,
+        value: dict,
+        plan=None,
+        current_params: Optional[dict] = None,
+        mode: Optional[str] = None
+    ):
+        self._exact.set(key, value)
+        self.sets += 1
+        if not self.similarity_enabled or plan is None or self.max_entries < 1:
+            return
+
+        vector = self.embedder.embed([self._plan_text(plan)])[0]
+        entry = (self._plan_context(plan, current_params, mode), time.time() + self.ttl, value)
+        with self._lock:
+            count = len(self._entries)
+            if count < self.max_entries:
+                if self._vectors is None or count == len(self._vectors):
+                    self._grow(min(self.max_entries, max(16, 2 * count)), vector)
+                self._vectors[count] = vector
+                self._entries.append(entry)
+            else:
+                # 가득 차면 가장 오래된 항목 자리에 덮어씀 (만료 항목은 조회 시 건너뜀)
+                self._vectors[self._oldest] = vector
+                self._entries[self._oldest] = entry
+                self._oldest = (self._oldest + 1) % self.max_entries
+
+    def _grow(self, capacity: int, vector: np.ndarray):
+        grown = np.empty((capacity, len(vector)), dtype=vector.dtype)
+        count = len(self._entries)
+        if count:
+            grown[:count] = self._vectors[:count]
+        self._vectors = grown
+
+    def stats(self) -> dict:
+        total = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "hit_rate": round((self.exact_hits + self.similar_hits) / total, 4) if total else 0.0,
+        }
+
+    def clear(self):
+        self._exact.clear()
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+            self._oldest = 0
+
+
+_response_cache: Optional[ResearchResponseCache] = None
+
+
+def get_response_cache() -> ResearchResponseCache:
+    """설정 기반 응답 캐시 싱글톤"""
+    global _response_cache
+    if _response_cache is None:
+        embedder = None
+        similarity_enabled = get_setting("cache.response.similarity.enabled", False)
+        if similarity_enabled:
+            from src.tools.vector_index import get_embedder
+            embedder = get_embedder()
+        _response_cache = ResearchResponseCache(
+            max_entries=get_setting("cache.response.max_entries", 1000),
+            ttl=get_setting("cache.response.ttl_seconds", 6 * 3600),
+            similarity_enabled=similarity_enabled,
+            similarity_threshold=get_setting("cache.response.similarity.threshold", 0.92),
+            embedder=embedder
+        )
+    return _response_cache
+
+
+def get_response_cache_stats() -> dict:
+    """응답 캐시 적중/미스 통계"""
+    if _response_cache is None:
+        return {}
+    return _response_cache.stats()
@@ -0,0 +1,287 @@
+"""
+지연 시간/비용 계측
+- 그래프 노드별 실행 시간과 오류
+- 외부 호출(Gemini, Tavily)별 시간, 요청/응답 크기, 토큰 수, 캐시 적중, 오류
+- Prometheus 텍스트 형식으로 내보내기 (/metrics)
+- 요청 단위 시간 분석 (request_trace 블록 안에서 실행된 노드/호출 집계)
+- 추적 기록 중이면 같은 지점에서 노드 상태 변경과 외부 호출 내용도 기록 (src.tracing)
+"""
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from src.config import get_setting
+from src.tracing import current_recorder
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class Counter:
+    """레이블별 누적 카운터"""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.label_names, key)))} {value}")
+        return lines
+
+
+class Histogram:
+    """레이블별 누적 버킷 히스토그램"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # 레이블 → [버킷별 개수..., 합계, 전체 개수]
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            labels = dict(zip(self.label_names, key))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+
+NODE_DURATION = Histogram(
+    "agent_node_duration_seconds", "그래프 노드 실행 시간", ("node",)
+)
+NODE_ERRORS = Counter(
+    "agent_node_errors_total", "예외로 끝난 그래프 노드 실행 수", ("node",)
+)
+CALL_DURATION = Histogram(
+    "external_call_duration_seconds", "외부 호출 시간 (cache: hit | coalesced | miss)", ("provider", "operation", "cache")
+)
+CALL_ERRORS = Counter(
+    "external_call_errors_total", "예외로 끝난 외부 호출 수", ("provider", "operation")
+)
+CALL_SIZE = Histogram(
+    "external_call_payload_chars", "외부 호출 요청/응답 크기 (문자 수)", ("provider", "direction"), SIZE_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Gemini 사용 토큰 수", ("model", "kind")
+)
+STRUCTURED_OUTPUT = Counter(
+    "llm_structured_output_total", "구조화 응답 파싱 결과 (ok | repaired | failed)", ("schema", "outcome")
+)
+
+REGISTRY = (NODE_DURATION, NODE_ERRORS, CALL_DURATION, CALL_ERRORS, CALL_SIZE, LLM_TOKENS, STRUCTURED_OUTPUT)
+
+
+def render_metrics() -> str:
+    """Prometheus 텍스트 형식 (text/plain; version=0.0.4)"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_enabled() -> bool:
+    return get_setting("metrics.enabled", True)
+
+
+@dataclass
+class RequestTrace:
+    """요청 하나의 노드/외부 호출 시간 집계"""
+    started: float = field(default_factory=time.perf_counter)
+    nodes: list[dict] = field(default_factory=list)
+    calls: dict[str, dict] = field(default_factory=dict)
+
+    def _provider(self, provider: str) -> dict:
+        if provider not in self.calls:
+            self.calls[provider] = {
+                "calls": 0, "cache_hits": 0, "coalesced": 0, "errors": 0, "ms": 0.0,
+                "request_chars": 0, "response_chars": 0,
+                "prompt_tokens": 0, "response_tokens": 0,
+            }
+        return self.calls[provider]
+
+    def to_dict(self) -> dict:
+        """병렬 노드는 시간이 겹치므로 노드 합계가 total_ms보다 클 수 있음"""
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "nodes": list(self.nodes),
+            "calls": {
+                provider: {**totals, "ms": round(totals["ms"], 1)}
+                for provider, totals in self.calls.items()
+            },
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def request_trace() -> Iterator[RequestTrace]:
+    """이 블록에서 실행된 노드/외부 호출을 요청 단위로 집계"""
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def instrument_node(func):
+    """그래프 노드 실행 시간/오류 기록 (노드 이름 = 함수 이름, 추적 중이면 상태 변경도 기록)"""
+    node = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        recorder = current_recorder()
+        if not metrics_enabled() and recorder is None:
+            return await func(*args, **kwargs)
+        started = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = await func(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if recorder is not None:
+                recorder.node(node, result, elapsed * 1000, error)
+            if metrics_enabled():
+                if error is not None:
+                    NODE_ERRORS.inc(node=node)
+                NODE_DURATION.observe(elapsed, node=node)
+                trace = _current_trace.get()
+                if trace is not None:
+                    trace.nodes.append({"node": node, "ms": round(elapsed * 1000, 1), "error": error is not None})
+
+    return wrapper
+
+
+@dataclass
+class CallRecord:
+    """외부 호출 하나의 측정값 (호출하는 쪽에서 채움)"""
+    request_chars: int = 0
+    response_chars: int = 0
+    cache_hit: bool = False
+    coalesced: bool = False  # 진행 중인 같은 호출의 결과를 공유 (외부 호출 없음, 적중과 별도 집계)
+    response: Any = None  # 추적 기록용 응답 본문
+
+
+@contextmanager
+def track_call(
+    provider: str,
+    operation: str,
+    request_chars: int = 0,
+    request: Optional[dict] = None
+) -> Iterator[CallRecord]:
+    """외부 호출 시간/크기/캐시 적중/오류 기록 (추적 중이면 request와 record.response도 기록)"""
+    record = CallRecord(request_chars=request_chars)
+    recorder = current_recorder() if request is not None else None
+    if not metrics_enabled() and recorder is None:
+        yield record
+        return
+    started = time.perf_counter()
+    error = None
+    try:
+        yield record
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        if recorder is not None:
+            recorder.call(
+                provider, operation, request, record.response, elapsed * 1000,
+                record.cache_hit, error, coalesced=record.coalesced
+            )
+        if metrics_enabled():
+            _observe_call(provider, operation, record, elapsed, error is not None)
+
+
+def _observe_call(provider: str, operation: str, record: CallRecord, elapsed: float, error: bool):
+    if error:
+        CALL_ERRORS.inc(provider=provider, operation=operation)
+    cache = "hit" if record.cache_hit else "coalesced" if record.coalesced else "miss"
+    CALL_DURATION.observe(elapsed, provider=provider, operation=operation, cache=cache)
+    if cache == "miss":
+        CALL_SIZE.observe(record.request_chars, provider=provider, direction="request")
+        if not error:
+            CALL_SIZE.observe(record.response_chars, provider=provider, direction="response")
+
+    trace = _current_trace.get()
+    if trace is not None:
+        totals = trace._provider(provider)
+        totals["calls"] += 1
+        totals["cache_hits"] += record.cache_hit
+        totals["coalesced"] += record.coalesced
+        totals["errors"] += error
+        totals["ms"] += elapsed * 1000
+        totals["request_chars"] += record.request_chars
+        totals["response_chars"] += record.response_chars
+
+
+def record_tokens(model: str, usage) -> None:
+    """Gemini 응답의 usage_metadata에서 토큰 수 기록"""
+    if usage is None or not metrics_enabled():
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    response_tokens = getattr(usage, "candidates_token_count", None) or 0
+    LLM_TOKENS.inc(prompt_tokens, model=model, kind="prompt")
+    LLM_TOKENS.inc(response_tokens, model=model, kind="response")
+
+    trace = _current_trace.get()
+    if trace is not None:
+        totals = trace._provider("gemini")
+        totals["prompt_tokens"] += prompt_tokens
+        totals["response_tokens"] += response_tokens
+
+
+def record_structured_output(schema: str, outcome: str) -> None:
+    """구조화 응답 파싱 결과 기록 (수정 요청/실패 빈도 확인용)"""
+    if metrics_enabled():
+        STRUCTURED_OUTPUT.inc(schema=schema, outcome=outcome)
@@ -2,13 +2,27 @@
 from .tavily_search import (
     search_3d_printing_web,
     search_3d_printing_papers,
-    search_reddit_community
+    search_reddit_community,
+    get_search_cache_stats
 )
-from .knowledge_base import KnowledgeBase
+from .knowledge_base import KnowledgeBase, get_knowledge_base
+from .experiment_store import ExperimentStore
+from .vector_index import VectorIndex, Embedder, HashingEmbedder
+from .rate_limiter import RateLimiter, get_rate_limiter, get_rate_limit_stats, priority_lane
 
 __all__ = [
     "search_3d_printing_web",
     "search_3d_printing_papers",
     "search_reddit_community",
-    "KnowledgeBase"
+    "get_search_cache_stats",
+    "KnowledgeBase",
+    "get_knowledge_base",
+    "ExperimentStore",
+    "VectorIndex",
+    "Embedder",
+    "HashingEmbedder",
+    "RateLimiter",
+    "get_rate_limiter",
+    "get_rate_limit_stats",
+    "priority_lane"
 ]
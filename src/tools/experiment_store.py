@@ -0,0 +1,175 @@
+"""
+실험 데이터 저장소 (append-only JSONL 로그)
+- 추가 시 한 줄만 기록 (전체 파일 재작성 없음)
+- 동시 쓰기는 그룹 커밋으로 묶어 write/fsync 1회로 처리
+- 같은 experiment_id가 다시 기록되면 마지막 레코드가 우선
+- 대체된 레코드가 쌓이면 압축(compaction)
+- 로그가 없으면 기존 JSON 파일에서 1회 마이그레이션
+"""
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExperimentStore:
+    """append-only JSONL 기반 실험 데이터 저장소"""
+
+    def __init__(
+        self,
+        log_path: Path,
+        legacy_path: Optional[Path] = None,
+        fsync: bool = True,
+        compact_min_superseded: int = 100,
+        compact_ratio: float = 0.5
+    ):
+        self.log_path = Path(log_path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.fsync = fsync
+        self.compact_min_superseded = compact_min_superseded
+        self.compact_ratio = compact_ratio
+
+        # 메모리 상태 보호용
+        self._state_lock = threading.RLock()
+        # 파일 쓰기 직렬화용 (그룹 커밋 리더만 보유)
+        self._write_lock = threading.Lock()
+        self._pending: list[str] = []
+
+        self.experiments: list[dict] = []
+        self._positions: dict[str, int] = {}
+        self._record_count = 0
+        self._mtime: Optional[int] = None
+
+        if not self.log_path.exists() and self.legacy_path and self.legacy_path.exists():
+            self._migrate_legacy()
+        self.load()
+
+    def _file_mtime(self) -> Optional[int]:
+        try:
+            return self.log_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _migrate_legacy(self):
+        """기존 JSON 배열 파일을 JSONL 로그로 변환 (원본은 보존)"""
+        with open(self.legacy_path, "r", encoding="utf-8") as f:
+            experiments = json.load(f)
+        self._write_snapshot(experiments)
+        logger.info(f"Migrated {len(experiments)} experiments to {self.log_path}")
+
+    def _write_snapshot(self, experiments: list[dict]):
+        """임시 파일에 기록 후 원자적으로 교체"""
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.log_path.with_suffix(self.log_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(self._encode(exp) for exp in experiments)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+
+    @staticmethod
+    def _encode(experiment: dict) -> str:
+        return json.dumps(experiment, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def load(self):
+        """로그 전체를 읽어 메모리 상태 재구성"""
+        with self._write_lock, self._state_lock:
+            self.experiments = []
+            self._positions = {}
+            self._record_count = 0
+            self._mtime = self._file_mtime()
+            if self._mtime is None:
+                return
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line_no, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        experiment = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 비정상 종료로 잘린 마지막 줄 등은 건너뜀
+                        logger.warning(f"Skipping corrupt record at {self.log_path}:{line_no}")
+                        continue
+                    self._apply(experiment)
+
+    def reload_if_changed(self) -> bool:
+        """다른 프로세스가 로그를 변경한 경우에만 재로드"""
+        with self._write_lock:
+            changed = self._file_mtime() != self._mtime
+        if changed:
+            self.load()
+        return changed
+
+    def _apply(self, experiment: dict) -> tuple[int, bool]:
+        """메모리 상태에 레코드 반영, (위치, 대체 여부) 반환"""
+        self._record_count += 1
+        experiment_id = experiment.get("experiment_id")
+        if experiment_id is not None and experiment_id in self._positions:
+            position = self._positions[experiment_id]
+            self.experiments[position] = experiment
+            return position, True
+
+        position = len(self.experiments)
+        self.experiments.append(experiment)
+        if experiment_id is not None:
+            self._positions[experiment_id] = position
+        return position, False
+
+    def append(self, experiment: dict) -> tuple[int, bool]:
+        """
+        실험 데이터 추가 (동기 쓰기, 반환 시점에 디스크 반영 완료)
+
+        Returns:
+            (저장 위치, 기존 experiment_id 대체 여부)
+        """
+        line = self._encode(experiment)
+        with self._state_lock:
+            result = self._apply(experiment)
+            self._pending.append(line)
+        self._flush()
+        self._maybe_compact()
+        return result
+
+    def _flush(self):
+        """대기 중인 레코드를 한 번에 기록 (먼저 잠금을 얻은 스레드가 함께 커밋)"""
+        with self._write_lock:
+            with self._state_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                # 다른 스레드의 그룹 커밋에 이미 포함됨
+                return
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write("".join(batch))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            self._mtime = self._file_mtime()
+
+    @property
+    def superseded_count(self) -> int:
+        return self._record_count - len(self.experiments)
+
+    def _maybe_compact(self):
+        superseded = self.superseded_count
+        if superseded < self.compact_min_superseded:
+            return
+        if superseded < self._record_count * self.compact_ratio:
+            return
+        self.compact()
+
+    def compact(self):
+        """대체된 레코드를 제거하여 로그 재작성"""
+        with self._write_lock:
+            with self._state_lock:
+                # 대기 중인 레코드는 스냅샷에 이미 반영되어 있음
+                self._pending = []
+                snapshot = list(self.experiments)
+                self._record_count = len(snapshot)
+            self._write_snapshot(snapshot)
+            self._mtime = self._file_mtime()
+        logger.info(f"Compacted {self.log_path} to {len(snapshot)} records")
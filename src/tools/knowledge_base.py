@@ -4,194 +4,337 @@
 - 결함 해결 가이드
 - 사용자 실험 데이터
 """
-import json
+import threading
+from collections import defaultdict
 from pathlib import Path
 from typing import Optional
 
+from src.config import get_setting
+from .experiment_store import ExperimentStore
+from .vector_index import VectorIndex, get_embedder
+from .parameter_index import ParameterIndex, load_parameter_ranges
+
+
+# 재료별 가이드 (내장)
+MATERIAL_GUIDES = {
+    "PLA": {
+        "name": "PLA (Polylactic Acid)",
+        "nozzle_temp": {"min": 190, "max": 220, "optimal": 205},
+        "bed_temp": {"min": 50, "max": 65, "optimal": 60},
+        "print_speed": {"min": 40, "max": 100, "optimal": 60},
+        "retraction": {"distance": 5, "speed": 45},
+        "fan_speed": 100,
+        "tips": [
+            "가장 출력이 쉬운 재료",
+            "냉각이 중요 - 팬 100% 권장",
+            "고온 시 stringing 발생 가능",
+            "베드 접착: PEI 시트 또는 유리 + 풀스틱"
+        ]
+    },
+    "ABS": {
+        "name": "ABS (Acrylonitrile Butadiene Styrene)",
+        "nozzle_temp": {"min": 220, "max": 260, "optimal": 240},
+        "bed_temp": {"min": 90, "max": 110, "optimal": 100},
+        "print_speed": {"min": 40, "max": 60, "optimal": 50},
+        "retraction": {"distance": 4, "speed": 40},
+        "fan_speed": 0,
+        "tips": [
+            "인클로저 필수 권장",
+            "워핑 방지를 위해 팬 끄기",
+            "베드 온도 높게 유지",
+            "Brim 또는 Raft 사용 권장",
+            "환기 필요 - 유해 가스 발생"
+        ]
+    },
+    "PETG": {
+        "name": "PETG (Polyethylene Terephthalate Glycol)",
+        "nozzle_temp": {"min": 220, "max": 250, "optimal": 230},
+        "bed_temp": {"min": 70, "max": 85, "optimal": 75},
+        "print_speed": {"min": 30, "max": 60, "optimal": 45},
+        "retraction": {"distance": 5, "speed": 35},
+        "fan_speed": 50,
+        "tips": [
+            "Stringing 발생하기 쉬움 - retraction 중요",
+            "온도에 민감 - 너무 높으면 stringing 심함",
+            "베드 접착력이 강함 - 분리 시 주의",
+            "습기에 민감 - 건조 보관 필수",
+            "첫 레이어 속도 낮추기 권장"
+        ]
+    },
+    "TPU": {
+        "name": "TPU (Thermoplastic Polyurethane)",
+        "nozzle_temp": {"min": 220, "max": 250, "optimal": 230},
+        "bed_temp": {"min": 50, "max": 70, "optimal": 60},
+        "print_speed": {"min": 15, "max": 30, "optimal": 25},
+        "retraction": {"distance": 2, "speed": 20},
+        "fan_speed": 50,
+        "tips": [
+            "매우 느린 속도로 출력",
+            "Direct Drive 익스트루더 권장",
+            "Retraction 최소화 또는 비활성화",
+            "Bowden 튜브에서는 출력 어려움"
+        ]
+    }
+}
+
+# 결함 해결 가이드 (내장)
+DEFECT_GUIDES = {
+    "stringing": {
+        "name": "Stringing (실뜨기)",
+        "description": "이동 경로에 가는 실 같은 필라멘트 잔여물이 남음",
+        "causes": [
+            "노즐 온도가 너무 높음",
+            "Retraction 설정 부족",
+            "필라멘트 습기",
+            "Travel 속도가 너무 느림"
+        ],
+        "solutions": [
+            {"action": "노즐 온도 5-10°C 낮추기", "priority": 1},
+            {"action": "Retraction distance 1-2mm 증가", "priority": 2},
+            {"action": "Retraction speed 10-20mm/s 증가", "priority": 3},
+            {"action": "Travel speed 150mm/s 이상으로 증가", "priority": 4},
+            {"action": "필라멘트 건조 (50°C, 4-6시간)", "priority": 5}
+        ]
+    },
+    "warping": {
+        "name": "Warping (뒤틀림)",
+        "description": "출력물 모서리가 베드에서 들뜸",
+        "causes": [
+            "베드 온도 부족",
+            "냉각이 너무 빠름",
+            "베드 접착력 부족",
+            "주변 온도 차이"
+        ],
+        "solutions": [
+            {"action": "베드 온도 5-10°C 높이기", "priority": 1},
+            {"action": "Brim (8-10mm) 추가", "priority": 2},
+            {"action": "인클로저 사용 (ABS)", "priority": 3},
+            {"action": "첫 레이어 팬 속도 0%", "priority": 4},
+            {"action": "베드 접착제 사용 (풀스틱, 헤어스프레이)", "priority": 5}
+        ]
+    },
+    "layer_adhesion": {
+        "name": "Layer Adhesion (레이어 접착 불량)",
+        "description": "레이어 간 접착이 약해 쉽게 분리됨",
+        "causes": [
+            "노즐 온도가 너무 낮음",
+            "레이어 높이가 너무 높음",
+            "출력 속도가 너무 빠름",
+            "과도한 냉각"
+        ],
+        "solutions": [
+            {"action": "노즐 온도 5-10°C 높이기", "priority": 1},
+            {"action": "레이어 높이 줄이기 (노즐 직경의 75%)", "priority": 2},
+            {"action": "출력 속도 10-20% 낮추기", "priority": 3},
+            {"action": "팬 속도 줄이기", "priority": 4}
+        ]
+    },
+    "under_extrusion": {
+        "name": "Under Extrusion (과소 압출)",
+        "description": "필라멘트가 충분히 압출되지 않아 틈이 생김",
+        "causes": [
+            "노즐 막힘",
+            "필라멘트 경로 마찰",
+            "온도 부족",
+            "익스트루더 그립 부족"
+        ],
+        "solutions": [
+            {"action": "노즐 청소 또는 교체", "priority": 1},
+            {"action": "Flow rate 5-10% 증가", "priority": 2},
+            {"action": "노즐 온도 5-10°C 높이기", "priority": 3},
+            {"action": "출력 속도 낮추기", "priority": 4},
+            {"action": "익스트루더 텐션 조정", "priority": 5}
+        ]
+    },
+    "over_extrusion": {
+        "name": "Over Extrusion (과다 압출)",
+        "description": "필라멘트가 과다하게 압출되어 표면이 울퉁불퉁",
+        "causes": [
+            "Flow rate가 너무 높음",
+            "필라멘트 직경 설정 오류",
+            "E-steps 캘리브레이션 오류"
+        ],
+        "solutions": [
+            {"action": "Flow rate 5-10% 낮추기", "priority": 1},
+            {"action": "필라멘트 직경 캘리브레이션", "priority": 2},
+            {"action": "E-steps 재캘리브레이션", "priority": 3}
+        ]
+    },
+    "first_layer": {
+        "name": "First Layer Issues (첫 레이어 문제)",
+        "description": "첫 레이어가 베드에 잘 붙지 않음",
+        "causes": [
+            "베드 레벨링 불량",
+            "노즐-베드 거리가 너무 멂",
+            "베드 온도 부족",
+            "베드 표면 오염"
+        ],
+        "solutions": [
+            {"action": "베드 레벨링 재수행", "priority": 1},
+            {"action": "Z-offset 조정 (노즐 더 가깝게)", "priority": 2},
+            {"action": "베드 온도 5-10°C 높이기", "priority": 3},
+            {"action": "첫 레이어 속도 50% 낮추기", "priority": 4},
+            {"action": "첫 레이어 Flow 105-110%", "priority": 5},
+            {"action": "베드 IPA로 청소", "priority": 6}
+        ]
+    }
+}
+
+# 결함 별칭 매핑
+DEFECT_ALIASES = {
+    "adhesion": "first_layer",
+    "bed_adhesion": "first_layer",
+    "sticking": "first_layer",
+    "oozing": "stringing",
+    "warp": "warping",
+    "delamination": "layer_adhesion",
+}
+
 
 class KnowledgeBase:
     """3D 프린팅 도메인 지식베이스"""
 
-    def __init__(self, data_path: Optional[Path] = None):
+    def __init__(self, data_path: Optional[Path] = None, store: Optional[ExperimentStore] = None):
         if data_path is None:
             data_path = Path(__file__).parent.parent.parent / "data"
         self.data_path = data_path
-        self._load_data()
-
-    def _load_data(self):
-        """데이터 로드"""
-        # 사용자 실험 데이터
-        experiments_file = self.data_path / "sample_experiments.json"
-        if experiments_file.exists():
-            with open(experiments_file, "r", encoding="utf-8") as f:
-                self.experiments = json.load(f)
-        else:
-            self.experiments = []
-
-        # 재료별 가이드 (내장)
-        self.material_guides = {
-            "PLA": {
-                "name": "PLA (Polylactic Acid)",
-                "nozzle_temp": {"min": 190, "max": 220, "optimal": 205},
-                "bed_temp": {"min": 50, "max": 65, "optimal": 60},
-                "print_speed": {"min": 40, "max": 100, "optimal": 60},
-                "retraction": {"distance": 5, "speed": 45},
-                "fan_speed": 100,
-                "tips": [
-                    "가장 출력이 쉬운 재료",
-                    "냉각이 중요 - 팬 100% 권장",
-                    "고온 시 stringing 발생 가능",
-                    "베드 접착: PEI 시트 또는 유리 + 풀스틱"
-                ]
-            },
-            "ABS": {
-                "name": "ABS (Acrylonitrile Butadiene Styrene)",
-                "nozzle_temp": {"min": 220, "max": 260, "optimal": 240},
-                "bed_temp": {"min": 90, "max": 110, "optimal": 100},
-                "print_speed": {"min": 40, "max": 60, "optimal": 50},
-                "retraction": {"distance": 4, "speed": 40},
-                "fan_speed": 0,
-                "tips": [
-                    "인클로저 필수 권장",
-                    "워핑 방지를 위해 팬 끄기",
-                    "베드 온도 높게 유지",
-                    "Brim 또는 Raft 사용 권장",
-                    "환기 필요 - 유해 가스 발생"
-                ]
-            },
-            "PETG": {
-                "name": "PETG (Polyethylene Terephthalate Glycol)",
-                "nozzle_temp": {"min": 220, "max": 250, "optimal": 230},
-                "bed_temp": {"min": 70, "max": 85, "optimal": 75},
-                "print_speed": {"min": 30, "max": 60, "optimal": 45},
-                "retraction": {"distance": 5, "speed": 35},
-                "fan_speed": 50,
-                "tips": [
-                    "Stringing 발생하기 쉬움 - retraction 중요",
-                    "온도에 민감 - 너무 높으면 stringing 심함",
-                    "베드 접착력이 강함 - 분리 시 주의",
-                    "습기에 민감 - 건조 보관 필수",
-                    "첫 레이어 속도 낮추기 권장"
-                ]
-            },
-            "TPU": {
-                "name": "TPU (Thermoplastic Polyurethane)",
-                "nozzle_temp": {"min": 220, "max": 250, "optimal": 230},
-                "bed_temp": {"min": 50, "max": 70, "optimal": 60},
-                "print_speed": {"min": 15, "max": 30, "optimal": 25},
-                "retraction": {"distance": 2, "speed": 20},
-                "fan_speed": 50,
-                "tips": [
-                    "매우 느린 속도로 출력",
-                    "Direct Drive 익스트루더 권장",
-                    "Retraction 최소화 또는 비활성화",
-                    "Bowden 튜브에서는 출력 어려움"
-                ]
-            }
-        }
-
-        # 결함 해결 가이드 (내장)
-        self.defect_guides = {
-            "stringing": {
-                "name": "Stringing (실뜨기)",
-                "description": "이동 경로에 가는 실 같은 필라멘트 잔여물이 남음",
-                "causes": [
-                    "노즐 온도가 너무 높음",
-                    "Retraction 설정 부족",
-                    "필라멘트 습기",
-                    "Travel 속도가 너무 느림"
-                ],
-                "solutions": [
-                    {"action": "노즐 온도 5-10°C 낮추기", "priority": 1},
-                    {"action": "Retraction distance 1-2mm 증가", "priority": 2},
-                    {"action": "Retraction speed 10-20mm/s 증가", "priority": 3},
-                    {"action": "Travel speed 150mm/s 이상으로 증가", "priority": 4},
-                    {"action": "필라멘트 건조 (50°C, 4-6시간)", "priority": 5}
-                ]
-            },
-            "warping": {
-                "name": "Warping (뒤틀림)",
-                "description": "출력물 모서리가 베드에서 들뜸",
-                "causes": [
-                    "베드 온도 부족",
-                    "냉각이 너무 빠름",
-                    "베드 접착력 부족",
-                    "주변 온도 차이"
-                ],
-                "solutions": [
-                    {"action": "베드 온도 5-10°C 높이기", "priority": 1},
-                    {"action": "Brim (8-10mm) 추가", "priority": 2},
-                    {"action": "인클로저 사용 (ABS)", "priority": 3},
-                    {"action": "첫 레이어 팬 속도 0%", "priority": 4},
-                    {"action": "베드 접착제 사용 (풀스틱, 헤어스프레이)", "priority": 5}
-                ]
-            },
-            "layer_adhesion": {
-                "name": "Layer Adhesion (레이어 접착 불량)",
-                "description": "레이어 간 접착이 약해 쉽게 분리됨",
-                "causes": [
-                    "노즐 온도가 너무 낮음",
-                    "레이어 높이가 너무 높음",
-                    "출력 속도가 너무 빠름",
-                    "과도한 냉각"
-                ],
-                "solutions": [
-                    {"action": "노즐 온도 5-10°C 높이기", "priority": 1},
-                    {"action": "레이어 높이 줄이기 (노즐 직경의 75%)", "priority": 2},
-                    {"action": "출력 속도 10-20% 낮추기", "priority": 3},
-                    {"action": "팬 속도 줄이기", "priority": 4}
-                ]
-            },
-            "under_extrusion": {
-                "name": "Under Extrusion (과소 압출)",
-                "description": "필라멘트가 충분히 압출되지 않아 틈이 생김",
-                "causes": [
-                    "노즐 막힘",
-                    "필라멘트 경로 마찰",
-                    "온도 부족",
-                    "익스트루더 그립 부족"
-                ],
-                "solutions": [
-                    {"action": "노즐 청소 또는 교체", "priority": 1},
-                    {"action": "Flow rate 5-10% 증가", "priority": 2},
-                    {"action": "노즐 온도 5-10°C 높이기", "priority": 3},
-                    {"action": "출력 속도 낮추기", "priority": 4},
-                    {"action": "익스트루더 텐션 조정", "priority": 5}
+        self.material_guides = MATERIAL_GUIDES
+        self.defect_guides = DEFECT_GUIDES
+        self._lock = threading.RLock()
+        if store is None:
+            store = ExperimentStore(
+                data_path / get_setting("storage.experiments.log_file", "experiments.jsonl"),
+                legacy_path=data_path / "sample_experiments.json",
+                fsync=get_setting("storage.experiments.fsync", True),
+                compact_min_superseded=get_setting("storage.experiments.compact_min_superseded", 100),
+                compact_ratio=get_setting("storage.experiments.compact_ratio", 0.5)
+            )
+        self.store = store
+        self._vector_index: Optional[VectorIndex] = None
+        with self._lock:
+            self._build_indexes()
+
+    @property
+    def experiments(self) -> list[dict]:
+        """저장소의 실험 데이터 (GET /experiments와 유사 검색이 같은 데이터 사용)"""
+        return self.store.experiments
+
+    def _build_indexes(self):
+        """역색인 구축 (재료 → 실험 위치, 결함 → 실험 위치)"""
+        self._material_index: dict[str, list[int]] = defaultdict(list)
+        self._defect_index: dict[str, list[int]] = defaultdict(list)
+        self._parameter_index = ParameterIndex(
+            load_parameter_ranges(),
+            kdtree_threshold=get_setting("storage.experiments.kdtree_threshold", 5000)
+        )
+        for position, exp in enumerate(self.experiments):
+            self._index_experiment(position, exp)
+        if self._vector_index is not None:
+            # 텍스트가 바뀐 실험만 다시 임베딩됨
+            self._vector_index.add_many([
+                self._experiment_document(position, exp)
+                for position, exp in enumerate(self.experiments)
+            ])
+
+    def _index_experiment(self, position: int, exp: dict):
+        material = (exp.get("material") or {}).get("type") or ""
+        if material:
+            self._material_index[material.upper()].append(position)
+        defects = (exp.get("result") or {}).get("defects") or []
+        for defect in {d.lower() for d in defects}:
+            self._defect_index[defect].append(position)
+        self._parameter_index.add(position, exp.get("parameters") or {})
+
+    def refresh_if_stale(self) -> bool:
+        """저장소 파일 mtime이 바뀐 경우에만 다시 로드"""
+        if not self.store.reload_if_changed():
+            return False
+        with self._lock:
+            self._build_indexes()
+        return True
+
+    @staticmethod
+    def _experiment_document(position: int, exp: dict) -> tuple[str, str, dict]:
+        """벡터 인덱스용 (문서 ID, 텍스트, 메타데이터)"""
+        experiment_id = exp.get("experiment_id") or f"#{position}"
+        material = exp.get("material") or {}
+        result = exp.get("result") or {}
+        params = ", ".join(f"{k}={v}" for k, v in (exp.get("parameters") or {}).items())
+        text = (
+            f"{material.get('type', '')} {material.get('brand', '')} "
+            f"결함: {' '.join(result.get('defects') or []) or '없음'} "
+            f"{result.get('notes', '')} {params}"
+        )
+        metadata = {"kind": "experiment", "key": experiment_id, "position": position}
+        return f"experiment:{experiment_id}", text, metadata
+
+    def get_vector_index(self) -> VectorIndex:
+        """가이드와 실험 데이터의 벡터 인덱스 (최초 호출 시 구축)"""
+        with self._lock:
+            if self._vector_index is None:
+                index = VectorIndex(
+                    get_embedder(),
+                    ivf_threshold=get_setting("vector_db.local.ivf_threshold", 20_000),
+                    nlist=get_setting("vector_db.local.nlist", 256),
+                    nprobe=get_setting("vector_db.local.nprobe", 8)
+                )
+                docs = [
+                    (f"material_guide:{key}", self.get_material_guide(key),
+                     {"kind": "material_guide", "key": key})
+                    for key in self.material_guides
                 ]
-            },
-            "over_extrusion": {
-                "name": "Over Extrusion (과다 압출)",
-                "description": "필라멘트가 과다하게 압출되어 표면이 울퉁불퉁",
-                "causes": [
-                    "Flow rate가 너무 높음",
-                    "필라멘트 직경 설정 오류",
-                    "E-steps 캘리브레이션 오류"
-                ],
-                "solutions": [
-                    {"action": "Flow rate 5-10% 낮추기", "priority": 1},
-                    {"action": "필라멘트 직경 캘리브레이션", "priority": 2},
-                    {"action": "E-steps 재캘리브레이션", "priority": 3}
+                docs += [
+                    (f"defect_guide:{key}", self.get_defect_solution(key),
+                     {"kind": "defect_guide", "key": key})
+                    for key in self.defect_guides
                 ]
-            },
-            "first_layer": {
-                "name": "First Layer Issues (첫 레이어 문제)",
-                "description": "첫 레이어가 베드에 잘 붙지 않음",
-                "causes": [
-                    "베드 레벨링 불량",
-                    "노즐-베드 거리가 너무 멂",
-                    "베드 온도 부족",
-                    "베드 표면 오염"
-                ],
-                "solutions": [
-                    {"action": "베드 레벨링 재수행", "priority": 1},
-                    {"action": "Z-offset 조정 (노즐 더 가깝게)", "priority": 2},
-                    {"action": "베드 온도 5-10°C 높이기", "priority": 3},
-                    {"action": "첫 레이어 속도 50% 낮추기", "priority": 4},
-                    {"action": "첫 레이어 Flow 105-110%", "priority": 5},
-                    {"action": "베드 IPA로 청소", "priority": 6}
+                docs += [
+                    self._experiment_document(position, exp)
+                    for position, exp in enumerate(self.experiments)
                 ]
-            }
-        }
+                index.add_many(docs)
+                self._vector_index = index
+            return self._vector_index
+
+    def semantic_search(
+        self,
+        query: str,
+        k: int = 5,
+        kind: Optional[str] = None,
+        min_score: float = 0.0
+    ) -> list[dict]:
+        """
+        의미 유사도 검색
+
+        Returns:
+            {"id", "kind", "key", "score", "content"} 리스트
+        """
+        hits = self.get_vector_index().search(query, k=k, kind=kind, min_score=min_score)
+        results = []
+        for score, doc_id, metadata in hits:
+            kind_, key = metadata["kind"], metadata["key"]
+            if kind_ == "material_guide":
+                content = self.get_material_guide(key)
+            elif kind_ == "defect_guide":
+                content = self.get_defect_solution(key)
+            else:
+                position = metadata["position"]
+                content = self.experiments[position] if position < len(self.experiments) else None
+            if content is None:
+                continue
+            results.append({
+                "id": doc_id,
+                "kind": kind_,
+                "key": key,
+                "score": score,
+                "content": content
+            })
+        return results
+
+    def resolve_defect_key(self, defect: str) -> str:
+        """결함 이름을 가이드 키로 정규화 (별칭 포함)"""
+        defect = defect.lower().replace(" ", "_")
+        return DEFECT_ALIASES.get(defect, defect)
 
     def get_material_guide(self, material: str) -> Optional[str]:
         """재료별 가이드 반환"""
@@ -219,18 +362,7 @@ class KnowledgeBase:
 
     def get_defect_solution(self, defect: str) -> Optional[str]:
         """결함 해결 가이드 반환"""
-        defect = defect.lower().replace(" ", "_")
-
-        # 별칭 매핑
-        aliases = {
-            "adhesion": "first_layer",
-            "bed_adhesion": "first_layer",
-            "sticking": "first_layer",
-            "oozing": "stringing",
-            "warp": "warping",
-            "delamination": "layer_adhesion",
-        }
-        defect = aliases.get(defect, defect)
+        defect = self.resolve_defect_key(defect)
 
         guide = self.defect_guides.get(defect)
 
@@ -255,36 +387,85 @@ class KnowledgeBase:
         defect: Optional[str] = None,
         limit: int = 3
     ) -> list[dict]:
-        """유사 실험 데이터 검색"""
-        results = []
+        """유사 실험 데이터 검색 (역색인 조회)"""
+        scores: dict[int, int] = defaultdict(int)
 
-        for exp in self.experiments:
-            score = 0
+        # 재료 매칭
+        if material:
+            for position in self._material_index.get(material.upper(), []):
+                scores[position] += 2
 
-            # 재료 매칭
-            if material:
-                if exp.get("material", {}).get("type", "").upper() == material.upper():
-                    score += 2
+        # 결함 매칭
+        if defect:
+            for position in self._defect_index.get(defect.lower(), []):
+                scores[position] += 3
 
-            # 결함 매칭
-            if defect:
-                exp_defects = exp.get("result", {}).get("defects", [])
-                if defect.lower() in [d.lower() for d in exp_defects]:
-                    score += 3
+        # 점수순 정렬 (동점이면 저장 순서 유지)
+        ranked = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
 
-            if score > 0:
-                results.append((score, exp))
+        return [self.experiments[position] for position, _ in ranked[:limit]]
 
-        # 점수순 정렬
-        results.sort(key=lambda x: x[0], reverse=True)
+    def search_by_parameters(
+        self,
+        params: dict,
+        material: Optional[str] = None,
+        limit: int = 3
+    ) -> list[tuple[float, dict]]:
+        """
+        정규화된 파라미터 공간에서 가장 가까운 실험 검색
+
+        Args:
+            params: 현재 파라미터 (예: {"nozzle_temp": 240, "print_speed": 50})
+            material: 지정 시 같은 재료의 실험만 검색
+            limit: 최대 결과 수
+
+        Returns:
+            (유사도 0-1, 실험 데이터) 리스트
+        """
+        candidates = None
+        if material:
+            candidates = self._material_index.get(material.upper(), [])
+            if not candidates:
+                return []
 
-        return [exp for _, exp in results[:limit]]
+        dims = sum(1 for name in params if name in self._parameter_index.names)
+        if not dims:
+            return []
+        max_distance = dims ** 0.5
+
+        return [
+            (1.0 - distance / max_distance, self.experiments[position])
+            for distance, position in self._parameter_index.search(
+                params,
+                k=limit,
+                candidates=candidates,
+                group=material.upper() if material else None
+            )
+        ]
 
     def add_experiment(self, experiment: dict):
-        """새 실험 데이터 추가"""
-        self.experiments.append(experiment)
+        """새 실험 데이터 추가 (저장소 로그에 한 줄 추가)"""
+        position, replaced = self.store.append(experiment)
+        with self._lock:
+            if replaced:
+                self._build_indexes()
+            else:
+                self._index_experiment(position, experiment)
+                if self._vector_index is not None:
+                    self._vector_index.add_many([self._experiment_document(position, experiment)])
+
+
+# 프로세스 공유 지식베이스
+_shared_kb: Optional[KnowledgeBase] = None
+_shared_kb_lock = threading.Lock()
+
 
-        # 파일에 저장
-        experiments_file = self.data_path / "sample_experiments.json"
-        with open(experiments_file, "w", encoding="utf-8") as f:
-            json.dump(self.experiments, f, ensure_ascii=False, indent=2)
+def get_knowledge_base() -> KnowledgeBase:
+    """공유 KnowledgeBase 반환 (최초 호출 시 생성, 파일 변경 시에만 재로드)"""
+    global _shared_kb
+    if _shared_kb is None:
+        with _shared_kb_lock:
+            if _shared_kb is None:
+                _shared_kb = KnowledgeBase()
+    _shared_kb.refresh_if_stale()
+    return _shared_kb
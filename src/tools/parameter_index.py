@@ -0,0 +1,160 @@
+"""
+실험 파라미터 최근접 이웃 검색
+- settings.yaml → domain.parameters 범위로 [0, 1] 정규화
+- 전체 실험을 NumPy 행렬로 보관하여 벡터화된 거리 계산
+- 실험 수가 많아지면 KD-tree 사용 (scipy 설치 시, 재료 등 그룹별 트리 포함)
+"""
+import re
+import threading
+import warnings
+from typing import Any, Optional
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # scipy는 선택 의존성
+    cKDTree = None
+
+from src.config import get_setting
+
+_number_pattern = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_param_value(value: Any) -> Optional[float]:
+    """파라미터 값을 숫자로 변환 ("240°C", "0.2mm" 등 허용)"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _number_pattern.search(value)
+        if match:
+            return float(match.group())
+    return None
+
+
+def load_parameter_ranges() -> dict[str, tuple[float, float]]:
+    """settings.yaml의 domain.parameters 범위"""
+    ranges = {}
+    for name, spec in (get_setting("domain.parameters", {}) or {}).items():
+        low, high = spec.get("range", [0, 1])
+        ranges[name] = (float(low), float(high))
+    return ranges
+
+
+class ParameterIndex:
+    """정규화된 파라미터 공간의 최근접 이웃 인덱스"""
+
+    def __init__(
+        self,
+        ranges: dict[str, tuple[float, float]],
+        kdtree_threshold: int = 5000
+    ):
+        self.names = list(ranges)
+        self._columns = {name: i for i, name in enumerate(self.names)}
+        self._low = np.array([ranges[n][0] for n in self.names], dtype=np.float64)
+        self._span = np.array([ranges[n][1] - ranges[n][0] for n in self.names], dtype=np.float64)
+        self._span[self._span == 0] = 1.0
+        self.kdtree_threshold = kdtree_threshold
+
+        self._lock = threading.RLock()
+        self._matrix = np.full((64, len(self.names)), np.nan)
+        self._size = 0
+        # 결측값을 열 중앙값으로 채운 행렬과 (그룹, 차원 조합)별 KD-tree (추가 시 무효화)
+        # 트리 값: (트리, 트리 행 → 실험 위치, 그룹 전체면 None)
+        self._imputed: Optional[np.ndarray] = None
+        self._trees: dict[tuple[Optional[str], tuple[int, ...]], tuple[Any, Optional[np.ndarray]]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def normalize(self, params: dict) -> np.ndarray:
+        """파라미터 dict → 정규화 벡터 (없는 값은 NaN)"""
+        vector = np.full(len(self.names), np.nan)
+        for name, value in (params or {}).items():
+            column = self._columns.get(name)
+            number = parse_param_value(value)
+            if column is not None and number is not None:
+                vector[column] = number
+        return np.clip((vector - self._low) / self._span, 0.0, 1.0)
+
+    def add(self, position: int, params: dict):
+        """position 행에 실험 파라미터 기록 (기존 행이면 덮어씀)"""
+        with self._lock:
+            while position >= len(self._matrix):
+                grown = np.full((len(self._matrix) * 2, len(self.names)), np.nan)
+                grown[:len(self._matrix)] = self._matrix
+                self._matrix = grown
+            self._matrix[position] = self.normalize(params)
+            self._size = max(self._size, position + 1)
+            self._imputed = None
+            self._trees.clear()
+
+    def _imputed_matrix(self) -> np.ndarray:
+        if self._imputed is None:
+            data = self._matrix[:self._size]
+            with warnings.catch_warnings():
+                # 전부 결측인 열은 아래에서 0.5로 대체
+                warnings.simplefilter("ignore", RuntimeWarning)
+                medians = np.nanmedian(data, axis=0) if self._size else np.zeros(len(self.names))
+            medians = np.where(np.isnan(medians), 0.5, medians)
+            self._imputed = np.where(np.isnan(data), medians, data)
+        return self._imputed
+
+    def search(
+        self,
+        params: dict,
+        k: int = 3,
+        candidates: Optional[list[int]] = None,
+        group: Optional[str] = None
+    ) -> list[tuple[float, int]]:
+        """
+        쿼리 파라미터와 가장 가까운 실험 검색
+
+        Args:
+            params: 현재 파라미터 (지정된 차원만 거리 계산에 사용)
+            k: 반환 개수
+            candidates: 검색 대상 행 제한 (예: 같은 재료)
+            group: candidates를 가리키는 이름 (예: 재료). 지정하면 이 행 집합의
+                KD-tree를 만들어 재사용 (다음 add까지 같은 group은 같은 candidates여야 함)
+
+        Returns:
+            (정규화 거리, 행 위치) 리스트, 거리 오름차순
+        """
+        query = self.normalize(params)
+        dims = tuple(int(i) for i in np.flatnonzero(~np.isnan(query)))
+        if not dims:
+            return []
+
+        with self._lock:
+            if self._size == 0:
+                return []
+            matrix = self._imputed_matrix()
+            q = query[list(dims)]
+
+            rows = np.arange(self._size) if candidates is None else np.asarray(candidates, dtype=np.int64)
+            if len(rows) == 0:
+                return []
+
+            # 전체 검색 또는 이름 있는 그룹(재료 등)은 KD-tree, 임의의 후보 집합은 전수 계산
+            use_tree = candidates is None or group is not None
+            if use_tree and cKDTree is not None and len(rows) >= self.kdtree_threshold:
+                key = (None if candidates is None else group, dims)
+                entry = self._trees.get(key)
+                if entry is None:
+                    tree_rows = None if candidates is None else rows
+                    entry = self._trees[key] = (cKDTree(matrix[np.ix_(rows, dims)]), tree_rows)
+                tree, tree_rows = entry
+                distances, found = tree.query(q, k=min(k, len(rows)))
+                distances, found = np.atleast_1d(distances), np.atleast_1d(found)
+                if tree_rows is not None:
+                    found = tree_rows[found]
+                return [(float(d), int(r)) for d, r in zip(distances, found)]
+
+            diffs = matrix[np.ix_(rows, dims)] - q
+            distances = np.sqrt(np.einsum("ij,ij->i", diffs, diffs))
+            top = min(k, len(rows))
+            best = np.argpartition(distances, top - 1)[:top]
+            best = best[np.argsort(distances[best], kind="stable")]
+            return [(float(distances[i]), int(rows[i])) for i in best]
@@ -0,0 +1,242 @@
+"""
+외부 API 호출 제한 (Gemini, Tavily 공용)
+- 공급자별/모델별 토큰 버킷 (초당 요청 수 + 버스트)
+- 공급자별 최대 동시 호출 수
+- 우선순위 레인: interactive 요청이 batch 요청보다 먼저 슬롯을 받음
+- 공급자가 429를 반환하면 잠시 새 호출을 멈춤 (backoff)
+- 429/5xx는 지터를 넣은 지수 백오프로 재시도
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+from src.config import get_setting
+
+LANES = {"interactive": 0, "batch": 1}
+
+# 현재 실행 흐름의 우선순위 레인 (배치/작업 큐에서 batch로 설정)
+_current_lane: ContextVar[str] = ContextVar("rate_limit_lane", default="interactive")
+
+
+@contextmanager
+def priority_lane(lane: str):
+    """이 블록에서 시작하는 외부 호출의 우선순위 레인 지정"""
+    if lane not in LANES:
+        raise ValueError(f"알 수 없는 레인: {lane}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def is_retryable(error: Exception) -> bool:
+    """429/5xx/타임아웃 등 다시 시도할 만한 오류인지 판단"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    message = str(error)
+    return any(marker in message for marker in (
+        "RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "Too Many Requests", "rate limit"
+    ))
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # 대기자는 락 순서대로 토큰을 받음 (우선순위는 슬롯 단계에서 결정)
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class PrioritySemaphore:
+    """낮은 우선순위 값부터 슬롯을 주는 세마포어 (같은 우선순위는 도착 순)"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+    async def acquire(self, priority: int):
+        if self.in_use < self.limit and not self.waiting:
+            self.in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 슬롯을 받은 직후 취소되면 다음 대기자에게 넘김
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # 슬롯을 그대로 넘기므로 in_use는 유지
+                future.set_result(None)
+                return
+        self.in_use -= 1
+
+
+class RateLimiter:
+    """공급자 하나의 동시성 + 토큰 버킷 (선택적으로 키(모델)별 버킷)"""
+
+    def __init__(
+        self,
+        name: str,
+        max_inflight: int = 8,
+        rate: float = 5,
+        burst: float = 10,
+        per_key_rate: Optional[float] = None,
+        per_key_burst: Optional[float] = None,
+        key_overrides: Optional[dict] = None,
+        rate_limited_backoff: float = 1.0
+    ):
+        self.name = name
+        self.rate_limited_backoff = rate_limited_backoff
+        self._paused_until = 0.0
+        self._slots = PrioritySemaphore(max_inflight)
+        self._bucket = TokenBucket(rate, burst)
+        self._per_key_rate = per_key_rate
+        self._per_key_burst = per_key_burst or per_key_rate
+        self._key_overrides = key_overrides or {}
+        self._key_buckets: dict[str, TokenBucket] = {}
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.backoffs = 0
+
+    def backoff(self, seconds: Optional[float] = None):
+        """공급자 전체 429: 지금부터 seconds 동안 새 슬롯을 내주지 않음"""
+        seconds = self.rate_limited_backoff if seconds is None else seconds
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.backoffs += 1
+
+    def _key_bucket(self, key: Optional[str]) -> Optional[TokenBucket]:
+        if key is None:
+            return None
+        if key not in self._key_buckets:
+            override = self._key_overrides.get(key) or {}
+            rate = override.get("requests_per_second", self._per_key_rate)
+            if rate is None:
+                return None
+            burst = override.get("burst", self._per_key_burst or rate)
+            self._key_buckets[key] = TokenBucket(rate, burst)
+        return self._key_buckets[key]
+
+    @asynccontextmanager
+    async def slot(self, key: Optional[str] = None):
+        """동시성 슬롯과 토큰을 확보한 뒤 블록 실행"""
+        started = time.monotonic()
+        # backoff 중에는 대기 (대기 중 backoff가 연장되면 다시 대기)
+        while (paused := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(paused)
+        await self._slots.acquire(LANES[_current_lane.get()])
+        try:
+            await self._bucket.acquire()
+            key_bucket = self._key_bucket(key)
+            if key_bucket is not None:
+                await key_bucket.acquire()
+            self.calls += 1
+            if time.monotonic() - started > 0.01:
+                self.throttled += 1
+            yield
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "backoffs": self.backoffs,
+            "in_flight": self._slots.in_use,
+            "waiting": self._slots.waiting,
+        }
+
+
+async def call_with_retry(
+    factory: Callable[[], Awaitable],
+    limiter: Optional[RateLimiter] = None,
+    retryable: Callable[[Exception], bool] = is_retryable
+):
+    """
+    재시도 가능한 오류면 지터를 넣은 지수 백오프 후 다시 호출
+
+    설정: rate_limit.retry.{max_attempts, base_delay, max_delay}
+    """
+    max_attempts = get_setting("rate_limit.retry.max_attempts", 3)
+    base_delay = get_setting("rate_limit.retry.base_delay", 0.5)
+    max_delay = get_setting("rate_limit.retry.max_delay", 8)
+
+    for attempt in range(max_attempts):
+        try:
+            return await factory()
+        except Exception as e:
+            if attempt + 1 >= max_attempts or not retryable(e):
+                raise
+            if limiter is not None:
+                limiter.retries += 1
+            # 지터: base * 2^attempt 의 절반 ~ 전체 구간에서 무작위
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """설정 기반 공급자별 제한기 싱글톤 (rate_limit.<provider>.*)"""
+    if provider not in _limiters:
+        prefix = f"rate_limit.{provider}"
+        _limiters[provider] = RateLimiter(
+            provider,
+            max_inflight=get_setting(f"{prefix}.max_inflight", 8),
+            rate=get_setting(f"{prefix}.requests_per_second", 5),
+            burst=get_setting(f"{prefix}.burst", 10),
+            per_key_rate=get_setting(f"{prefix}.per_model.requests_per_second"),
+            per_key_burst=get_setting(f"{prefix}.per_model.burst"),
+            key_overrides=get_setting(f"{prefix}.models", {}) or {},
+            rate_limited_backoff=get_setting(f"{prefix}.rate_limited_backoff", 1.0)
+        )
+    return _limiters[provider]
+
+
+def get_rate_limit_stats() -> dict:
+    """공급자별 호출/대기/재시도 통계"""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -1,13 +1,37 @@
 """
 Tavily 웹 검색 도구
 """
+import hashlib
+import json
+import logging
 import os
 from typing import Optional
 from tavily import AsyncTavilyClient
 
+from src.config import get_setting, resolve_path
+from src.memory.cache import TTLCache, SQLiteCache, TieredCache
+from src.memory.llm_cache import SingleFlight, current_coalescing_scope
+from src.metrics import track_call
+from .rate_limiter import call_with_retry, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
 # Tavily 클라이언트 초기화
 _client: Optional[AsyncTavilyClient] = None
 
+# 검색 결과 캐시 (메모리 LRU + SQLite)
+_search_cache: Optional[TieredCache] = None
+
+# 동시에 들어온 같은 검색 요청 병합 (캐시 사용 시)
+_search_flight = SingleFlight()
+
+# 소스별 기본 TTL (초)
+DEFAULT_CACHE_TTL = {
+    "web": 24 * 3600,
+    "paper": 7 * 24 * 3600,
+    "community": 6 * 3600,
+}
+
 
 def get_tavily_client() -> AsyncTavilyClient:
     """Tavily 클라이언트 싱글톤"""
@@ -20,9 +44,128 @@ def get_tavily_client() -> AsyncTavilyClient:
     return _client
 
 
+def get_search_cache() -> TieredCache:
+    """검색 결과 캐시 싱글톤"""
+    global _search_cache
+    if _search_cache is None:
+        memory = TTLCache(max_size=get_setting("cache.search.memory_max_entries", 2048))
+        disk = None
+        disk_path = get_setting("cache.search.disk_path", "data/cache/search_cache.sqlite3")
+        if disk_path:
+            disk = SQLiteCache(
+                resolve_path(disk_path),
+                max_entries=get_setting("cache.search.disk_max_entries", 100_000)
+            )
+        _search_cache = TieredCache(memory, disk)
+    return _search_cache
+
+
+def get_search_cache_stats() -> dict:
+    """검색 캐시 적중/미스 통계"""
+    if _search_cache is None:
+        return {}
+    return {**_search_cache.stats.to_dict(), "coalesced": _search_flight.coalesced}
+
+
+def _search_cache_key(
+    source: str,
+    query: str,
+    search_depth: str,
+    max_results: int,
+    include_domains: Optional[list[str]]
+) -> str:
+    """정규화된 쿼리 + 도메인 + depth + max_results 기반 캐시 키"""
+    payload = json.dumps({
+        "query": " ".join(query.lower().split()),
+        "domains": sorted(d.lower() for d in include_domains or []),
+        "depth": search_depth,
+        "max_results": max_results,
+    }, sort_keys=True, ensure_ascii=False)
+    return f"tavily:{source}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+async def _cached_search(
+    client: AsyncTavilyClient,
+    source: str,
+    query: str,
+    search_depth: str,
+    max_results: int,
+    include_domains: Optional[list[str]] = None,
+    use_cache: bool = True
+) -> dict:
+    """캐시를 거쳐 Tavily 검색 수행 (빈 결과는 캐시하지 않음)"""
+    use_cache = use_cache and get_setting("cache.search.enabled", True)
+    cache = get_search_cache() if use_cache else None
+    key = _search_cache_key(source, query, search_depth, max_results, include_domains)
+
+    request = {
+        "query": query,
+        "search_depth": search_depth,
+        "max_results": max_results,
+        "include_domains": include_domains,
+    }
+    with track_call("tavily", source, len(query), request=request) as call:
+        if cache is not None:
+            cached = await cache.aget(key)
+            if cached is not None:
+                call.cache_hit = True
+                call.response_chars = _results_chars(cached)
+                call.response = cached
+                return cached
+
+        async def fetch() -> dict:
+            search_kwargs = {
+                "query": query,
+                "search_depth": search_depth,
+                "max_results": max_results,
+            }
+            if include_domains:
+                search_kwargs["include_domains"] = include_domains
+
+            limiter = get_rate_limiter("tavily")
+
+            async def search_once() -> dict:
+                # 재시도 대기 중에는 슬롯을 잡지 않도록 시도마다 슬롯 확보
+                async with limiter.slot():
+                    return await client.search(**search_kwargs)
+
+            response = await call_with_retry(search_once, limiter=limiter)
+
+            if cache is not None and response.get("results"):
+                ttl = get_setting(f"cache.search.ttl_seconds.{source}", DEFAULT_CACHE_TTL[source])
+                await cache.aset(key, {"results": response["results"]}, ttl=ttl)
+            return response
+
+        async def load() -> tuple[dict, bool]:
+            if cache is None:
+                return await fetch(), False
+            return await _search_flight.run_shared(key, fetch)
+
+        # 배치 실행 중이면 캐시 설정과 무관하게 배치 안의 같은 검색은 한 번만 호출
+        scope = current_coalescing_scope()
+        try:
+            if scope is None:
+                response, call.coalesced = await load()
+            else:
+                (response, coalesced), shared = await scope.run(key, load)
+                call.coalesced = coalesced or shared
+        except Exception as e:
+            # 결과를 비우지 않고 그대로 올림 (호출한 노드가 오류로 기록)
+            logger.warning("Tavily %s search error: %s", source, e)
+            raise
+        call.response_chars = _results_chars(response)
+        call.response = response
+        return response
+
+
+def _results_chars(response: dict) -> int:
+    return sum(len(r.get("content") or "") for r in response.get("results", []))
+
+
 async def search_3d_printing_web(
     query: str,
-    max_results: int = 5
+    max_results: int = 5,
+    use_cache: bool = True
 ) -> list[dict]:
     """
     3D 프린팅 관련 웹 검색
@@ -30,50 +173,54 @@ async def search_3d_printing_web(
     Args:
         query: 검색 쿼리
         max_results: 최대 결과 수
+        use_cache: False면 캐시를 우회하고 항상 Tavily 호출
 
     Returns:
         검색 결과 리스트
+
+    Raises:
+        Tavily 호출 실패 시 예외를 그대로 올림 (호출한 노드가 쿼리별 오류로 기록)
     """
     client = get_tavily_client()
 
     # 도메인 특화 쿼리 강화
     enhanced_query = f"3D printing FDM {query}"
 
-    try:
-        response = await client.search(
-            query=enhanced_query,
-            search_depth="advanced",
-            max_results=max_results,
-            include_domains=[
-                "prusa3d.com",
-                "help.prusa3d.com",
-                "reddit.com/r/3Dprinting",
-                "reddit.com/r/FixMyPrint",
-                "all3dp.com",
-                "simplify3d.com",
-                "community.ultimaker.com",
-                "matterhackers.com"
-            ]
-        )
-
-        results = []
-        for r in response.get("results", []):
-            results.append({
-                "title": r.get("title", ""),
-                "url": r.get("url", ""),
-                "content": r.get("content", ""),
-                "score": r.get("score", 0.5)
-            })
-
-        return results
-    except Exception as e:
-        print(f"Tavily search error: {e}")
-        return []
+    response = await _cached_search(
+        client,
+        "web",
+        query=enhanced_query,
+        search_depth="advanced",
+        max_results=max_results,
+        include_domains=[
+            "prusa3d.com",
+            "help.prusa3d.com",
+            "reddit.com/r/3Dprinting",
+            "reddit.com/r/FixMyPrint",
+            "all3dp.com",
+            "simplify3d.com",
+            "community.ultimaker.com",
+            "matterhackers.com"
+        ],
+        use_cache=use_cache
+    )
+
+    results = []
+    for r in response.get("results", []):
+        results.append({
+            "title": r.get("title", ""),
+            "url": r.get("url", ""),
+            "content": r.get("content", ""),
+            "score": r.get("score", 0.5)
+        })
+
+    return results
 
 
 async def search_3d_printing_papers(
     query: str,
-    max_results: int = 3
+    max_results: int = 3,
+    use_cache: bool = True
 ) -> list[dict]:
     """
     3D 프린팅 관련 학술 논문 검색
@@ -81,49 +228,53 @@ async def search_3d_printing_papers(
     Args:
         query: 검색 쿼리
         max_results: 최대 결과 수
+        use_cache: False면 캐시를 우회하고 항상 Tavily 호출
 
     Returns:
         논문 검색 결과
+
+    Raises:
+        Tavily 호출 실패 시 예외를 그대로 올림
     """
     client = get_tavily_client()
 
     # 학술 사이트 대상 쿼리
     enhanced_query = f"FDM 3D printing {query} research paper"
 
-    try:
-        response = await client.search(
-            query=enhanced_query,
-            search_depth="advanced",
-            max_results=max_results,
-            include_domains=[
-                "arxiv.org",
-                "ieee.org",
-                "sciencedirect.com",
-                "springer.com",
-                "mdpi.com",
-                "researchgate.net"
-            ]
-        )
-
-        results = []
-        for r in response.get("results", []):
-            results.append({
-                "title": r.get("title", ""),
-                "url": r.get("url", ""),
-                "content": r.get("content", ""),
-                "score": r.get("score", 0.5),
-                "type": "academic"
-            })
-
-        return results
-    except Exception as e:
-        print(f"Tavily paper search error: {e}")
-        return []
+    response = await _cached_search(
+        client,
+        "paper",
+        query=enhanced_query,
+        search_depth="advanced",
+        max_results=max_results,
+        include_domains=[
+            "arxiv.org",
+            "ieee.org",
+            "sciencedirect.com",
+            "springer.com",
+            "mdpi.com",
+            "researchgate.net"
+        ],
+        use_cache=use_cache
+    )
+
+    results = []
+    for r in response.get("results", []):
+        results.append({
+            "title": r.get("title", ""),
+            "url": r.get("url", ""),
+            "content": r.get("content", ""),
+            "score": r.get("score", 0.5),
+            "type": "academic"
+        })
+
+    return results
 
 
 async def search_reddit_community(
     query: str,
-    max_results: int = 5
+    max_results: int = 5,
+    use_cache: bool = True
 ) -> list[dict]:
     """
     Reddit 3D 프린팅 커뮤니티 검색
@@ -131,32 +282,35 @@ async def search_reddit_community(
     Args:
         query: 검색 쿼리
         max_results: 최대 결과 수
+        use_cache: False면 캐시를 우회하고 항상 Tavily 호출
 
     Returns:
         Reddit 검색 결과
+
+    Raises:
+        Tavily 호출 실패 시 예외를 그대로 올림
     """
     client = get_tavily_client()
 
     enhanced_query = f"site:reddit.com/r/3Dprinting OR site:reddit.com/r/FixMyPrint {query}"
 
-    try:
-        response = await client.search(
-            query=enhanced_query,
-            search_depth="basic",
-            max_results=max_results
-        )
-
-        results = []
-        for r in response.get("results", []):
-            results.append({
-                "title": r.get("title", ""),
-                "url": r.get("url", ""),
-                "content": r.get("content", ""),
-                "score": r.get("score", 0.5),
-                "type": "community"
-            })
-
-        return results
-    except Exception as e:
-        print(f"Reddit search error: {e}")
-        return []
+    response = await _cached_search(
+        client,
+        "community",
+        query=enhanced_query,
+        search_depth="basic",
+        max_results=max_results,
+        use_cache=use_cache
+    )
+
+    results = []
+    for r in response.get("results", []):
+        results.append({
+            "title": r.get("title", ""),
+            "url": r.get("url", ""),
+            "content": r.get("content", ""),
+            "score": r.get("score", 0.5),
+            "type": "community"
+        })
+
+    return results
@@ -0,0 +1,252 @@
+"""
+로컬 벡터 인덱스 (NumPy, 외부 서비스 불필요)
+- Embedder: 교체 가능한 임베딩 인터페이스
+- HashingEmbedder: 의존성 없는 기본 임베더 (문자 n-gram 해싱)
+- SentenceTransformerEmbedder: settings.yaml의 embedding_model 사용 (선택 설치)
+- VectorIndex: brute-force 내적 검색, 규모가 커지면 IVF로 전환
+"""
+import hashlib
+import re
+import threading
+import zlib
+from typing import Any, Optional
+
+import numpy as np
+
+from src.config import get_setting
+
+
+class Embedder:
+    """임베더 인터페이스 (L2 정규화된 float32 행렬 반환)"""
+
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """단어 + 문자 3-gram 특징 해싱 임베더 (한국어/영어 혼용 텍스트 대응)"""
+
+    _token_pattern = re.compile(r"[0-9a-zA-Z_]+|[가-힣]+")
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _features(self, text: str) -> list[str]:
+        tokens = self._token_pattern.findall(text.lower())
+        features = list(tokens)
+        for token in tokens:
+            padded = f"#{token}#"
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                vectors[row, h % self.dim] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """sentence-transformers 기반 임베더 (예: BAAI/bge-m3)"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+_embedder: Optional[Embedder] = None
+
+
+def get_embedder() -> Embedder:
+    """설정(vector_db.embedder)에 따른 임베더 싱글톤"""
+    global _embedder
+    if _embedder is None:
+        kind = get_setting("vector_db.embedder", "hashing")
+        if kind == "sentence_transformers":
+            _embedder = SentenceTransformerEmbedder(
+                get_setting("vector_db.embedding_model", "BAAI/bge-m3")
+            )
+        else:
+            _embedder = HashingEmbedder(get_setting("vector_db.embedding_dim", 1024))
+    return _embedder
+
+
+class VectorIndex:
+    """
+    인메모리 벡터 인덱스
+
+    문서 수가 ivf_threshold 미만이면 전체 내적(brute-force),
+    이상이면 k-means 중심점 기반 IVF로 nprobe개 클러스터만 검색.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        ivf_threshold: int = 20_000,
+        nlist: int = 256,
+        nprobe: int = 8
+    ):
+        self.embedder = embedder
+        self.ivf_threshold = ivf_threshold
+        self.nlist = nlist
+        self.nprobe = nprobe
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((64, embedder.dim), dtype=np.float32)
+        self._size = 0
+        self._ids: list[str] = []
+        self._metadata: list[dict] = []
+        self._rows: dict[str, int] = {}
+        self._text_hashes: list[str] = []
+
+        # IVF 상태
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: list[list[int]] = []
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, doc_id: str, text: str, metadata: Optional[dict] = None):
+        self.add_many([(doc_id, text, metadata or {})])
+
+    def add_many(self, docs: list[tuple[str, str, dict]]):
+        """
+        문서 추가 또는 갱신 (텍스트가 바뀌지 않은 문서는 다시 임베딩하지 않음)
+        """
+        with self._lock:
+            pending = []
+            for doc_id, text, metadata in docs:
+                text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                row = self._rows.get(doc_id)
+                if row is not None and self._text_hashes[row] == text_hash:
+                    self._metadata[row] = metadata
+                    continue
+                pending.append((doc_id, text, metadata, text_hash))
+
+            if not pending:
+                return
+
+            vectors = self.embedder.embed([text for _, text, _, _ in pending])
+            for (doc_id, _, metadata, text_hash), vector in zip(pending, vectors):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row = self._append_row(doc_id, metadata, text_hash)
+                else:
+                    self._metadata[row] = metadata
+                    self._text_hashes[row] = text_hash
+                    self._unassign(row)
+                self._vectors[row] = vector
+                self._assign(row)
+
+            if self._size >= self.ivf_threshold and self._size >= 2 * self._trained_size:
+                self._train_ivf()
+
+    def _append_row(self, doc_id: str, metadata: dict, text_hash: str) -> int:
+        if self._size == len(self._vectors):
+            grown = np.zeros((len(self._vectors) * 2, self.embedder.dim), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        row = self._size
+        self._size += 1
+        self._ids.append(doc_id)
+        self._metadata.append(metadata)
+        self._text_hashes.append(text_hash)
+        self._rows[doc_id] = row
+        return row
+
+    def _assign(self, row: int):
+        """학습된 IVF가 있으면 가장 가까운 클러스터에 행 배정"""
+        if self._centroids is None:
+            return
+        cluster = int(np.argmax(self._centroids @ self._vectors[row]))
+        self._lists[cluster].append(row)
+
+    def _unassign(self, row: int):
+        if self._centroids is None:
+            return
+        for members in self._lists:
+            if row in members:
+                members.remove(row)
+                return
+
+    def _train_ivf(self, iterations: int = 10):
+        """구형 k-means로 중심점 학습 후 전체 행 재배정"""
+        data = self._vectors[:self._size]
+        nlist = min(self.nlist, self._size)
+        rng = np.random.default_rng(0)
+        centroids = data[rng.choice(self._size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(data @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = data[assignments == c]
+                if len(members):
+                    center = members.sum(axis=0)
+                    norm = np.linalg.norm(center)
+                    if norm > 0:
+                        centroids[c] = center / norm
+        assignments = np.argmax(data @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assignments == c).tolist() for c in range(nlist)]
+        self._trained_size = self._size
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        kind: Optional[str] = None,
+        min_score: float = 0.0
+    ) -> list[tuple[float, str, dict[str, Any]]]:
+        """
+        코사인 유사도 상위 k개 검색
+
+        Returns:
+            (점수, 문서 ID, 메타데이터) 리스트
+        """
+        with self._lock:
+            if self._size == 0:
+                return []
+            query_vector = self.embedder.embed([query])[0]
+
+            if self._centroids is not None:
+                nprobe = min(self.nprobe, len(self._centroids))
+                probes = np.argsort(-(self._centroids @ query_vector))[:nprobe]
+                candidates = np.array(
+                    sorted(row for c in probes for row in self._lists[c]),
+                    dtype=np.int64
+                )
+            else:
+                candidates = np.arange(self._size)
+
+            if kind is not None and len(candidates):
+                mask = np.fromiter(
+                    (self._metadata[row].get("kind") == kind for row in candidates),
+                    dtype=bool,
+                    count=len(candidates)
+                )
+                candidates = candidates[mask]
+            if len(candidates) == 0:
+                return []
+
+            scores = self._vectors[candidates] @ query_vector
+            top = min(k, len(candidates))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best], kind="stable")]
+
+            return [
+                (float(scores[i]), self._ids[candidates[i]], self._metadata[candidates[i]])
+                for i in best
+                if scores[i] >= min_score
+            ]
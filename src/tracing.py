@@ -0,0 +1,453 @@
+"""
+연구 실행 추적 기록/재현
+- 샘플링된 실행의 초기 상태, 노드별 상태 변경, 외부 호출 요청/응답을 gzip JSONL로 저장
+- 추적 파일로 그래프 재실행: 외부 호출은 기록된 응답으로 대체하여 느리거나 잘못된
+  요청을 API 키 없이 재현/프로파일링
+
+파일 형식 (한 줄에 JSON 하나):
+    {"type": "header", ...}  실행 정보, 초기 상태, 그래프 동작에 영향을 주는 설정
+    {"type": "node", ...}    노드 이름, 상태 변경(반환값), 시간
+    {"type": "call", ...}    공급자(gemini, tavily, kb), 요청, 응답 또는 오류, 캐시 적중, 시간
+    {"type": "footer", ...}  최종 응답, 전체 시간, 오류, 용량 초과 여부
+"""
+import asyncio
+import dataclasses
+import gzip
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Optional
+
+import yaml
+from pydantic import BaseModel
+
+from src.config import get_setting, load_settings, resolve_path
+
+logger = logging.getLogger(__name__)
+
+TRACE_VERSION = 1
+
+# 추적에 남기는 설정 섹션 (그래프 동작에 영향을 주는 것만, 경로/저장소/서버 설정은 제외)
+REPLAY_SETTING_SECTIONS = ("llm", "search", "gemini", "vector_db", "agent", "context", "domain")
+
+
+def _replay_settings_snapshot() -> dict:
+    settings = load_settings()
+    return {section: settings[section] for section in REPLAY_SETTING_SECTIONS if section in settings}
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def _dumps(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False, default=_jsonable, separators=(",", ":"))
+
+
+class TraceRecorder:
+    """실행 하나의 추적 이벤트 수집 (max_bytes 초과 후에는 내용 없이 이름/시간만 기록)"""
+
+    def __init__(self, initial_state: dict, max_bytes: int):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.max_bytes = max_bytes
+        self.started = time.perf_counter()
+        self.truncated = False
+        self.result: Optional[dict] = None  # 최종 상태 (footer용)
+        self._lines = [_dumps({
+            "type": "header",
+            "version": TRACE_VERSION,
+            "trace_id": self.trace_id,
+            "created_at": time.time(),
+            "initial_state": initial_state,
+            "settings": _replay_settings_snapshot(),
+        })]
+        self._size = len(self._lines[0])
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def _add(self, event: dict, payload_keys: tuple[str, ...]):
+        line = _dumps(event)
+        if self._size + len(line) > self.max_bytes:
+            self.truncated = True
+            line = _dumps({
+                **{k: v for k, v in event.items() if k not in payload_keys},
+                "dropped": True
+            })
+        self._size += len(line)
+        self._lines.append(line)
+
+    def node(self, node: str, delta: Any, ms: float, error: Optional[BaseException] = None):
+        self._add({
+            "type": "node",
+            "node": node,
+            "at_ms": self._elapsed_ms(),
+            "ms": round(ms, 1),
+            "delta": delta,
+            "error": repr(error) if error else None,
+        }, ("delta",))
+
+    def call(
+        self,
+        provider: str,
+        operation: str,
+        request: dict,
+        response: Any,
+        ms: float,
+        cache_hit: bool = False,
+        error: Optional[BaseException] = None,
+        coalesced: bool = False
+    ):
+        self._add({
+            "type": "call",
+            "provider": provider,
+            "operation": operation,
+            "at_ms": self._elapsed_ms(),
+            "ms": round(ms, 1),
+            "cache_hit": cache_hit,
+            "coalesced": coalesced,
+            "request": request,
+            "response": response,
+            "error": {"type": type(error).__name__, "message": str(error)} if error else None,
+        }, ("request", "response"))
+
+    def save(self, directory: Path, result: Optional[dict], error: Optional[BaseException]) -> Path:
+        footer = _dumps({
+            "type": "footer",
+            "duration_ms": self._elapsed_ms(),
+            "final_response": (result or {}).get("final_response"),
+            "error": repr(error) if error else None,
+            "truncated": self.truncated,
+        })
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{self.trace_id}.jsonl.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write("\n".join(self._lines + [footer]) + "\n")
+        _prune(directory, get_setting("tracing.max_files", 200))
+        return path
+
+
+def _prune(directory: Path, max_files: int):
+    """파일 이름이 시각으로 시작하므로 이름순 앞쪽(오래된 것)부터 삭제"""
+    files = sorted(directory.glob("*.jsonl.gz"))
+    for path in files[:max(0, len(files) - max_files)]:
+        path.unlink(missing_ok=True)
+
+
+_current_recorder: ContextVar[Optional[TraceRecorder]] = ContextVar("trace_recorder", default=None)
+
+
+def current_recorder() -> Optional[TraceRecorder]:
+    """추적 중인 실행이면 기록기 반환 (노드/외부 호출 계측에서 사용)"""
+    return _current_recorder.get()
+
+
+@asynccontextmanager
+async def trace_run(initial_state: dict) -> AsyncIterator[Optional[TraceRecorder]]:
+    """
+    tracing.enabled이고 샘플링되면 이 블록의 그래프 실행을 기록
+
+    블록 안에서 recorder.result에 최종 상태를 넣으면 footer에 최종 응답이 남습니다.
+    """
+    if not get_setting("tracing.enabled", False) or random.random() >= get_setting("tracing.sample_rate", 0.05):
+        yield None
+        return
+
+    recorder = TraceRecorder(initial_state, get_setting("tracing.max_bytes", 2_000_000))
+    token = _current_recorder.set(recorder)
+    error = None
+    try:
+        yield recorder
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_recorder.reset(token)
+        directory = resolve_path(get_setting("tracing.directory", "data/traces"))
+        try:
+            await asyncio.to_thread(recorder.save, directory, recorder.result, error)
+        except Exception as e:
+            logger.warning("Trace save error: %s", e, exc_info=True)
+
+
+# ---------------------------------------------------------------------------
+# 재현
+# ---------------------------------------------------------------------------
+
+def load_trace(path: str | Path) -> dict:
+    """추적 파일 읽기 → {"header", "nodes", "calls", "footer"}"""
+    trace = {"header": None, "nodes": [], "calls": [], "footer": None}
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            kind = event.pop("type")
+            if kind in ("header", "footer"):
+                trace[kind] = event
+            else:
+                trace[f"{kind}s"].append(event)
+    if trace["header"] is None or trace["header"].get("version") != TRACE_VERSION:
+        raise ValueError(f"지원하지 않는 추적 파일: {path}")
+    return trace
+
+
+class ReplayMissingError(RuntimeError):
+    """추적에 없는 외부 호출"""
+
+
+class ReplayedError(RuntimeError):
+    """기록된 외부 호출 오류 재현 (재시도/모델 전환 대상이 아니도록 원래 메시지는 속성으로만 보관)"""
+
+    def __init__(self, error: dict):
+        self.original = error
+        super().__init__(f"replayed {error['type']}")
+
+
+class CallReplayer:
+    """
+    기록된 외부 호출 응답 반환
+
+    요청 키가 같은 기록을 순서대로 사용하고, 코드 변경 등으로 키가 다르면
+    아직 쓰지 않은 같은 공급자의 기록을 순서대로 사용합니다 (mismatched로 집계).
+    """
+
+    def __init__(self, calls: list[dict], latency: str = "none"):
+        self.latency = latency
+        self._by_provider: dict[str, list[dict]] = defaultdict(list)
+        for call in calls:
+            if not call.get("dropped"):
+                self._by_provider[call["provider"]].append({**call, "used": False})
+        self.matched = 0
+        self.mismatched = 0
+        self.missing = 0
+
+    async def take(self, provider: str, key: str) -> Any:
+        recorded = self._by_provider.get(provider, [])
+        call = next((c for c in recorded if not c["used"] and self._key(c) == key), None)
+        if call is not None:
+            self.matched += 1
+        else:
+            call = next((c for c in recorded if not c["used"]), None)
+            if call is None:
+                self.missing += 1
+                raise ReplayMissingError(f"추적에 없는 {provider} 호출")
+            self.mismatched += 1
+        call["used"] = True
+
+        if self.latency == "recorded" and not call["cache_hit"]:
+            await asyncio.sleep(call["ms"] / 1000)
+        if call["error"]:
+            raise ReplayedError(call["error"])
+        return call["response"]
+
+    @staticmethod
+    def _key(call: dict) -> str:
+        request = call["request"]
+        return request.get("prompt") or request.get("query") or ""
+
+    def has(self, provider: str) -> bool:
+        return bool(self._by_provider.get(provider))
+
+    def stats(self) -> dict:
+        return {"matched": self.matched, "mismatched": self.mismatched, "missing": self.missing}
+
+
+class _ReplayGeminiModels:
+    def __init__(self, replayer: CallReplayer):
+        self.replayer = replayer
+
+    async def generate_content(self, model: str, contents: str, config=None):
+        return SimpleNamespace(text=await self.replayer.take("gemini", contents), usage_metadata=None)
+
+    async def generate_content_stream(self, model: str, contents: str, config=None):
+        text = await self.replayer.take("gemini", contents)
+
+        async def chunks():
+            yield SimpleNamespace(text=text, usage_metadata=None)
+
+        return chunks()
+
+
+class _ReplayTavilyClient:
+    def __init__(self, replayer: CallReplayer):
+        self.replayer = replayer
+
+    async def search(self, query: str, **kwargs) -> dict:
+        return await self.replayer.take("tavily", query)
+
+
+def use_replay_settings(recorded: Optional[dict]) -> Path:
+    """
+    재현용 설정 적용: 현재 설정에 기록된 그래프 설정 섹션을 덮어쓰고, 캐시/추적을 끄고 저장소를 메모리로
+
+    캐시가 켜져 있으면 기록에 없는 캐시 응답이 섞이므로 항상 끕니다.
+    """
+    settings = json.loads(json.dumps(load_settings()))
+    for section in REPLAY_SETTING_SECTIONS:
+        if recorded and section in recorded:
+            settings[section] = recorded[section]
+    overrides = {
+        "cache.search.enabled": False,
+        "cache.llm.enabled": False,
+        "cache.response.enabled": False,
+        "checkpointer.backend": "memory",
+        "tracing.enabled": False,
+        "gemini.startup_probe": False,
+    }
+    for key, value in overrides.items():
+        node = settings
+        parts = key.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+
+    path = Path(tempfile.mkdtemp(prefix="replay-")) / "settings.yaml"
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(settings, f, allow_unicode=True)
+    os.environ["SETTINGS_PATH"] = str(path)
+    load_settings.cache_clear()
+    return path
+
+
+async def replay_trace(path: str | Path, latency: str = "none", recorded_settings: bool = True) -> dict:
+    """
+    추적 파일로 그래프 재실행
+
+    Args:
+        path: 추적 파일 (.jsonl.gz)
+        latency: "recorded"면 외부 호출마다 기록된 시간만큼 대기, "none"이면 즉시 응답
+        recorded_settings: False면 기록 당시 설정 대신 현재 settings.yaml 사용
+
+    Returns:
+        노드별 기록/재현 시간과 상태 변경 일치 여부, 외부 호출 매칭 통계, 최종 응답 일치 여부
+    """
+    trace = load_trace(path)
+    header = trace["header"]
+
+    from src.graph import nodes
+    from src.tools import tavily_search
+
+    # 재현 동안만 바꾸는 전역 (끝나면 복원)
+    saved = (os.environ.get("SETTINGS_PATH"), nodes._client, tavily_search._client, nodes._kb_lookup)
+    settings_path = use_replay_settings(header.get("settings") if recorded_settings else None)
+    try:
+        return await _replay(trace, latency)
+    finally:
+        settings_env, nodes._client, tavily_search._client, nodes._kb_lookup = saved
+        if settings_env is None:
+            os.environ.pop("SETTINGS_PATH", None)
+        else:
+            os.environ["SETTINGS_PATH"] = settings_env
+        load_settings.cache_clear()
+        shutil.rmtree(settings_path.parent, ignore_errors=True)
+
+
+async def _replay(trace: dict, latency: str) -> dict:
+    from src.graph import nodes
+    from src.graph.state import ResearchPlan, ResultRecord
+    from src.graph.workflow import build_initial_state, create_research_agent, new_thread_id
+    from src.tools import tavily_search
+    from src.metrics import request_trace
+
+    header = trace["header"]
+    replayer = CallReplayer(trace["calls"], latency)
+    nodes._client = SimpleNamespace(aio=SimpleNamespace(models=_ReplayGeminiModels(replayer)))
+    tavily_search._client = _ReplayTavilyClient(replayer)
+    if replayer.has("kb"):
+        # 지식베이스 결과도 기록으로 대체 (KB 기록이 없는 이전 추적은 현재 KB 사용)
+        async def replay_kb_lookup(plan, current_params):
+            query = " ".join(part for part in [plan.main_query, plan.material_type, plan.defect_type] if part)
+            return [ResultRecord(**record) for record in await replayer.take("kb", query)]
+
+        nodes._kb_lookup = replay_kb_lookup
+
+    recorded_state = header["initial_state"]
+    initial_state = build_initial_state(
+        recorded_state["original_query"],
+        recorded_state.get("current_params"),
+        recorded_state.get("mode", "full")
+    )
+    if recorded_state.get("research_plan"):
+        initial_state["research_plan"] = ResearchPlan(**recorded_state["research_plan"])
+
+    # 재현 노드별 상태 변경은 같은 기록기로 수집
+    recorder = TraceRecorder(initial_state, max_bytes=float("inf"))
+    token = _current_recorder.set(recorder)
+    error = None
+    result = {}
+    started = time.perf_counter()
+    try:
+        with request_trace():
+            result = await create_research_agent().ainvoke(
+                initial_state, {"configurable": {"thread_id": new_thread_id()}}
+            )
+    except Exception as e:
+        error = e
+    finally:
+        _current_recorder.reset(token)
+    replay_ms = (time.perf_counter() - started) * 1000
+
+    replayed_nodes = [json.loads(line) for line in recorder._lines[1:]]
+    replayed_nodes = [event for event in replayed_nodes if event["type"] == "node"]
+    return {
+        "trace_id": header["trace_id"],
+        "query": recorded_state["original_query"],
+        "truncated": bool(trace["footer"] and trace["footer"]["truncated"]),
+        "recorded_ms": trace["footer"]["duration_ms"] if trace["footer"] else None,
+        "replay_ms": round(replay_ms, 1),
+        "nodes": _compare_nodes(trace["nodes"], replayed_nodes),
+        "calls": replayer.stats(),
+        "response_matches": (
+            trace["footer"] is not None
+            and result.get("final_response") == trace["footer"]["final_response"]
+        ),
+        "final_response": result.get("final_response"),
+        "error": repr(error) if error else None,
+    }
+
+
+def _without_timestamps(value: Any) -> Any:
+    """검색 결과의 수집 시각은 실행마다 다르므로 비교에서 제외"""
+    if isinstance(value, dict):
+        return {k: _without_timestamps(v) for k, v in value.items() if k != "timestamp"}
+    if isinstance(value, list):
+        return [_without_timestamps(v) for v in value]
+    return value
+
+
+def _compare_nodes(recorded: list[dict], replayed: list[dict]) -> list[dict]:
+    """같은 노드의 n번째 실행끼리 시간/상태 변경 비교 (병렬 노드는 순서가 바뀔 수 있음)"""
+    replayed_by_node: dict[str, list[dict]] = defaultdict(list)
+    for event in replayed:
+        replayed_by_node[event["node"]].append(event)
+
+    rows = []
+    for event in recorded:
+        candidates = replayed_by_node.get(event["node"])
+        other = candidates.pop(0) if candidates else None
+        rows.append({
+            "node": event["node"],
+            "recorded_ms": event["ms"],
+            "replay_ms": other["ms"] if other else None,
+            "delta_matches": (
+                None if other is None or event.get("dropped")
+                else _dumps(_without_timestamps(event["delta"])) == _dumps(_without_timestamps(other["delta"]))
+            ),
+        })
+    for node, remaining in replayed_by_node.items():
+        for other in remaining:
+            rows.append({"node": node, "recorded_ms": None, "replay_ms": other["ms"], "delta_matches": None})
+    return rows
@@ -0,0 +1,76 @@
+"""
+테스트 공통 설정
+- src 모듈 import 전에 임시 settings.yaml 지정 (디스크 캐시/세션/실험 로그를 저장소에 만들지 않음)
+- 외부 API 대신 benchmarks/fakes의 녹화 응답 클라이언트
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+import yaml
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+TEST_DIR = Path(tempfile.mkdtemp(prefix="agent-tests-"))
+
+TEST_SETTINGS = {
+    "gemini.startup_probe": False,
+    "cache.search.disk_path": None,
+    "checkpointer.backend": "memory",
+    "jobs.backend": "memory",
+    "tracing.enabled": False,
+    "storage.experiments.log_file": str(TEST_DIR / "experiments.jsonl"),
+}
+
+
+def _write_settings() -> Path:
+    with open(PROJECT_ROOT / "config" / "settings.yaml", "r", encoding="utf-8") as f:
+        settings = yaml.safe_load(f) or {}
+    for key, value in TEST_SETTINGS.items():
+        node = settings
+        parts = key.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    path = TEST_DIR / "settings.yaml"
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(settings, f, allow_unicode=True)
+    return path
+
+
+os.environ["SETTINGS_PATH"] = str(_write_settings())
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters():
+    """호출 제한기의 asyncio 락은 처음 경합한 이벤트 루프에 묶이므로 테스트(asyncio.run)마다 새로 만듦"""
+    from src.tools import rate_limiter
+    rate_limiter._limiters.clear()
+    yield
+    rate_limiter._limiters.clear()
+
+
+@pytest.fixture
+def fake_clients():
+    """녹화 응답 Gemini/Tavily 클라이언트 설치, 캐시 비움 (끝나면 원래 클라이언트 복원)"""
+    from benchmarks.fakes import Latency, install_fakes
+    from src.graph import nodes
+    from src.memory.llm_cache import get_llm_cache
+    from src.memory.response_cache import get_response_cache
+    from src.tools import tavily_search
+
+    saved = (nodes._client, tavily_search._client)
+    caches = (get_llm_cache(), get_response_cache(), tavily_search.get_search_cache())
+    for cache in caches:
+        cache.clear()
+    try:
+        yield install_fakes(Latency(), Latency(), seed=0)
+    finally:
+        nodes._client, tavily_search._client = saved
+        for cache in caches:
+            cache.clear()
@@ -0,0 +1,85 @@
+"""
+배치 연구 테스트: 캐시 없이도 항목 간 요청 공유, session_id/include_timing 반영
+"""
+import asyncio
+
+from src.graph import nodes
+from src.graph.batch import run_research_batch
+from src.graph.workflow import get_agent
+from src.memory.llm_cache import CoalescingScope
+from src.tools import tavily_search
+
+QUERY = "PETG 스트링이 심해요"
+
+
+async def _collect(items, **kwargs) -> list[dict]:
+    return sorted([r async for r in run_research_batch(items, **kwargs)], key=lambda r: r["index"])
+
+
+def test_scope_shares_results_but_not_failures():
+    scope = CoalescingScope()
+    calls = []
+
+    async def ok():
+        calls.append("ok")
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def failing():
+        calls.append("fail")
+        raise RuntimeError("boom")
+
+    async def main():
+        first = await asyncio.gather(scope.run("a", ok), scope.run("a", ok))
+        later = await scope.run("a", ok)
+        for _ in range(2):
+            try:
+                await scope.run("b", failing)
+            except RuntimeError:
+                pass
+        return first, later
+
+    first, later = asyncio.run(main())
+    assert first == [("value", False), ("value", True)]
+    assert later == ("value", True)
+    assert calls == ["ok", "fail", "fail"]
+
+
+def test_items_share_calls_without_cache(fake_clients, monkeypatch):
+    disabled = {"cache.llm.enabled": False, "cache.search.enabled": False}
+    for module in (nodes, tavily_search):
+        original = module.get_setting
+        monkeypatch.setattr(
+            module, "get_setting",
+            lambda key, default=None, original=original: disabled.get(key, original(key, default))
+        )
+    gemini, tavily = fake_clients
+    asyncio.run(_collect([{"query": QUERY, "mode": "full"}], use_cache=False))
+    single = (gemini.calls, tavily.calls)
+    assert single[0] > 0 and single[1] > 0
+
+    # 같은 질문이지만 세션이 달라 따로 실행되는 두 항목: 같은 프롬프트/검색은 한 번만 호출
+    gemini.calls = tavily.calls = 0
+    results = asyncio.run(_collect(
+        [{"query": QUERY, "mode": "full", "session_id": "s1"}, {"query": QUERY, "mode": "full", "session_id": "s2"}],
+        use_cache=False
+    ))
+    assert all(r["success"] for r in results)
+    assert (gemini.calls, tavily.calls) == single
+
+
+def test_session_and_timing_are_honored(fake_clients):
+    async def main():
+        results = await _collect([
+            {"query": QUERY, "session_id": "batch-session", "include_timing": True, "id": "a"},
+            {"query": QUERY, "id": "b"},
+        ])
+        state = await get_agent().aget_state({"configurable": {"thread_id": "batch-session"}})
+        return results, state
+
+    results, state = asyncio.run(main())
+    assert results[0]["session_id"] == "batch-session"
+    assert set(results[0]["timing"]) == {"total_ms", "nodes", "calls"}
+    assert "session_id" not in results[1] and "timing" not in results[1]
+    # 세션이 다르면 같은 질문이라도 따로 실행되고, 세션 스레드에 상태가 남음
+    assert state.values["original_query"] == QUERY
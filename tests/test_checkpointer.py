@@ -0,0 +1,116 @@
+"""
+세션 체크포인터 제거 정책 테스트 (TTL/LRU/용량, SQLite 재시작 후 복원)
+"""
+import asyncio
+import operator
+import sqlite3
+from typing import Annotated, TypedDict
+
+import pytest
+
+from src.memory.checkpointer import ThreadEvictionPolicy, _create_sqlite_saver, create_serializer
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_expired_threads_are_evicted_on_touch():
+    clock = FakeClock()
+    policy = ThreadEvictionPolicy(ttl=60, max_threads=10, clock=clock)
+    policy.touch("a")
+    clock.now += 30
+    policy.touch("b")
+    clock.now += 40
+    # a는 70초, b는 40초 경과
+    assert policy.touch("c") == ["a"]
+    assert policy.stats() == {"threads": 2, "bytes": 0, "evictions": 1}
+
+
+def test_least_recently_used_thread_is_evicted_over_max_threads():
+    clock = FakeClock()
+    policy = ThreadEvictionPolicy(ttl=3600, max_threads=2, clock=clock)
+    for thread_id in ("a", "b"):
+        clock.now += 1
+        policy.touch(thread_id)
+    clock.now += 1
+    policy.touch("a")  # a를 다시 사용하면 b가 가장 오래됨
+    clock.now += 1
+    assert policy.touch("c") == ["b"]
+
+
+def test_byte_limit_evicts_oldest_but_never_current_thread():
+    policy = ThreadEvictionPolicy(ttl=3600, max_threads=10, max_bytes=100, clock=FakeClock())
+    assert policy.touch("a", 60) == []
+    assert policy.touch("b", 60) == ["a"]
+    # 현재 스레드 혼자 상한을 넘으면 제거하지 않음
+    assert policy.touch("b", 100) == []
+    assert policy.stats()["bytes"] == 160
+
+
+def test_restore_and_sweep_apply_recorded_access_times():
+    clock = FakeClock(now=10_000)
+    policy = ThreadEvictionPolicy(ttl=100, max_threads=2, clock=clock)
+    for thread_id, last_access in (("old", 9_000), ("b", 9_950), ("c", 9_990), ("d", 9_995)):
+        policy.restore(thread_id, last_access)
+    # old는 만료, 남은 b/c/d 중 가장 오래된 b는 개수 초과
+    assert policy.sweep() == ["old", "b"]
+    assert policy.stats()["threads"] == 2
+
+
+class CounterState(TypedDict):
+    count: Annotated[int, operator.add]
+
+
+def _compile(saver):
+    from langgraph.graph import END, START, StateGraph
+
+    graph = StateGraph(CounterState)
+    graph.add_node("step", lambda state: {"count": 1})
+    graph.add_edge(START, "step")
+    graph.add_edge("step", END)
+    return graph.compile(checkpointer=saver)
+
+
+def _thread_ids(path) -> set[str]:
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+
+
+def test_sqlite_policy_survives_restart(tmp_path):
+    pytest.importorskip("aiosqlite")
+    pytest.importorskip("langgraph.checkpoint.sqlite.aio")
+    path = tmp_path / "checkpoints.sqlite"
+    clock = FakeClock(now=1000.0)
+
+    async def run(threads, max_threads=10):
+        policy = ThreadEvictionPolicy(ttl=300, max_threads=max_threads, clock=clock)
+        saver = _create_sqlite_saver(path, policy, create_serializer())
+        try:
+            await saver.setup()
+            agent = _compile(saver)
+            for thread_id in threads:
+                clock.now += 10
+                await agent.ainvoke({"count": 0}, {"configurable": {"thread_id": thread_id}})
+            return policy.stats()
+        finally:
+            await saver.aclose()
+
+    asyncio.run(run(["a", "b", "c"]))
+    assert _thread_ids(path) == {"a", "b", "c"}
+
+    # 재시작 후: a(1010)는 TTL 만료로 시작 시 제거, b/c는 복원
+    clock.now = 1320.0
+    stats = asyncio.run(run([]))
+    assert stats["threads"] == 2 and stats["evictions"] == 1
+    assert _thread_ids(path) == {"b", "c"}
+
+    # 재시작 전 스레드도 LRU 대상: 새 스레드 d 추가 시 가장 오래된 b 제거
+    asyncio.run(run(["d"], max_threads=2))
+    assert _thread_ids(path) == {"c", "d"}
+    with sqlite3.connect(path) as conn:
+        assert {row[0] for row in conn.execute("SELECT thread_id FROM thread_access")} == {"c", "d"}
@@ -0,0 +1,63 @@
+"""
+MinHash 근사 중복 검출 테스트
+"""
+import random
+import zlib
+
+import numpy as np
+import pytest
+
+from src.graph.context import _MERSENNE_PRIME, MinHashDeduplicator
+
+
+def _exact_jaccard(dedup: MinHashDeduplicator, a: str, b: str) -> float:
+    sa, sb = dedup._shingles(a), dedup._shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def _estimated_jaccard(dedup: MinHashDeduplicator, a: str, b: str) -> float:
+    return float(np.mean(dedup.signature(a) == dedup.signature(b)))
+
+
+def _text_pair(rng: random.Random, overlap: float, words: int = 120) -> tuple[str, str]:
+    """앞부분 overlap 비율의 단어를 공유하는 두 텍스트"""
+    vocabulary = [f"w{i}" for i in range(5000)]
+    shared = int(words * overlap)
+    common = [rng.choice(vocabulary) for _ in range(shared)]
+    a = common + [rng.choice(vocabulary) for _ in range(words - shared)]
+    b = common + [rng.choice(vocabulary) for _ in range(words - shared)]
+    return " ".join(a), " ".join(b)
+
+
+def test_signature_matches_exact_modular_arithmetic():
+    dedup = MinHashDeduplicator(num_perm=32)
+    text = "PETG stringing at 240C with 6mm retraction and slow travel moves"
+    hashes = [zlib.crc32(s.encode("utf-8")) % _MERSENNE_PRIME for s in dedup._shingles(text)]
+    expected = [
+        min((int(a) * h + int(b)) % _MERSENNE_PRIME for h in hashes)
+        for a, b in zip(dedup._a, dedup._b)
+    ]
+    assert dedup.signature(text).tolist() == expected
+
+
+@pytest.mark.parametrize("overlap", [0.0, 0.3, 0.6, 0.9, 1.0])
+def test_estimated_jaccard_tracks_exact(overlap):
+    rng = random.Random(7)
+    dedup = MinHashDeduplicator(num_perm=256, bands=32)
+    errors = []
+    for _ in range(5):
+        a, b = _text_pair(rng, overlap)
+        errors.append(abs(_estimated_jaccard(dedup, a, b) - _exact_jaccard(dedup, a, b)))
+    # 순열 256개의 표준 오차는 최대 약 0.03
+    assert np.mean(errors) < 0.06
+    assert max(errors) < 0.12
+
+
+def test_near_duplicates_are_detected():
+    rng = random.Random(3)
+    dedup = MinHashDeduplicator(threshold=0.8)
+    a, b = _text_pair(rng, 0.97)
+    c, _ = _text_pair(rng, 0.0)
+    assert dedup.is_duplicate_or_add(a) is False
+    assert dedup.is_duplicate_or_add(b) is True
+    assert dedup.is_duplicate_or_add(c) is False
@@ -0,0 +1,48 @@
+"""
+규칙 기반 파서 테스트: 모호한 파라미터 표현, 일반 요청 표현
+"""
+import pytest
+
+from src.graph.fast_parser import fast_parse_query
+
+
+@pytest.mark.parametrize("query, parameters", [
+    ("PLA 팬 속도 추천", ["fan_speed"]),
+    ("PLA fan speed", ["fan_speed"]),
+    ("PETG flow speed 설정", ["flow_rate"]),
+    ("PETG 베드 온도 설정", ["bed_temp"]),
+    ("PETG bed 온도 설정", ["bed_temp"]),
+    ("PLA 노즐 온도 설정", ["nozzle_temp"]),
+])
+def test_qualified_temperature_and_speed_map_to_their_parameter(query, parameters):
+    result = fast_parse_query(query)
+    assert result.plan.parameters_mentioned == parameters
+    assert result.confidence == 1.0
+
+
+def test_bare_temperature_is_guessed_with_lower_confidence():
+    result = fast_parse_query("PLA 온도 설정")
+    assert result.plan.parameters_mentioned == ["nozzle_temp"]
+    assert result.confidence < 1.0
+    assert any("모호한 파라미터" in reason for reason in result.reasons)
+
+
+def test_for_is_not_treated_as_generic_request():
+    assert fast_parse_query("best settings for PLA").confidence == 1.0
+    # "for" 뒤의 조건을 해석하지 못했으면 LLM 파서로 넘김
+    result = fast_parse_query("PLA for miniatures")
+    assert result.confidence < 0.8
+    assert "재료 외 내용 미해석" in result.reasons
+
+
+def test_tagged_material_and_params_suffix_are_not_parsed_as_body():
+    result = fast_parse_query("스트링이 심해요 [재료: PETG] (현재 설정: 온도 240, 속도 50)")
+    assert result.plan.material_type == "PETG"
+    assert result.plan.defect_type == "stringing"
+    assert result.plan.parameters_mentioned == []
+    assert result.confidence == 1.0
+
+
+def test_missing_material_and_defect_returns_no_plan():
+    result = fast_parse_query("오늘 날씨 어때요")
+    assert result.plan is None and result.confidence == 0.0
@@ -0,0 +1,111 @@
+"""
+작업 큐 테스트: 대기열 한도, 저장소 오류 시 워커 유지, 유휴 정리, 우선순위 레인
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.api.jobs import Job, JobManager, MemoryJobStore, QueueFullError
+from src.tools.rate_limiter import _current_lane
+
+
+class SlowStore(MemoryJobStore):
+    """디스크 저장소처럼 저장이 오래 걸리는 저장소"""
+    blocking = True
+
+    def save(self, job):
+        time.sleep(0.01)
+        super().save(job)
+
+
+class FlakyStore(MemoryJobStore):
+    """지정한 상태의 작업을 처음 한 번 저장할 때 실패"""
+
+    def __init__(self, fail_on_status: str):
+        super().__init__()
+        self.fail_on_status = fail_on_status
+
+    def save(self, job):
+        if job.status == self.fail_on_status and self.fail_on_status:
+            self.fail_on_status = None
+            raise OSError("disk full")
+        super().save(job)
+
+
+async def _wait_done(manager: JobManager, job_id: str) -> Job:
+    async for snapshot in manager.events(job_id):
+        pass
+    return await manager.get(job_id)
+
+
+def test_concurrent_submits_respect_queue_depth():
+    async def main():
+        manager = JobManager(SlowStore(), max_queue_depth=3)
+        return await asyncio.gather(
+            *(manager.submit({"query": str(i)}) for i in range(10)),
+            return_exceptions=True
+        ), manager
+
+    results, manager = asyncio.run(main())
+    assert sum(isinstance(r, Job) for r in results) == 3
+    assert sum(isinstance(r, QueueFullError) for r in results) == 7
+    assert manager.stats()["queued"] == 3
+
+
+def test_store_error_fails_job_but_keeps_worker():
+    async def runner(request):
+        return {"answer": request["query"]}
+
+    async def main():
+        manager = JobManager(FlakyStore(fail_on_status="running"), workers=1, runner=runner)
+        await manager.start()
+        try:
+            first = await manager.submit({"query": "a"})
+            second = await manager.submit({"query": "b"})
+            return await _wait_done(manager, first.id), await _wait_done(manager, second.id)
+        finally:
+            await manager.stop()
+
+    first, second = asyncio.run(main())
+    assert first.status == "failed" and "disk full" in first.error
+    assert second.status == "succeeded" and second.result == {"answer": "b"}
+
+
+def test_idle_manager_prunes_finished_jobs():
+    store = MemoryJobStore()
+    old = Job(id="old", request={}, status="succeeded", finished_at=time.time() - 100)
+    store.save(old)
+
+    async def main():
+        manager = JobManager(store, retention=10, prune_interval=0.01)
+        await manager.start()
+        try:
+            await asyncio.sleep(0.05)
+            return await manager.get("old")
+        finally:
+            await manager.stop()
+
+    assert asyncio.run(main()) is None
+
+
+@pytest.mark.parametrize("lane", [None, "batch"])
+def test_jobs_run_in_configured_lane(lane):
+    seen = []
+
+    async def runner(request):
+        seen.append(_current_lane.get())
+        return {}
+
+    async def main():
+        kwargs = {"lane": lane} if lane else {}
+        manager = JobManager(MemoryJobStore(), runner=runner, **kwargs)
+        await manager.start()
+        try:
+            job = await manager.submit({"query": "q"})
+            await _wait_done(manager, job.id)
+        finally:
+            await manager.stop()
+
+    asyncio.run(main())
+    assert seen == [lane or "interactive"]
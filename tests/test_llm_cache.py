@@ -0,0 +1,60 @@
+"""
+LLM 캐시 테스트: 적중/진행 중 호출 공유/미스 구분
+"""
+import asyncio
+from types import SimpleNamespace
+
+from src.graph import nodes
+from src.memory.llm_cache import SingleFlightCache, get_llm_cache
+from src.metrics import request_trace
+
+
+def test_get_or_call_reports_outcome():
+    cache = SingleFlightCache()
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        concurrent = await asyncio.gather(*(cache.get_or_call("k", factory) for _ in range(3)))
+        return concurrent, await cache.get_or_call("k", factory)
+
+    concurrent, later = asyncio.run(main())
+    assert sorted(outcome for _, outcome in concurrent) == ["coalesced", "coalesced", "miss"]
+    assert later == ("answer", "hit")
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["coalesced"] == 2 and cache.stats()["misses"] == 1
+
+
+class SlowModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return SimpleNamespace(text=f"echo: {contents}", usage_metadata=None)
+
+
+def test_call_gemini_counts_coalesced_waiters_separately(monkeypatch):
+    models = SlowModels()
+    monkeypatch.setattr(nodes, "_client", SimpleNamespace(aio=SimpleNamespace(models=models)))
+    get_llm_cache().clear()
+
+    async def main():
+        with request_trace() as trace:
+            await asyncio.gather(*(nodes.call_gemini("same prompt") for _ in range(3)))
+            await nodes.call_gemini("same prompt")
+        return trace.to_dict()["calls"]["gemini"]
+
+    try:
+        totals = asyncio.run(main())
+    finally:
+        get_llm_cache().clear()
+    assert models.calls == 1
+    assert totals["calls"] == 4
+    assert totals["coalesced"] == 2
+    assert totals["cache_hits"] == 1
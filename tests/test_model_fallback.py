@@ -0,0 +1,98 @@
+"""
+Gemini 모델 전환 테스트 (공급자 백오프 조건, 호출 전체 기한)
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.graph import model_router, nodes
+from src.tools.rate_limiter import get_rate_limiter
+
+PRIMARY = "test-primary"
+FALLBACKS = ["test-fallback-a", "test-fallback-b"]
+
+
+class ApiError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"{code} error")
+        self.code = code
+
+
+@pytest.fixture
+def fallback_env(monkeypatch):
+    overrides = {
+        "gemini.fallback_models": FALLBACKS,
+        "gemini.unavailable_wait_max": 0.5,
+        "rate_limit.retry.base_delay": 0.05,
+    }
+    original = nodes.get_setting
+    monkeypatch.setattr(nodes, "get_setting", lambda key, default=None: overrides.get(key, original(key, default)))
+    monkeypatch.setattr(model_router, "get_setting", lambda key, default=None: overrides.get(key, original(key, default)))
+    monkeypatch.setattr(model_router, "_router", None)
+    limiter = get_rate_limiter("gemini")
+    monkeypatch.setattr(limiter, "rate_limited_backoff", 0.01)
+    return limiter
+
+
+def test_single_rate_limited_model_does_not_pause_provider(fallback_env):
+    calls = []
+
+    async def attempt(model_name):
+        calls.append(model_name)
+        if model_name == PRIMARY:
+            raise ApiError(429)
+        return model_name
+
+    backoffs = fallback_env.backoffs
+    assert asyncio.run(nodes._with_model_fallback(PRIMARY, attempt)) == FALLBACKS[0]
+    assert calls == [PRIMARY, FALLBACKS[0]]
+    assert fallback_env.backoffs == backoffs
+
+
+def test_provider_backoff_only_when_every_candidate_is_rate_limited(fallback_env):
+    async def attempt(model_name):
+        raise ApiError(429)
+
+    backoffs = fallback_env.backoffs
+    started = time.monotonic()
+    with pytest.raises(ApiError):
+        asyncio.run(nodes._with_model_fallback(PRIMARY, attempt))
+    assert fallback_env.backoffs == backoffs + 1
+    # 모든 모델이 cooldown이면 기한 안에 풀리지 않으므로 바로 실패
+    assert time.monotonic() - started < 0.5
+
+
+def test_mixed_failures_do_not_pause_provider(fallback_env):
+    async def attempt(model_name):
+        raise ApiError(429 if model_name == PRIMARY else 503)
+
+    backoffs = fallback_env.backoffs
+    with pytest.raises(ApiError):
+        asyncio.run(nodes._with_model_fallback(PRIMARY, attempt))
+    assert fallback_env.backoffs == backoffs
+
+
+class _FailingModels:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls.append(model)
+        raise ApiError(503)
+
+
+def test_call_gemini_shares_one_deadline(fallback_env, monkeypatch):
+    models = _FailingModels()
+    client = type("Client", (), {})()
+    client.aio = type("Aio", (), {})()
+    client.aio.models = models
+    monkeypatch.setattr(nodes, "_client", client)
+    monkeypatch.setenv("GEMINI_MODEL", PRIMARY)
+
+    started = time.monotonic()
+    with pytest.raises(ApiError):
+        asyncio.run(nodes.call_gemini("prompt", use_cache=False))
+    # 전환/재시도 모두 기한(0.5초) 안에서 끝나고, 바깥에서 다시 시도하지 않음
+    assert time.monotonic() - started < 0.8
+    assert models.calls[:3] == [PRIMARY, *FALLBACKS]
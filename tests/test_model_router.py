@@ -0,0 +1,118 @@
+"""
+회로 차단기/모델 라우터 테스트 (가짜 시계 사용)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from src.graph import model_router
+from src.graph.model_router import CircuitBreaker, ModelRouter, classify_error
+
+PRIMARY = "primary"
+FALLBACK = "fallback"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(model_router, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+def _router(**kwargs) -> ModelRouter:
+    options = {"reprobe_interval": 600, "failure_threshold": 2, "reset_timeout": 30, "rate_limit_cooldown": 2}
+    return ModelRouter(PRIMARY, [FALLBACK], **{**options, **kwargs})
+
+
+class ApiError(Exception):
+    def __init__(self, code: int, message: str = ""):
+        super().__init__(message or f"{code} error")
+        self.code = code
+
+
+@pytest.mark.parametrize("error, kind", [
+    (ApiError(404), "not_found"),
+    (ApiError(429), "rate_limited"),
+    (ApiError(400, "RESOURCE_EXHAUSTED quota"), "rate_limited"),
+    (ApiError(503), "unavailable"),
+    (TimeoutError(), "unavailable"),
+    (ApiError(400, "invalid argument"), "fatal"),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) == kind
+
+
+def test_breaker_opens_then_half_opens_then_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    assert breaker.retry_in() == 30
+
+    clock.now += 30
+    assert breaker.state == "half_open" and breaker.allow()
+    # half-open 시험 호출이 실패하면 바로 다시 차단
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_rate_limit_cooldown_is_short_and_separate_from_open(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure(cooldown=2)
+    assert breaker.state == "closed" and breaker.cooling_down and not breaker.allow()
+    assert breaker.retry_in() == 2
+    clock.now += 2
+    assert breaker.allow()
+
+
+def test_router_prefers_resolved_fallback_and_reprobes_once_per_interval(clock):
+    router = _router()
+    router.record_failure(PRIMARY)
+    router.record_success(FALLBACK)
+    assert router.candidates() == [FALLBACK, PRIMARY]
+
+    clock.now += 600
+    # 주기가 지나면 한 호출만 우선 모델부터 시도
+    assert router.candidates() == [PRIMARY, FALLBACK]
+    router.record_success(FALLBACK)  # 이번 호출은 우선 모델 실패 후 폴백으로 성공
+    assert router.candidates() == [FALLBACK, PRIMARY]
+    clock.now += 599
+    assert router.candidates()[0] == FALLBACK
+
+    clock.now += 1
+    assert router.candidates()[0] == PRIMARY
+    router.record_success(PRIMARY)
+    assert router.resolved_model == PRIMARY
+    assert router.candidates() == [PRIMARY, FALLBACK]
+
+
+def test_not_found_model_is_skipped_until_reprobe(clock):
+    router = _router()
+    router.record_not_found(PRIMARY)
+    assert router.candidates() == [FALLBACK]
+    clock.now += 600
+    assert router.candidates() == [PRIMARY, FALLBACK]
+
+
+def test_next_available_in_reports_soonest_model(clock):
+    router = _router()
+    router.record_failure(PRIMARY, rate_limited=True)
+    for _ in range(2):
+        router.record_failure(FALLBACK)
+    assert router.candidates() == []
+    assert router.next_available_in() == 2
+    clock.now += 2
+    assert router.candidates() == [PRIMARY]
@@ -0,0 +1,51 @@
+"""
+응답 캐시 유사 일치 테스트 (벡터 행렬 증분 추가, 최대 개수 초과 시 오래된 항목 교체)
+"""
+from src.graph.state import ResearchPlan
+from src.memory.response_cache import ResearchResponseCache
+from src.tools.vector_index import HashingEmbedder
+
+
+def _plan(text: str, material: str = "PETG") -> ResearchPlan:
+    return ResearchPlan(main_query=text, material_type=material)
+
+
+def _cache(max_entries: int = 100) -> ResearchResponseCache:
+    return ResearchResponseCache(
+        max_entries=max_entries,
+        similarity_enabled=True,
+        similarity_threshold=0.9,
+        embedder=HashingEmbedder(dim=256)
+    )
+
+
+def test_similar_plan_hits_only_in_same_context():
+    cache = _cache()
+    cache.put("k1", {"response": "a"}, plan=_plan("petg stringing retraction tuning"))
+    assert cache.get_similar(_plan("petg stringing retraction tuning")) == {"response": "a"}
+    assert cache.get_similar(_plan("petg stringing retraction tuning", material="ABS")) is None
+    assert cache.get_similar(_plan("bed adhesion first layer")) is None
+
+
+def test_rows_are_appended_without_rebuilding():
+    cache = _cache()
+    for i in range(40):
+        cache.put(f"k{i}", {"response": str(i)}, plan=_plan(f"question number {i} about topic {i * 7}"))
+        if i == 0:
+            matrix = cache._vectors
+    # 용량이 늘어날 때만 새로 할당하고 앞쪽 행은 그대로 복사
+    assert len(cache._entries) == 40 and len(cache._vectors) >= 40
+    assert cache._vectors is not matrix
+    for i in (0, 17, 39):
+        assert cache.get_similar(_plan(f"question number {i} about topic {i * 7}")) == {"response": str(i)}
+
+
+def test_oldest_entries_are_replaced_when_full():
+    cache = _cache(max_entries=3)
+    for i in range(5):
+        cache.put(f"k{i}", {"response": str(i)}, plan=_plan(f"distinct question {i} with words w{i}x w{i}y"))
+    assert len(cache._entries) == 3
+    assert cache.get_similar(_plan("distinct question 0 with words w0x w0y")) is None
+    assert cache.get_similar(_plan("distinct question 1 with words w1x w1y")) is None
+    for i in (2, 3, 4):
+        assert cache.get_similar(_plan(f"distinct question {i} with words w{i}x w{i}y")) == {"response": str(i)}
@@ -0,0 +1,57 @@
+"""
+같은 세션(thread_id)에서 연속 질문 시 상태 초기화 테스트
+"""
+import asyncio
+
+from src.graph.state import Replace, ResultList, ResultRecord, add_errors, merge_results
+from src.graph.workflow import get_agent, run_research_detailed
+from src.tools.knowledge_base import KnowledgeBase
+
+FIRST = "ABS 출력물 모서리가 들뜹니다"
+SECOND = "PETG 노즐이 자꾸 막혀요"
+
+
+def test_replace_resets_accumulating_channels():
+    old = ResultList([ResultRecord(source="web", url="https://a.com/1", content="a")])
+    fresh = merge_results(old, Replace())
+    assert isinstance(fresh, ResultList) and fresh == []
+    assert add_errors(["old"], Replace()) == []
+    assert add_errors(["old"], ["new"]) == ["old", "new"]
+
+
+def test_second_question_in_session_starts_clean(fake_clients, monkeypatch):
+    original = KnowledgeBase.semantic_search
+    failures = {"left": 1}
+
+    def flaky_semantic_search(self, *args, **kwargs):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("index unavailable")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(KnowledgeBase, "semantic_search", flaky_semantic_search)
+    session = "session-two-questions"
+
+    async def main():
+        first = await run_research_detailed(FIRST, thread_id=session, material="ABS", mode="full")
+        first_state = await get_agent().aget_state({"configurable": {"thread_id": session}})
+
+        # 비교 기준: 같은 질문을 새 스레드에서 실행 (응답 캐시 미사용)
+        await run_research_detailed(SECOND, thread_id="fresh-thread", material="PETG", mode="full", use_cache=False)
+        fresh_state = await get_agent().aget_state({"configurable": {"thread_id": "fresh-thread"}})
+
+        second = await run_research_detailed(SECOND, thread_id=session, material="PETG", mode="full")
+        second_state = await get_agent().aget_state({"configurable": {"thread_id": session}})
+
+        # 두 번째 질문은 오류 없이 끝났으므로 응답 캐시에 저장되어야 함
+        repeated = await run_research_detailed(SECOND, thread_id=session, material="PETG", mode="full")
+        return first_state, fresh_state, second, second_state, repeated
+
+    first_state, fresh_state, second, second_state, repeated = asyncio.run(main())
+
+    assert any("KB search error" in e for e in first_state.values["errors"])
+    assert second_state.values["errors"] == []
+    for key in ("web_results", "kb_results", "paper_results"):
+        assert [r.url for r in second_state.values[key]] == [r.url for r in fresh_state.values[key]]
+    assert second["cached"] is False
+    assert repeated["cached"] is True
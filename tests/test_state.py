@@ -0,0 +1,54 @@
+"""
+검색 결과 병합(ResultList) 테스트: 중복 제거, 불변 병합, 체크포인트 직렬화 왕복
+"""
+from src.graph.state import ResultList, ResultRecord, canonical_url, merge_results
+from src.memory.checkpointer import create_serializer
+
+
+def _record(url: str, content: str) -> ResultRecord:
+    return ResultRecord(source="web", url=url, content=content)
+
+
+def test_canonical_url_drops_tracking_and_cosmetic_parts():
+    assert canonical_url("HTTPS://www.Example.com/a/?utm_source=x&b=2&fbclid=y#top") == "https://example.com/a?b=2"
+    assert canonical_url("internal://kb/petg") == "internal://kb/petg"
+
+
+def test_duplicates_by_url_or_content_are_skipped():
+    results = ResultList([_record("https://a.com/1", "PETG stringing")])
+    added = results.extend_unique([
+        _record("https://www.a.com/1/?utm_medium=feed", "other text"),  # 같은 URL
+        _record("https://b.com/2", "  petg   STRINGING "),  # 같은 본문
+        _record("https://c.com/3", "retraction tuning"),
+    ])
+    assert added == 1
+    assert [r.url for r in results] == ["https://a.com/1", "https://c.com/3"]
+
+
+def test_merge_returns_new_list_and_keeps_existing():
+    existing = ResultList([_record("https://a.com/1", "a")])
+    merged = merge_results(existing, [_record("https://b.com/2", "b"), _record("https://a.com/1", "a")])
+    assert merged is not existing
+    assert [r.url for r in existing] == ["https://a.com/1"]
+    assert [r.url for r in merged] == ["https://a.com/1", "https://b.com/2"]
+    # 복사본의 인덱스도 독립적
+    again = merge_results(existing, [_record("https://b.com/2", "b")])
+    assert [r.url for r in again] == [r.url for r in merged]
+
+
+def test_merge_accepts_plain_list_from_checkpoint():
+    merged = merge_results([_record("https://a.com/1", "a")], [_record("https://a.com/1", "a")])
+    assert isinstance(merged, ResultList) and len(merged) == 1
+
+
+def test_serializer_roundtrip_keeps_dedup():
+    serde = create_serializer()
+    results = merge_results([], [_record("https://a.com/1", "a"), _record("https://b.com/2", "b")])
+    restored = serde.loads_typed(serde.dumps_typed(results))
+
+    assert [r.url for r in restored] == ["https://a.com/1", "https://b.com/2"]
+    assert all(isinstance(r, ResultRecord) for r in restored)
+    merged = merge_results(restored, [_record("https://www.a.com/1/", "new"), _record("https://c.com/3", "b")])
+    assert [r.url for r in merged] == ["https://a.com/1", "https://b.com/2"]
+    merged = merge_results(merged, [_record("https://c.com/3", "c")])
+    assert [r.url for r in merged] == ["https://a.com/1", "https://b.com/2", "https://c.com/3"]
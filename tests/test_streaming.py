@@ -0,0 +1,47 @@
+"""
+JsonStringFieldStream 테스트: 조각 경계와 관계없이 json.loads와 같은 값
+"""
+import json
+
+import pytest
+
+from src.graph.streaming import JsonStringFieldStream
+
+VALUE = 'PETG는 \\"230~250도\\"\\n\\t경로 C:\\\\temp \\u00b0C 😀 \\ud83d\\ude00 끝'
+DOCUMENT = '{"summary": "무시", "synthesis": "%s", "confidence": 0.9}' % VALUE
+
+
+def _stream(chunks) -> tuple[str, JsonStringFieldStream]:
+    stream = JsonStringFieldStream("synthesis")
+    return "".join(stream.feed(chunk) for chunk in chunks), stream
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, len(DOCUMENT)])
+def test_any_chunking_decodes_like_json_loads(size):
+    text, stream = _stream(DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size))
+    assert text == json.loads(DOCUMENT)["synthesis"]
+    assert stream.done
+
+
+def test_every_split_point_matches_json_loads():
+    expected = json.loads(DOCUMENT)["synthesis"]
+    for split in range(len(DOCUMENT) + 1):
+        text, _ = _stream([DOCUMENT[:split], DOCUMENT[split:]])
+        assert text == expected, split
+
+
+def test_value_is_emitted_incrementally_and_stops_at_closing_quote():
+    stream = JsonStringFieldStream("synthesis")
+    assert stream.feed('{"synth') == ""
+    assert stream.feed('esis": "PETG') == "PETG"
+    # 이스케이프가 조각 끝에서 잘리면 다음 조각까지 보류
+    assert stream.feed(" \\") == " "
+    assert stream.feed('n온도') == "\n온도"
+    assert stream.feed('", "other": "x"}') == ""
+    assert stream.done
+    assert stream.feed("더 이상 없음") == ""
+
+
+def test_missing_field_yields_nothing():
+    text, stream = _stream(['{"summary": "a"', ', "confidence": 1}'])
+    assert text == "" and not stream.done
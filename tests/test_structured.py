@@ -0,0 +1,82 @@
+"""
+구조화 출력 테스트: JSON 추출, 스키마 검증, 한 번의 수정 요청
+"""
+import asyncio
+
+import pytest
+
+from src.graph import nodes
+from src.graph.structured import (
+    EvaluationResult,
+    StructuredOutputError,
+    extract_json,
+    parse_structured,
+)
+
+VALID = '{"is_sufficient": true, "confidence": 0.8, "missing": []}'
+
+
+@pytest.mark.parametrize("text", [
+    VALID,
+    f"```json\n{VALID}\n```",
+    f"결과입니다: {VALID} 이상입니다.",
+    '{"is_sufficient": true, "confidence": 0.8, "missing": [],}',
+    f"[{VALID}]",
+])
+def test_parse_structured_accepts_common_llm_wrappings(text):
+    result = parse_structured(text, EvaluationResult)
+    assert result == EvaluationResult(is_sufficient=True, confidence=0.8, missing=[])
+
+
+def test_parse_structured_errors_keep_response():
+    with pytest.raises(StructuredOutputError) as no_json:
+        extract_json("JSON이 없습니다")
+    assert no_json.value.response == "JSON이 없습니다"
+
+    with pytest.raises(StructuredOutputError, match="confidence") as invalid:
+        parse_structured('{"confidence": "높음"}', EvaluationResult)
+    assert invalid.value.response == '{"confidence": "높음"}'
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    """call_gemini 응답을 순서대로 돌려주고 프롬프트/결과 기록을 모음"""
+    state = {"responses": [], "prompts": [], "outcomes": []}
+
+    async def fake_call_gemini(prompt, schema=None, **kwargs):
+        state["prompts"].append(prompt)
+        return state["responses"].pop(0)
+
+    monkeypatch.setattr(nodes, "call_gemini", fake_call_gemini)
+    monkeypatch.setattr(
+        nodes, "record_structured_output",
+        lambda schema, outcome: state["outcomes"].append((schema, outcome))
+    )
+    return state
+
+
+def test_valid_response_needs_no_repair(scripted):
+    scripted["responses"] = [VALID]
+    result = asyncio.run(nodes.call_gemini_structured("평가", EvaluationResult))
+    assert result.is_sufficient is True
+    assert len(scripted["prompts"]) == 1
+    assert scripted["outcomes"] == [("EvaluationResult", "ok")]
+
+
+def test_invalid_response_is_repaired_once(scripted):
+    scripted["responses"] = ['{"confidence": "높음"}', VALID]
+    result = asyncio.run(nodes.call_gemini_structured("평가", EvaluationResult))
+    assert result.confidence == 0.8
+    assert len(scripted["prompts"]) == 2
+    # 수정 요청에는 검증 오류와 첫 응답이 포함됨
+    assert "confidence" in scripted["prompts"][1] and '"높음"' in scripted["prompts"][1]
+    assert scripted["outcomes"] == [("EvaluationResult", "repaired")]
+
+
+def test_failed_repair_raises_with_first_response(scripted):
+    scripted["responses"] = ["JSON 아님", "여전히 아님"]
+    with pytest.raises(StructuredOutputError) as error:
+        asyncio.run(nodes.call_gemini_structured("평가", EvaluationResult))
+    assert error.value.response == "JSON 아님"
+    assert len(scripted["prompts"]) == 2
+    assert scripted["outcomes"] == [("EvaluationResult", "failed")]
@@ -0,0 +1,42 @@
+"""
+Tavily 검색 오류 전달 테스트 (빈 결과로 삼키지 않고 노드의 쿼리별 오류로 기록)
+"""
+import asyncio
+
+import pytest
+
+from src.graph import nodes
+from src.graph.state import ResearchPlan
+from src.tools import tavily_search
+
+
+class FailingTavily:
+    """특정 쿼리에서만 실패하는 클라이언트"""
+
+    def __init__(self, failing_word: str):
+        self.failing_word = failing_word
+
+    async def search(self, query: str, **kwargs) -> dict:
+        if self.failing_word in query:
+            raise ValueError("invalid api key")
+        return {"results": [{"title": query, "url": f"https://example.com/{len(query)}", "content": query}]}
+
+
+@pytest.fixture
+def failing_client(monkeypatch):
+    monkeypatch.setattr(tavily_search, "_client", FailingTavily("stringing"))
+
+
+def test_search_functions_raise_instead_of_returning_empty(failing_client):
+    with pytest.raises(ValueError):
+        asyncio.run(tavily_search.search_3d_printing_web("PETG stringing", use_cache=False))
+    with pytest.raises(ValueError):
+        asyncio.run(tavily_search.search_3d_printing_papers("stringing", use_cache=False))
+
+
+def test_web_search_records_failed_query_and_keeps_others(failing_client):
+    plan = ResearchPlan(main_query="q", sub_queries=["PETG stringing fix", "PETG retraction settings"])
+    update = asyncio.run(nodes.web_search({"research_plan": plan, "executed_queries": []}))
+
+    assert len(update["web_results"]) == 1
+    assert update["errors"] == ["Web search error (PETG stringing fix): invalid api key"]
@@ -0,0 +1,47 @@
+"""
+추적 기록/재현 테스트: 지식베이스 결과 재현, 전역 복원, 헤더 설정 범위
+"""
+import asyncio
+import os
+
+from src import tracing
+from src.graph import nodes
+from src.graph.workflow import run_research_detailed
+from src.tools import tavily_search
+from src.tools.knowledge_base import KnowledgeBase
+
+QUERY = "PLA 출력물이 베드에서 떨어져요"
+
+
+def _record_trace(monkeypatch, directory) -> str:
+    overrides = {"tracing.enabled": True, "tracing.sample_rate": 1.0, "tracing.directory": str(directory)}
+    original = tracing.get_setting
+    monkeypatch.setattr(tracing, "get_setting", lambda key, default=None: overrides.get(key, original(key, default)))
+    asyncio.run(run_research_detailed(QUERY, material="PLA", mode="full", use_cache=False))
+    monkeypatch.setattr(tracing, "get_setting", original)
+    (path,) = directory.glob("*.jsonl.gz")
+    return path
+
+
+def test_replay_uses_recorded_kb_results_and_restores_globals(fake_clients, monkeypatch, tmp_path):
+    path = _record_trace(monkeypatch, tmp_path)
+    trace = tracing.load_trace(path)
+    assert set(trace["header"]["settings"]) <= set(tracing.REPLAY_SETTING_SECTIONS)
+    assert any(call["provider"] == "kb" for call in trace["calls"])
+
+    # 재현 시 현재 KB가 달라져도 기록된 결과를 사용
+    def broken_search(self, *args, **kwargs):
+        raise RuntimeError("index changed")
+
+    monkeypatch.setattr(KnowledgeBase, "semantic_search", broken_search)
+    clients = (nodes._client, tavily_search._client, nodes._kb_lookup)
+    settings_path = os.environ["SETTINGS_PATH"]
+
+    report = asyncio.run(tracing.replay_trace(path))
+
+    assert report["error"] is None
+    assert report["calls"]["missing"] == 0
+    assert report["response_matches"] is True
+    assert all(row["delta_matches"] is not False for row in report["nodes"] if row["node"] == "kb_search")
+    assert (nodes._client, tavily_search._client, nodes._kb_lookup) == clients
+    assert os.environ["SETTINGS_PATH"] == settings_path